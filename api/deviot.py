@@ -428,7 +428,7 @@ def prepare_command(command):
 
     executable = path.join(bin_dir, exe)
 
-    cmd = ['"%s"' % (executable)]
+    cmd = [executable]
     cmd.extend(options)
     cmd.extend(command[1:])
 
@@ -452,32 +452,33 @@ def pio_command(options, verbose=False):
 def run_command(command, cwd=None, env_paths=False):
     '''Commands
 
-    Run all the commands to install the plugin
+    Run all the commands to install the plugin. The command is started
+    without a shell, stderr is merged with stdout
 
     Arguments:
-        command {list} -- list of commands
+        command {list} -- executable and arguments
 
     Keyword Arguments:
         cwd {str} -- current working dir (default: None)
-        prepare_cmd {bool} -- when is true the platformIO command will
-                          be updated to be multi-platform compatible
-                          (default: False)
+        env_paths {str} -- PATH used to run the command, by default the
+                           one stored in deviot.ini (default: False)
 
     Returns:
         [list] -- list[0]: return code list[1]: command output
     '''
-    import subprocess
+    from ..libraries.launcher import spawn, environment
+
+    env = environment()
 
     # defining default env paths
     if(env_paths):
-        environ['PATH'] = env_paths
-
-    command.append("2>&1")
-    command = ' '.join(command)
+        env['PATH'] = env_paths
 
-    process = subprocess.Popen(command, stdin=subprocess.PIPE,
-                               stdout=subprocess.PIPE, cwd=cwd,
-                               universal_newlines=True, shell=True)
+    try:
+        process = spawn(command, cwd=cwd, env=env, universal_newlines=True)
+    except OSError as error:
+        # same code returned by the shell when the command is not found
+        return (127, str(error))
 
     output = process.communicate()
     stdout = output[0]
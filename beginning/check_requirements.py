@@ -155,7 +155,7 @@ class DeviotCheckRequirementsCommand(sublime_plugin.WindowCommand):
             logger.debug("check pio with extra env PATHs")
             logger.debug("extra paths: %s", env)
 
-            out = deviot.run_command(cmd[:-1], env_paths=env)
+            out = deviot.run_command(cmd, env_paths=env)
             logger.debug("output: %s", out)
             status = out[0]
             save_env = True
@@ -6,7 +6,8 @@ from __future__ import absolute_import
 import sublime
 import sublime_plugin
 
-from os import path, rename
+from os import path, rename, replace, remove
+from shutil import copyfileobj
 from threading import Thread
 from urllib.request import Request
 from urllib.request import urlopen
@@ -14,7 +15,6 @@ from urllib.error import HTTPError
 
 from ..api import deviot
 from ..libraries.thread_progress import ThreadProgress
-from ..libraries.file import File
 
 dprint = None
 logger = deviot.create_logger('Deviot')
@@ -49,7 +49,7 @@ class InstallPIO(object):
 
         symlink = deviot.get_sysetting('symlink', 'python')
 
-        cmd = [symlink, 'virtualenv.py', '"%s"' % deviot.dependencies_path()]
+        cmd = [symlink, 'virtualenv.py', deviot.dependencies_path()]
 
         logger.debug("cmd: %s", cmd)
 
@@ -171,14 +171,41 @@ def save_env_paths():
 
 
 def save_board_list():
-    paths = deviot.get_sysetting('env_path', False)
+    """Board list
+
+    Stores the output of `pio boards --json-output` in the boards file,
+    the output (some MB) is copied from the pipe to the file in blocks
+    instead of being loaded in memory. The file is only replaced when
+    the command succeeds
+    """
+    from ..libraries.launcher import spawn
+
     cmd = deviot.pio_command(['boards', '--json-output'])
-    boards = deviot.run_command(cmd, env_paths=paths)[1]
 
     deviot.create_dirs(deviot.user_pio_path())
 
     board_file_path = deviot.boards_file_path()
-    File(board_file_path).write(boards)
+    temp_file_path = board_file_path + '.tmp'
+
+    try:
+        process = spawn(cmd)
+    except OSError as error:
+        logger.debug("boards: %s", error)
+        return
+
+    with open(temp_file_path, 'wb') as file:
+        copyfileobj(process.stdout, file, 64 * 1024)
+
+    process.stdout.close()
+    process.wait()
+
+    # a failed or partial run doesn't replace the last good list
+    if(process.returncode != 0):
+        logger.debug("boards: exit code %s", process.returncode)
+        remove(temp_file_path)
+        return
+
+    replace(temp_file_path, board_file_path)
 
 
 def already_installed():
@@ -12,6 +12,22 @@ from .deviot_rebuild_lib_list import DeviotRebuildLibListCommand
 from .deviot_extra_library_folder import DeviotExtraLibraryFolderCommand
 from .deviot_remove_extra_library_folder import DeviotRemoveExtraLibraryFolderCommand
 from .deviot_compile_sketch import DeviotCompileSketchCommand
+from .deviot_compile_all import DeviotCompileAllCommand
+from .deviot_force_compile import DeviotForceCompileCommand
+from .deviot_build_stats import DeviotBuildStatsCommand
+from .deviot_cancel_all import DeviotCancelAllCommand
+from .deviot_trim_view import DeviotTrimViewCommand
+from .deviot_build_logs import DeviotBuildLogsCommand
+from .deviot_syntax_benchmark import DeviotSyntaxBenchmarkCommand
+from .deviot_problems import DeviotProblemsCommand
+from .deviot_next_problem import DeviotNextProblemCommand
+from .deviot_serial_stats import DeviotSerialStatsCommand
+from .deviot_display_mode_benchmark import DeviotDisplayModeBenchmarkCommand
+from .deviot_monitor_snapshot import DeviotMonitorSnapshotCommand
+from .deviot_replace_view import DeviotReplaceViewCommand
+from .deviot_serial_plotter import DeviotSerialPlotterCommand
+from .deviot_plotter_export import DeviotPlotterExportCommand
+from .deviot_replace_line import DeviotReplaceLineCommand
 from .deviot_upload_sketch import DeviotUploadSketchCommand
 from .deviot_overwrite_upload_baud import DeviotOverwriteUploadBaudCommand
 from .deviot_clean_sketch import DeviotCleanSketchCommand
@@ -81,6 +97,22 @@ __all__ = [
     'DeviotExtraLibraryFolderCommand',
     'DeviotRemoveExtraLibraryFolderCommand',
     'DeviotCompileSketchCommand',
+    'DeviotCompileAllCommand',
+    'DeviotForceCompileCommand',
+    'DeviotBuildStatsCommand',
+    'DeviotCancelAllCommand',
+    'DeviotTrimViewCommand',
+    'DeviotBuildLogsCommand',
+    'DeviotSyntaxBenchmarkCommand',
+    'DeviotProblemsCommand',
+    'DeviotNextProblemCommand',
+    'DeviotSerialStatsCommand',
+    'DeviotDisplayModeBenchmarkCommand',
+    'DeviotMonitorSnapshotCommand',
+    'DeviotReplaceViewCommand',
+    'DeviotSerialPlotterCommand',
+    'DeviotPlotterExportCommand',
+    'DeviotReplaceLineCommand',
     'DeviotUploadSketchCommand',
     'DeviotOverwriteUploadBaudCommand',
     'DeviotCleanSketchCommand',
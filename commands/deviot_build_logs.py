@@ -0,0 +1,61 @@
+import time
+import zlib
+
+from os import path
+from sublime import status_message
+from sublime_plugin import WindowCommand
+from ..libraries.I18n import I18n
+from ..libraries.quick_panel import quick_panel
+from ..libraries.messages import console_syntax
+from ..platformio import build_log
+
+
+class DeviotBuildLogsCommand(WindowCommand):
+    """
+    Lists the stored build logs (newest first) and opens the selected
+    one in a new view, only its gzip member is read
+
+    Extends: sublime_plugin.WindowCommand
+    """
+
+    def run(self):
+        self.entries = list(reversed(build_log.read_index(existing=True)))
+
+        if(not self.entries):
+            status_message(I18n().translate('no_build_logs'))
+            return
+
+        items = []
+        for entry in self.entries:
+            started = time.strftime('%Y-%m-%d %H:%M:%S',
+                                    time.localtime(entry['time']))
+            project = entry.get('project') or '-'
+            items.append(['{0} | {1}'.format(entry.get('env'), entry.get('type')),
+                          '{0} | exit {1} | {2}'.format(
+                              started, entry.get('exit'),
+                              path.basename(project))])
+
+        quick_panel(items, self.open_log, flags=0)
+
+    def open_log(self, selected):
+        if(selected == -1):
+            return
+
+        entry = self.entries[selected]
+
+        # the log was removed or truncated after the list was shown
+        try:
+            text = build_log.read_log(entry)
+        except (IOError, OSError, ValueError, EOFError, zlib.error):
+            build_log.submit(build_log.prune_index)
+            status_message(I18n().translate('no_build_logs'))
+            return
+
+        started = time.strftime('%H:%M:%S', time.localtime(entry['time']))
+
+        view = self.window.new_file()
+        view.set_name('{0} {1}.log'.format(entry.get('env'), started))
+        view.set_scratch(True)
+        view.assign_syntax(console_syntax())
+        view.run_command('append', {'characters': text})
+        view.set_read_only(True)
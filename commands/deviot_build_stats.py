@@ -0,0 +1,54 @@
+import json
+
+from os import path
+from sublime_plugin import WindowCommand
+from ..api import deviot
+from ..platformio import metrics
+from ..libraries.messages import Messages
+from ..libraries.tools import format_ms
+
+
+class DeviotBuildStatsCommand(WindowCommand):
+    """
+    Shows the percentiles of the commands metrics grouped by environment
+    and command type, and the stats of the console queue. With
+    export=True the summary is saved as JSON in
+    Packages/User/Deviot/build_stats.json and opened
+
+    Extends: sublime_plugin.WindowCommand
+    """
+
+    def run(self, export=False):
+        groups = metrics.summary(metrics.read_records())
+
+        if(export):
+            stats_path = path.join(deviot.user_plugin_path(),
+                                   'build_stats.json')
+            with open(stats_path, 'w') as file:
+                json.dump(groups, file, sort_keys=True, indent=4)
+            self.window.open_file(stats_path)
+            return
+
+        view = self.window.new_file()
+        view.set_name('Deviot Build Stats')
+        view.set_scratch(True)
+        text = metrics.format_summary(groups) + console_stats()
+        view.run_command('append', {'characters': text})
+        view.set_read_only(True)
+
+
+def console_stats():
+    """Console stats
+
+    Returns:
+        str -- queue depth and write latency of the console
+    """
+    stats = Messages.stats()
+    latency = stats['latency']
+
+    return ('\nconsole: {0} writes, {1} chunks, {2} characters, '
+            'queue depth {3} (max {4}), latency p50 {5} p90 {6} max {7}\n'
+            ).format(stats['flushes'], stats['chunks'], stats['characters'],
+                     stats['depth'], stats['max_depth'],
+                     format_ms(latency['p50']), format_ms(latency['p90']),
+                     format_ms(latency['max']))
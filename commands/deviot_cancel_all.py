@@ -0,0 +1,20 @@
+from sublime import status_message
+from sublime_plugin import WindowCommand
+from ..libraries.I18n import I18n
+from ..platformio.scheduler import Scheduler
+
+
+class DeviotCancelAllCommand(WindowCommand):
+    """
+    Cancels the running PlatformIO commands (with their child processes)
+    and removes the queued ones
+
+    Extends: sublime_plugin.WindowCommand
+    """
+
+    def run(self):
+        cancelled = Scheduler().cancel_all()
+        status_message(I18n().translate('cancelled_jobs{0}', cancelled))
+
+    def is_enabled(self):
+        return not Scheduler().is_idle()
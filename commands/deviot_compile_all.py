@@ -0,0 +1,7 @@
+from sublime_plugin import WindowCommand
+from ..platformio.compile import Compile
+
+
+class DeviotCompileAllCommand(WindowCommand):
+    def run(self):
+        Compile(all_envs=True)
@@ -0,0 +1,100 @@
+import os
+import time
+
+from sublime_plugin import WindowCommand
+from ..libraries.serial_format import DisplayFormatter
+
+MODES = ['Text', 'ASCII', 'HEX', 'Mix']
+
+
+class DeviotDisplayModeBenchmarkCommand(WindowCommand):
+    """
+    Measures the speed (MB/s) of the serial monitor formatter in each
+    display mode, compared with the previous implementation (one string
+    concatenation per byte). The data is random, received in chunks of
+    the given size
+
+    Extends: sublime_plugin.WindowCommand
+    """
+
+    def run(self, size=1, chunk=4096):
+        data = os.urandom(chunk)
+        count = max(1, int(size * 1024 * 1024 / chunk))
+
+        lines = ['{0} chunks of {1} bytes'.format(count, chunk)]
+
+        for mode in MODES:
+            formatter = DisplayFormatter(mode)
+            current = measure(lambda: formatter.format(data), count, chunk)
+            previous = measure(lambda: legacy_display_mode(data, mode),
+                               count, chunk)
+
+            lines.append('{0}: {1:.1f} MB/s (previous {2:.1f} MB/s)'.format(
+                mode, current, previous))
+
+        view = self.window.new_file()
+        view.set_name('Deviot Display Mode Benchmark')
+        view.set_scratch(True)
+        view.run_command('append', {'characters': '\n'.join(lines) + '\n'})
+        view.set_read_only(True)
+
+
+def measure(function, count, chunk):
+    """Measure
+
+    Returns:
+        float -- MB per second
+    """
+    start = time.time()
+    for index in range(count):
+        function()
+    elapsed = max(time.time() - start, 1e-6)
+
+    return count * chunk / elapsed / (1024 * 1024)
+
+
+def legacy_display_mode(inp_text, display_mode, str_len=0):
+    """
+    Previous implementation of serial.display_mode, kept as reference
+    """
+    text = u''
+
+    if display_mode == 'ASCII':
+        for character in inp_text:
+            text += chr(character)
+
+    elif display_mode == 'HEX':
+        for (index, character) in enumerate(inp_text):
+            text += u'%02X ' % character
+            if (index + str_len + 1) % 8 == 0:
+                text += '\t'
+            if (index + str_len + 1) % 16 == 0:
+                text += '\n'
+
+    elif display_mode == 'Mix':
+        text_mix = u''
+        for (index, character) in enumerate(inp_text):
+            text_mix += chr(character)
+            text += u'%02X ' % character
+
+            if (index + str_len + 1) % 8 == 0:
+                text += '\t'
+
+            if (index + str_len + 1) % 16 == 0:
+                text_mix = text_mix.replace('\n', '+')
+                text += text_mix
+                text += '\n'
+                text_mix = ''
+
+        if(text_mix):
+            less = (31 - index)
+            for sp in range(less):
+                text += '   '
+            text += '\t'
+            text += text_mix
+
+    else:
+        text = inp_text.decode('utf-8', 'replace')
+        text = text.replace('\r', '')
+
+    return text
@@ -0,0 +1,7 @@
+from sublime_plugin import WindowCommand
+from ..platformio.compile import Compile
+
+
+class DeviotForceCompileCommand(WindowCommand):
+    def run(self):
+        Compile(force=True)
@@ -0,0 +1,45 @@
+from sublime import status_message
+from sublime_plugin import WindowCommand
+from ..libraries import serial
+from ..libraries.I18n import I18n
+from ..libraries.quick_panel import quick_panel
+from ..libraries.serial_format import DisplayFormatter
+
+
+class DeviotMonitorSnapshotCommand(WindowCommand):
+    """
+    Opens the data kept in the ring of a high-throughput serial monitor,
+    including the lines skipped in the monitor view
+
+    Extends: sublime_plugin.WindowCommand
+    """
+
+    def run(self):
+        self.monitors = [(port, monitor) for port, monitor
+                         in sorted(serial.serial_monitor_dict.items())
+                         if monitor.ring]
+
+        if(not self.monitors):
+            status_message(I18n().translate('no_monitor_ring'))
+            return
+
+        if(len(self.monitors) == 1):
+            self.open_snapshot(0)
+            return
+
+        items = [port for port, monitor in self.monitors]
+        quick_panel(items, self.open_snapshot, flags=0)
+
+    def open_snapshot(self, selected):
+        if(selected == -1):
+            return
+
+        port, monitor = self.monitors[selected]
+        formatter = DisplayFormatter(monitor.formatter.mode)
+        text = formatter.format(monitor.ring.snapshot()).replace('\r', '')
+
+        view = self.window.new_file()
+        view.set_name('{0} snapshot'.format(port))
+        view.set_scratch(True)
+        view.run_command('append', {'characters': text})
+        view.set_read_only(True)
@@ -0,0 +1,25 @@
+from sublime import status_message
+from sublime_plugin import WindowCommand
+from ..libraries.I18n import I18n
+from ..platformio import diagnostics_store
+from .deviot_problems import open_diagnostic, current_project
+
+
+class DeviotNextProblemCommand(WindowCommand):
+    """
+    Opens the next (or previous) diagnostic of the last build of the
+    current project, it can be limited to a severity ('error', 'warning',
+    'note')
+
+    Extends: sublime_plugin.WindowCommand
+    """
+
+    def run(self, forward=True, severity=None):
+        build = diagnostics_store.last_build(current_project(self.window))
+        diagnostic = build.step(forward, severity) if build else None
+
+        if(not diagnostic):
+            status_message(I18n().translate('no_problems'))
+            return
+
+        open_diagnostic(self.window, diagnostic)
@@ -0,0 +1,42 @@
+import time
+
+from os import path
+from sublime import status_message
+from sublime_plugin import WindowCommand
+from ..api import deviot
+from ..libraries.I18n import I18n
+from .deviot_serial_plotter import running_monitors
+
+
+class DeviotPlotterExportCommand(WindowCommand):
+    """
+    Saves the values buffered by the serial plotters as CSV files in
+    Packages/User/Deviot/plots/ and opens them
+
+    Extends: sublime_plugin.WindowCommand
+    """
+
+    def run(self):
+        plotters = [(port, monitor.plotter)
+                    for port, monitor in running_monitors()
+                    if monitor.plotter]
+
+        if(not plotters):
+            status_message(I18n().translate('no_plotter'))
+            return
+
+        folder = path.join(deviot.user_plugin_path(), 'plots')
+        deviot.create_dirs(folder)
+
+        for port, plotter in plotters:
+            name = '{0}-{1}.csv'.format(path.basename(port),
+                                        time.strftime('%Y%m%d-%H%M%S'))
+            file_path = path.join(folder, name)
+
+            with open(file_path, 'w') as file:
+                file.write(plotter.to_csv())
+
+            self.window.open_file(file_path)
+
+    def is_enabled(self):
+        return any(monitor.plotter for port, monitor in running_monitors())
@@ -0,0 +1,80 @@
+from os import path
+from sublime import status_message, ENCODED_POSITION
+from sublime_plugin import WindowCommand
+from ..libraries.I18n import I18n
+from ..libraries.quick_panel import quick_panel
+from ..platformio import diagnostics_store
+from ..platformio.pio_bridge import PioBridge
+
+
+class DeviotProblemsCommand(WindowCommand):
+    """
+    Lists the diagnostics of the last build of the current project (errors
+    first) and opens the file of the selected one
+
+    Extends: sublime_plugin.WindowCommand
+    """
+
+    def run(self):
+        build = diagnostics_store.last_build(current_project(self.window))
+
+        if(not build or not build.items):
+            status_message(I18n().translate('no_problems'))
+            return
+
+        order = {'error': 0, 'warning': 1}
+        self.items = sorted(build.items,
+                            key=lambda item: order.get(item.severity, 2))
+
+        entries = []
+        for item in self.items:
+            location = '-'
+            if(item.file):
+                file = item.file
+                if(build.project and file.startswith(build.project)):
+                    file = path.relpath(file, build.project)
+                location = '{0}:{1}:{2}'.format(file, item.line, item.column)
+            entries.append(['{0}: {1}'.format(item.severity, item.text),
+                            location])
+
+        quick_panel(entries, self.on_select, flags=0)
+
+    def on_select(self, selected):
+        if(selected == -1):
+            return
+
+        open_diagnostic(self.window, self.items[selected])
+
+
+def open_diagnostic(window, diagnostic):
+    """Open diagnostic
+
+    Opens the file of the diagnostic with the caret in its position
+
+    Arguments:
+        window {sublime.Window} -- window to open the file
+        diagnostic {Diagnostic} -- diagnostic of the store
+    """
+    if(not diagnostic.file):
+        return
+
+    position = '{0}:{1}:{2}'.format(diagnostic.file, diagnostic.line,
+                                    diagnostic.column)
+    window.open_file(position, ENCODED_POSITION)
+    status_message('{0}: {1}'.format(diagnostic.severity, diagnostic.text))
+
+
+def current_project(window):
+    """Current project
+
+    Arguments:
+        window {sublime.Window} -- window of the command
+
+    Returns:
+        str -- working directory of the file in the active view, None
+               when there isn't one (the last build of any project is used)
+    """
+    if(not window.active_view()):
+        return None
+
+    return PioBridge().cwd
@@ -0,0 +1,20 @@
+from sublime import Region
+from sublime_plugin import TextCommand
+
+
+class DeviotReplaceLineCommand(TextCommand):
+    """
+    Replaces the last line of the view with the given characters, used
+    to print the progress bars redrawn with a carriage return
+
+    Extends: sublime_plugin.TextCommand
+    """
+
+    def run(self, edit, characters=''):
+        read_only = self.view.is_read_only()
+        size = self.view.size()
+        line = self.view.line(size)
+
+        self.view.set_read_only(False)
+        self.view.replace(edit, Region(line.a, size), characters)
+        self.view.set_read_only(read_only)
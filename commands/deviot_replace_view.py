@@ -0,0 +1,18 @@
+from sublime import Region
+from sublime_plugin import TextCommand
+
+
+class DeviotReplaceViewCommand(TextCommand):
+    """
+    Replaces all the content of the view with the given characters, used
+    to redraw the serial plotter
+
+    Extends: sublime_plugin.TextCommand
+    """
+
+    def run(self, edit, characters=''):
+        read_only = self.view.is_read_only()
+
+        self.view.set_read_only(False)
+        self.view.replace(edit, Region(0, self.view.size()), characters)
+        self.view.set_read_only(read_only)
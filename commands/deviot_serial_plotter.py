@@ -0,0 +1,86 @@
+from sublime import set_timeout, status_message
+from sublime_plugin import WindowCommand
+from ..libraries import serial
+from ..libraries.I18n import I18n
+from ..libraries.plotter import Plotter, REFRESH
+from ..libraries.quick_panel import quick_panel
+
+
+class DeviotSerialPlotterCommand(WindowCommand):
+    """
+    Plots the numeric values received by a running serial monitor in a
+    new view, the chart is redrawn while the view and the monitor are
+    open
+
+    Extends: sublime_plugin.WindowCommand
+    """
+
+    def run(self):
+        self.monitors = running_monitors()
+
+        if(not self.monitors):
+            status_message(I18n().translate('no_running_monitor'))
+            return
+
+        if(len(self.monitors) == 1):
+            self.open_plotter(0)
+            return
+
+        items = [port for port, monitor in self.monitors]
+        quick_panel(items, self.open_plotter, flags=0)
+
+    def open_plotter(self, selected):
+        if(selected == -1):
+            return
+
+        port, monitor = self.monitors[selected]
+
+        if(not monitor.plotter):
+            monitor.plotter = Plotter()
+
+        view = self.window.new_file()
+        view.set_name('{0} plotter'.format(port))
+        view.set_scratch(True)
+        view.set_read_only(True)
+        view.settings().set('word_wrap', False)
+        view.settings().set('deviot_plotter', port)
+
+        draw(view, monitor, force=True)
+
+
+def running_monitors():
+    """
+    Serial monitors running, as (port, monitor) tuples
+    """
+    return [(port, monitor) for port, monitor
+            in sorted(serial.serial_monitor_dict.items())
+            if monitor.is_running()]
+
+
+def draw(view, monitor, force=False):
+    """Draw
+
+    Redraws the chart when there are new samples, and schedules the next
+    redraw. It stops when the view is closed or the monitor stopped (the
+    plotter is detached from the monitor)
+
+    Arguments:
+        view {sublime.View} -- plotter view
+        monitor {SerialMonitor} -- monitor feeding the plotter
+
+    Keyword Arguments:
+        force {bool} -- draw even without new samples
+    """
+    plotter = monitor.plotter
+
+    if(not view.is_valid() or not monitor.is_running() or not plotter):
+        monitor.plotter = None
+        return
+
+    if(plotter.dirty or force):
+        width = int(view.viewport_extent()[0] / view.em_width()) - 12
+        height = int(view.viewport_extent()[1] / view.line_height()) - 10
+        text = plotter.render(max(20, width), max(5, min(40, height)))
+        view.run_command('deviot_replace_view', {'characters': text})
+
+    set_timeout(lambda: draw(view, monitor), REFRESH)
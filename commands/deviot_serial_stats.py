@@ -0,0 +1,50 @@
+from sublime_plugin import WindowCommand
+from ..libraries import serial
+from ..libraries.messages import Messages
+from ..libraries.tools import format_ms
+
+
+class DeviotSerialStatsCommand(WindowCommand):
+    """
+    Shows the receive counters of the open serial monitors: reads, bytes,
+    read timeouts, biggest chunk and the latency from the first byte
+    received to the text queued, and from the queue to the monitor view
+
+    Extends: sublime_plugin.WindowCommand
+    """
+
+    def run(self):
+        lines = []
+
+        for port, monitor in sorted(serial.serial_monitor_dict.items()):
+            stats = monitor.stats()
+            reads = stats['reads']
+            average = stats['bytes'] // reads if reads else 0
+
+            lines.append('{0}: {1} reads, {2} bytes (average {3}, max {4}), '
+                         '{5} idle timeouts, receive latency p50 {6} '
+                         'p90 {7} max {8}'.format(
+                             port, reads, stats['bytes'], average,
+                             stats['max_chunk'], stats['idle'],
+                             format_ms(stats['latency']['p50']),
+                             format_ms(stats['latency']['p90']),
+                             format_ms(stats['latency']['max'])))
+
+            if('ring' in stats):
+                lines.append('{0} (high-throughput): {1}'.format(
+                    port, stats['ring']))
+
+        if(not lines):
+            lines.append('no serial monitors open')
+
+        latency = Messages.stats('monitor')['latency']
+        lines.append('monitor views: write latency p50 {0} p90 {1} max {2}'
+                     .format(format_ms(latency['p50']),
+                             format_ms(latency['p90']),
+                             format_ms(latency['max'])))
+
+        view = self.window.new_file()
+        view.set_name('Deviot Serial Stats')
+        view.set_scratch(True)
+        view.run_command('append', {'characters': '\n'.join(lines) + '\n'})
+        view.set_read_only(True)
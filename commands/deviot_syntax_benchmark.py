@@ -0,0 +1,77 @@
+import time
+
+from sublime_plugin import WindowCommand
+from ..libraries.messages import console_syntax, PLAIN_SYNTAX
+
+# lines repeated to build the sample output (verbose build)
+SAMPLE = [
+    '[ Deviot 2.3.0 ] Starting...\n',
+    'Processing uno (platform: atmelavr; board: uno; framework: arduino)\n',
+    'Compiling .pio/build/uno/src/main.cpp.o\n',
+    'avr-g++ -o .pio/build/uno/src/main.cpp.o -c -fno-exceptions -Os '
+    '-Wall -ffunction-sections -fdata-sections -flto -mmcu=atmega328p '
+    '-DF_CPU=16000000L -DPLATFORMIO=40000 -DARDUINO_AVR_UNO '
+    '-Iinclude -Isrc src/main.cpp\n',
+    'src/main.cpp:12:5: warning: unused variable \'value\' '
+    '[-Wunused-variable]\n',
+    'src/main.cpp:20:3: error: \'foo\' was not declared in this scope\n',
+    'src/main.cpp:8:6: note: in definition of \'void setup()\'\n',
+    'Archiving .pio/build/uno/libFrameworkArduino.a\n',
+    'RAM:   [=         ]   9.0% (used 184 bytes from 2048 bytes)\n',
+    '===== [SUCCESS] Took 1.23 seconds =====\n',
+]
+
+
+class DeviotSyntaxBenchmarkCommand(WindowCommand):
+    """
+    Measures the cost of writing and scoping a sample build output with
+    the console syntax and with plain text, the result (milliseconds per
+    MB) is shown in a new view. Use it to choose the
+    'console_plain_threshold' setting
+
+    Extends: sublime_plugin.WindowCommand
+    """
+
+    def run(self, size=1):
+        block = ''.join(SAMPLE)
+        text = block * max(1, int(size * 1024 * 1024 / len(block)))
+        megabytes = len(text) / (1024 * 1024)
+
+        lines = []
+        for name, syntax in (('console', console_syntax()),
+                             ('plain text', PLAIN_SYNTAX)):
+            elapsed = self.measure(syntax, text)
+            lines.append('{0}: {1:.0f}ms per MB ({2:.1f}MB in {3:.0f}ms)'
+                         .format(name, elapsed * 1000 / megabytes,
+                                 megabytes, elapsed * 1000))
+
+        view = self.window.new_file()
+        view.set_name('Deviot Syntax Benchmark')
+        view.set_scratch(True)
+        view.run_command('append', {'characters': '\n'.join(lines) + '\n'})
+        view.set_read_only(True)
+
+    def measure(self, syntax, text):
+        """Measure
+
+        Writes the text in a scratch view and reads the scope of the last
+        point, that waits until the whole view is scoped
+
+        Arguments:
+            syntax {str} -- syntax resource path
+            text {str} -- sample output
+
+        Returns:
+            float -- seconds
+        """
+        view = self.window.create_output_panel('deviot_benchmark')
+        view.assign_syntax(syntax)
+
+        start = time.time()
+        view.run_command('append', {'characters': text, 'force': True})
+        view.scope_name(view.size() - 1)
+        elapsed = time.time() - start
+
+        self.window.destroy_output_panel('deviot_benchmark')
+
+        return elapsed
@@ -0,0 +1,18 @@
+from sublime import Region
+from sublime_plugin import TextCommand
+
+
+class DeviotTrimViewCommand(TextCommand):
+    """
+    Removes the beginning of the view (the oldest output), used to keep
+    the scrollback of the consoles bounded
+
+    Extends: sublime_plugin.TextCommand
+    """
+
+    def run(self, edit, size=0):
+        read_only = self.view.is_read_only()
+
+        self.view.set_read_only(False)
+        self.view.erase(edit, Region(0, size))
+        self.view.set_read_only(read_only)
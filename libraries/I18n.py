@@ -66,10 +66,14 @@ class I18n(object):
         self.get_lang_files()
 
         lang = selection if(self.sys_lang in self.id_name_dict) else 'en'
-        file_path = self.id_name_dict[lang]
-        lang_file = TranslatedLines(file_path)
 
-        self.translations = lang_file.translte_text()
+        # strings not translated yet are shown in english
+        english = TranslatedLines(self.id_name_dict['en'])
+        self.translations = english.translte_text()
+
+        if(lang != 'en'):
+            lang_file = TranslatedLines(self.id_name_dict[lang])
+            self.translations.update(lang_file.translte_text())
         save_setting('lang_id', lang)
 
     def get_lang_ids(self):
@@ -0,0 +1,258 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Launch layer for the external commands (PlatformIO, pip, python).
+
+The PlatformIO executable and the merged PATH are resolved once from
+Packages/User/Deviot/deviot.ini and cached. The cache is invalidated
+when deviot.ini or the bin folder of the Deviot virtual environment
+change (new setting stored, PlatformIO installed or upgraded).
+
+The commands are argv lists started without a shell, with stdout and
+stderr merged in a single pipe and their own environment variables.
+Each command is the leader of a new process group, so it can be
+cancelled with all its children (compiler, linker, uploader).
+"""
+
+from __future__ import absolute_import
+from __future__ import print_function
+from __future__ import division
+from __future__ import unicode_literals
+
+import os
+import sys
+import signal
+import threading
+import subprocess
+
+from shutil import which
+
+from ..api import deviot
+from .readconfig import ReadConfig
+
+_lock = threading.Lock()
+_resolved = {}
+
+# seconds between SIGTERM and SIGKILL when a command is cancelled
+GRACE_PERIOD = 3
+
+
+def mtime(file_path):
+    try:
+        return os.path.getmtime(file_path)
+    except OSError:
+        return None
+
+
+def read_sysettings(keys):
+    """System settings
+
+    Reads the given keys from deviot.ini parsing the file only once
+
+    Arguments:
+        keys {list} -- setting names
+
+    Returns:
+        dict -- {key: value or None}
+    """
+    section = 'config'
+    config = ReadConfig()
+    config.read(deviot.system_ini_path())
+
+    values = {}
+    for key in keys:
+        value = None
+        if(config.has_option(section, key)):
+            value = config.get(section, key)[0]
+        values[key] = value
+
+    return values
+
+
+def resolve():
+    """Resolve
+
+    Executable (as argv prefix) and PATH used to run PlatformIO, it's
+    only calculated again when deviot.ini or the virtualenv changes
+
+    Returns:
+        dict -- {'prefix': list, 'env_path': str, 'external_bins': bool}
+    """
+    global _resolved
+
+    bin_dir = deviot.bin_path()
+    signature = (mtime(deviot.system_ini_path()), mtime(bin_dir))
+
+    with _lock:
+        if(_resolved.get('signature') == signature):
+            return _resolved
+
+        settings = read_sysettings(['external_bins', 'env_path', 'symlink'])
+        env_path = settings['env_path'] or None
+        external_bins = bool(settings['external_bins'])
+
+        if(not env_path or external_bins):
+            prefix = ['platformio']
+        elif(sys.platform == 'darwin'):
+            exe = 'python2' if settings['symlink'] else 'python'
+            prefix = [os.path.join(bin_dir, exe), '-m', 'platformio']
+        else:
+            prefix = [os.path.join(bin_dir, 'platformio')]
+
+        # absolute path, the child doesn't need to search it in the PATH
+        if(not os.path.isabs(prefix[0])):
+            search = env_path or os.environ.get('PATH', '')
+            prefix[0] = which(prefix[0], path=search) or prefix[0]
+
+        _resolved = {'signature': signature,
+                     'prefix': prefix,
+                     'env_path': env_path,
+                     'external_bins': external_bins}
+
+        return _resolved
+
+
+def pio_arguments(options, verbose):
+    """
+    PlatformIO arguments (without the executable) of the command
+    """
+    cmd = " ".join(options)
+    arguments = ['-f', '-c', 'sublimetext']
+    arguments.extend(option.strip() for option in options)
+
+    # verbose mode
+    if(verbose and 'run' in cmd and '-e' in cmd):
+        arguments.extend(['-v'])
+
+    return arguments
+
+
+def pio_command(options, verbose=False):
+    """PlatformIO command
+
+    Arguments:
+        options {list} -- platformio options ex. ['run', '-e', 'uno']
+
+    Keyword Arguments:
+        verbose {bool} -- adds -v to the run command (default: {False})
+
+    Returns:
+        list -- argv ready to be spawned
+    """
+    command = list(resolve()['prefix'])
+    command.extend(pio_arguments(options, verbose))
+
+    return command
+
+
+def environment():
+    """Environment
+
+    Environment variables of the child process, the PATH stored in
+    deviot.ini replaces the one of Sublime Text
+
+    Returns:
+        dict -- new dictionary, it can be modified by the caller
+    """
+    env = os.environ.copy()
+    env_path = resolve()['env_path']
+
+    if(env_path):
+        env['PATH'] = env_path
+
+    return env
+
+
+def spawn(argv, cwd=None, env=None, **options):
+    """Spawn
+
+    Starts the command without a shell, stdout and stderr are merged
+
+    Arguments:
+        argv {list} -- executable and arguments
+
+    Keyword Arguments:
+        cwd {str} -- working directory (default: {None})
+        env {dict} -- environment variables (default: environment())
+        **options -- extra subprocess.Popen arguments
+
+    Returns:
+        subprocess.Popen -- process
+    """
+    if(env is None):
+        env = environment()
+
+    # the executable is searched in the PATH of the child, not the one of
+    # Sublime Text (Windows only looks in the PATH of the parent process)
+    if(not os.path.isabs(argv[0])):
+        found = which(argv[0], path=env.get('PATH', ''))
+        argv = [found or argv[0]] + list(argv[1:])
+
+    # don't open a console window for each command
+    if(sys.platform == 'win32'):
+        startupinfo = subprocess.STARTUPINFO()
+        startupinfo.dwFlags |= subprocess.STARTF_USESHOWWINDOW
+        options.setdefault('startupinfo', startupinfo)
+        options.setdefault('creationflags',
+                           subprocess.CREATE_NEW_PROCESS_GROUP)
+    else:
+        options.setdefault('start_new_session', True)
+
+    options.setdefault('stdin', subprocess.PIPE)
+
+    return subprocess.Popen(argv,
+                            stdout=subprocess.PIPE,
+                            stderr=subprocess.STDOUT,
+                            cwd=cwd,
+                            env=env,
+                            **options)
+
+
+def terminate(process, grace=None):
+    """Terminate
+
+    Stops the process and all its children. In unix the group gets
+    SIGTERM and, after the grace period, SIGKILL (for the children
+    ignoring SIGTERM). In Windows the tree is killed with taskkill
+
+    Arguments:
+        process {subprocess.Popen} -- process started with spawn()
+
+    Keyword Arguments:
+        grace {int} -- seconds before SIGKILL (default: {GRACE_PERIOD})
+    """
+    if(grace is None):
+        grace = GRACE_PERIOD
+
+    if(sys.platform == 'win32'):
+        taskkill = ['taskkill', '/PID', str(process.pid), '/T', '/F']
+        try:
+            spawn(taskkill, env=os.environ.copy()).communicate()
+        except OSError:
+            process.kill()
+        return
+
+    if(not kill_group(process.pid, signal.SIGTERM)):
+        return
+
+    timer = threading.Timer(grace, kill_group, (process.pid, signal.SIGKILL))
+    timer.daemon = True
+    timer.start()
+
+
+def kill_group(group_id, signal_number):
+    """Kill group
+
+    Arguments:
+        group_id {int} -- process group (pid of the leader)
+        signal_number {int} -- signal to send
+
+    Returns:
+        bool -- False when the group doesn't exist anymore
+    """
+    try:
+        os.killpg(group_id, signal_number)
+    except OSError:
+        return False
+    return True
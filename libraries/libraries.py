@@ -314,10 +314,7 @@ class Libraries(Command):
 
         self.run_command(['lib', '--global', 'list', '--json-output'])
 
-        out = self.get_output()
-        out = loads(out)
-
-        self.quicked(out)
+        self.quicked(self.iter_output_json())
 
         File(self.lib_file_path).save_json(self.quick_list)
         from .syntax import Syntax
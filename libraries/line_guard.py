@@ -0,0 +1,129 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Long-line guard for the consoles and serial monitors.
+
+Sublime Text slows down with lines of tens of thousands of characters,
+like the binary garbage received with a wrong baud rate or a minified
+JSON sent by a device. The guard is a streaming stage applied to the
+text before it's queued:
+
+- lines longer than the width are split, each continuation starts with
+  CONTINUATION
+- runs of non-printable characters (control characters and bytes that
+  couldn't be decoded) are replaced by a short summary
+
+The column is kept between calls, so a long line received in several
+chunks is split at the same positions.
+"""
+
+from __future__ import absolute_import
+from __future__ import print_function
+from __future__ import division
+from __future__ import unicode_literals
+
+import re
+
+# prefix of the lines created by splitting a long line
+CONTINUATION = '\u21aa '
+
+# minimum length of a non-printable run to be collapsed
+MIN_RUN = 8
+
+# \t, \n and \r are handled by the console, \ufffd is a byte that
+# couldn't be decoded
+_CHARACTER = '[\x00-\x08\x0b\x0c\x0e-\x1f\x7f\ufffd]'
+_NON_PRINTABLE = re.compile(_CHARACTER)
+_NON_PRINTABLE_RUN = re.compile('%s{%d,}' % (_CHARACTER, MIN_RUN))
+
+
+def _summary(match):
+    return '<{0} non-printable>'.format(len(match.group(0)))
+
+
+class LineGuard(object):
+    """
+    Streaming stage splitting the long lines of a view
+
+    Keyword Arguments:
+        width {int} -- maximum characters per line, 0 without limit
+        collapse {bool} -- collapse the runs of non-printable characters
+    """
+
+    def __init__(self, width=0, collapse=False):
+        self.width = width
+        self.collapse = collapse
+        self.column = 0
+
+    def feed(self, text):
+        """Feed text
+
+        Arguments:
+            text {str} -- text to write, with \\n line endings
+
+        Returns:
+            str -- text with the long lines split
+        """
+        # the search is much faster than the substitution, and the text
+        # is usually clean
+        if(self.collapse and _NON_PRINTABLE.search(text)):
+            text = _NON_PRINTABLE_RUN.sub(_summary, text)
+
+        if(not self.width):
+            return text
+
+        lines = text.split('\n')
+
+        # most of the chunks only have short lines
+        if(self.column + len(lines[0]) <= self.width and
+           max(map(len, lines)) <= self.width):
+            if(len(lines) > 1):
+                self.column = 0
+            self.column += len(lines[-1])
+            return text
+
+        for index, line in enumerate(lines):
+            if(index):
+                self.column = 0
+            lines[index] = self.split(line)
+
+        return '\n'.join(lines)
+
+    def split(self, line):
+        """Split line
+
+        Arguments:
+            line {str} -- part of a line (without \\n), it continues the
+                          current column
+
+        Returns:
+            str -- line with the continuations
+        """
+        # a bare \r redraws the line, only the last redraw is shown
+        carriage = line.rfind('\r')
+        if(carriage != -1):
+            self.column = 0
+            head = line[:carriage + 1]
+            line = line[carriage + 1:]
+        else:
+            head = ''
+
+        if(self.column + len(line) <= self.width):
+            self.column += len(line)
+            return head + line
+
+        width = self.width
+        step = max(1, width - len(CONTINUATION))
+        parts = []
+
+        start = max(0, width - self.column)
+        parts.append(line[:start])
+
+        while(start < len(line)):
+            parts.append(CONTINUATION + line[start:start + step])
+            start += step
+
+        self.column = len(parts[-1])
+
+        return head + '\n'.join(parts)
@@ -28,30 +28,272 @@
 import sublime
 import sublime_plugin
 
+import os
+import re
+import time
 import collections
 import threading
 
 from ..api import deviot
-from .tools import findInOpendView, get_setting
+from .tools import get_setting
+from . import view_registry
+from .line_guard import LineGuard
 from .I18n import I18n
 
 session = {}
 close_panel = False
 viewer_name = 'Deviot Viewer'
 
+# milliseconds between two writes in the console (one frame)
+FRAME = 16
+
+# characters written in all the views in each frame
+FRAME_BUDGET = 64 * 1024
+
+# flush latencies kept to calculate the stats
+LATENCY_SAMPLES = 500
+
+# the scrollback is trimmed when it exceeds the limit by this fraction,
+# so the oldest lines are removed in batches and not in each write
+TRIM_MARGIN = 0.05
+
+# size of a scrollback spill file before it's rotated (one old file kept)
+SPILL_LIMIT = 16 * 1024 * 1024
+
+# seconds of output used to measure the throughput of a view
+THROUGHPUT_WINDOW = 1.0
+
+# syntax used while the output is too fast to be highlighted
+PLAIN_SYNTAX = 'Packages/Text/Plain text.tmLanguage'
+
+# one queue per output view, serviced in round-robin
+view_queues = collections.OrderedDict()
+view_queues_lock = threading.Lock()
+scheduled = False
+queue_stats = {'flushes': 0,
+               'chunks': 0,
+               'characters': 0,
+               'max_depth': 0,
+               'latency': collections.deque(maxlen=LATENCY_SAMPLES),
+               'kinds': {}}
+
+
+class ViewQueue(object):
+    """
+    Chunks waiting to be written in an output view. The rate limit is
+    a token bucket of characters per second (burst of one second)
+
+    Arguments:
+        writer {Messages} -- instance writing in the view
+        rate {int} -- characters per second, 0 without limit
+    """
+
+    def __init__(self, writer, rate=0):
+        self.writer = writer
+        self.rate = rate
+        self.allowance = rate
+        self.updated = time.time()
+        self.chunks = collections.deque()
+        self.carriage = False
+
+    def refill(self, now):
+        if(self.rate):
+            elapsed = now - self.updated
+            self.allowance = min(self.rate, self.allowance + elapsed * self.rate)
+        self.updated = now
+
+    def is_idle(self):
+        """
+        True when there is nothing to write and no rate debt to recover
+        """
+        return not self.chunks and (not self.rate or
+                                    self.allowance >= self.rate)
+
+    def take(self, quantum):
+        """Take chunks
+
+        Removes chunks from the queue up to the quantum (and the rate
+        allowance), the first chunk is always taken when it's allowed,
+        even when it's bigger than the quantum
+
+        Arguments:
+            quantum {int} -- characters allowed in this frame
+
+        Returns:
+            tuple -- (text, enqueue time of the oldest chunk, chunks taken,
+                     True to replace the last line of the view)
+                     or None when nothing can be written
+        """
+        if(not self.chunks or (self.rate and self.allowance <= 0)):
+            return None
+
+        limit = quantum
+        if(self.rate):
+            limit = min(quantum, self.allowance)
+
+        chunks = []
+        oldest = self.chunks[0][0]
+        size = 0
+
+        while(self.chunks and size < limit):
+            text = self.chunks.popleft()[1]
+            chunks.append(text)
+            size += len(text)
+
+        if(self.rate):
+            self.allowance -= size
+
+        text, rewind = self.carriage_return(''.join(chunks))
+
+        return (text, oldest, len(chunks), rewind)
+
+    def carriage_return(self, text):
+        """Carriage return
+
+        A bare \\r (progress bars) replaces the current line instead of
+        adding a new one, so only the last redraw of each line is kept.
+        A \\r at the end of the text is kept pending until the next text
+        arrives, it could be the first half of a \\r\\n
+
+        Arguments:
+            text {str} -- text to write
+
+        Returns:
+            tuple -- (text, True when the current last line of the view
+                     must be replaced by the first line of the text)
+        """
+        rewind = self.carriage and not text.startswith('\n')
+        self.carriage = False
+
+        if('\r' not in text):
+            return (text, rewind)
+
+        text = text.replace('\r\n', '\n')
+
+        if(text.endswith('\r')):
+            text = text.rstrip('\r')
+            self.carriage = True
+
+        lines = text.split('\n')
+
+        if('\r' in lines[0]):
+            rewind = True
+
+        lines = [line[line.rfind('\r') + 1:] for line in lines]
+
+        return ('\n'.join(lines), rewind)
+
+
+def service_queues():
+    """Write consoles
+
+    Takes the queued chunks of each view, in round-robin, and writes
+    them with a single append per view. The FRAME_BUDGET is shared in
+    equal parts between the views with pending text, so a chatty view
+    (serial monitor) can't delay the others (build console). When there
+    is text left, the next write is done in the next frame
+    """
+    global scheduled
+
+    writes = []
+    now = time.time()
+
+    with view_queues_lock:
+        # the empty queues recover their rate debt too, until they are idle
+        for queue in view_queues.values():
+            queue.refill(now)
+
+        active = [queue for queue in view_queues.values() if queue.chunks]
+        quantum = FRAME_BUDGET // max(1, len(active))
+
+        for queue in active:
+            taken = queue.take(quantum)
+            if(taken):
+                writes.append((queue.writer, taken))
+
+        # next frame starts with other view
+        if(active):
+            for key, queue in view_queues.items():
+                if(queue is active[0]):
+                    view_queues.move_to_end(key)
+                    break
+
+        # a queue with a pending \r keeps its state for the next text
+        for key in [key for key, queue in view_queues.items()
+                    if queue.is_idle() and not queue.carriage]:
+            del view_queues[key]
+
+        pending = any(not queue.is_idle() for queue in view_queues.values())
+        if(not pending):
+            scheduled = False
+
+    for writer, (text, oldest, count, rewind) in writes:
+        writer.send_to_file(text, rewind)
+
+        queue_stats['flushes'] += 1
+        queue_stats['chunks'] += count
+        queue_stats['characters'] += len(text)
+        latency = time.time() - oldest
+        queue_stats['latency'].append(latency)
+
+        kinds = queue_stats['kinds']
+        if(writer.kind not in kinds):
+            kinds[writer.kind] = collections.deque(maxlen=LATENCY_SAMPLES)
+        kinds[writer.kind].append(latency)
+
+    if(pending):
+        sublime.set_timeout(service_queues, FRAME)
+
+
+def rate_limit(kind):
+    """Rate limit
+
+    Characters per second allowed in the given kind of view, taken
+    from the 'console_rate_limits' setting
+
+    Arguments:
+        kind {str} -- 'console', 'terminal' or 'monitor'
+
+    Returns:
+        int -- characters per second, 0 without limit
+    """
+    limits = get_setting('console_rate_limits', {})
+
+    try:
+        return max(0, int(limits.get(kind, 0)))
+    except (AttributeError, TypeError, ValueError):
+        return 0
+
 
 class Messages:
     port = None
     window = None
-    text_queue = collections.deque()
-    text_queue_lock = threading.Lock()
 
-    def __init__(self, output_view=None):
+    def __init__(self, output_view=None, panel='deviot', kind='console'):
         self.translate = I18n().translate
         self.output_view = output_view
+        self.panel = panel
+        self.kind = kind
         self._init_text = None
         self._name = None
 
+        # settings are read once, not each time the console is written
+        self.auto_clean = get_setting('auto_clean', True)
+        self.automatic_scroll = get_setting('automatic_scroll', True)
+        self.rate_limit = rate_limit(kind)
+        self.scrollback_lines = get_setting('scrollback_lines', 20000)
+        self.scrollback_chars = get_setting('scrollback_chars', 80 * 20000)
+        self.scrollback_spill = get_setting('scrollback_spill', False)
+        self.plain_threshold = get_setting('console_plain_threshold', 200000)
+
+        # throughput of the view: [window start, characters written]
+        self.throughput = [time.time(), 0]
+        self.plain = False
+        self.rechecking = False
+
+        self.guard = LineGuard(get_setting('long_line_width', 2000),
+                               get_setting('collapse_non_printable', True))
+
     def initial_text(self, text, *args):
         """Intial message
 
@@ -88,7 +330,8 @@ class Messages:
             self.select_output(in_file, direction)
 
         if(not in_file):
-            self.window.run_command("show_panel", {"panel": "output.deviot"})
+            output = "output.{0}".format(self.panel)
+            self.window.run_command("show_panel", {"panel": output})
 
         # change focus to the panel
         self.set_focus()
@@ -116,11 +359,8 @@ class Messages:
         if(in_file):
             self.output_view = self.new_file_panel(direction)
         else:
-            package_name = deviot.plugin_name()
-            syntax = "Packages/{0}/Console.tmLanguage".format(package_name)
-
-            self.output_view = self.window.create_output_panel('deviot')
-            self.output_view.assign_syntax(syntax)
+            self.output_view = self.window.create_output_panel(self.panel)
+            self.output_view.assign_syntax(console_syntax())
         self.output_view.set_read_only(True)
 
     def set_focus(self):
@@ -132,73 +372,238 @@ class Messages:
         window.focus_view(self.output_view)
 
     def print(self, text, *args):
+        """Print message
+
+        Translates the message (status strings of the plugin) and adds it
+        in the queue of the view. Use write() for raw data
+
+        Arguments:
+            text {str} -- message id or text
+            *args {str} -- arguments to be replaced in the text string
         """
-        Adds the string in the deque list
-        """
+        if(isinstance(text, bytes)):
+            text = text.decode('utf-8')
+
         # translate strings before append
-        text = I18n().translate(text, *args)
+        text = self.translate(text, *args)
 
-        self.text_queue_lock.acquire()
-        try:
-            if(type(text) == bytes):
-                text = text.decode('utf-8')
-            self.text_queue.append(text)
-        finally:
-            self.text_queue_lock.release()
+        # fix only end of lines
+        if('\\n' in text[-2:]):
+            text = text.replace('\\n', '\n')
 
-        sublime.set_timeout(self.service_text_queue, 0)
+        self.write(text)
 
-    def service_text_queue(self):
-        """
-        Handles the deque list to print the messages
+    def write(self, text):
+        """Write data
+
+        Adds raw data (compiler output, serial data) in the queue of the
+        view, without translation
+
+        Arguments:
+            text {str/bytes} -- data to print
         """
-        self.text_queue_lock.acquire()
+        if(isinstance(text, bytes)):
+            text = text.decode('utf-8', 'replace')
+
+        # normalized here, out of the UI thread (a bare \r is handled
+        # when the text is written)
+        text = self.guard.feed(text.replace('\r\n', '\n'))
+
+        global scheduled
+
+        with view_queues_lock:
+            key = self.queue_key()
+            queue = view_queues.get(key)
+            if(queue is None):
+                queue = ViewQueue(self, self.rate_limit)
+                view_queues[key] = queue
 
-        is_empty = False
-        try:
-            if(len(self.text_queue) == 0):
+            queue.chunks.append((time.time(), text))
+
+            depth = len(queue.chunks)
+            if(depth > queue_stats['max_depth']):
+                queue_stats['max_depth'] = depth
+
+            # a write is already waiting for the next frame
+            if(scheduled):
                 return
+            scheduled = True
 
-            characters = self.text_queue.popleft()
-            is_empty = (len(self.text_queue) == 0)
+        sublime.set_timeout(service_queues, 0)
+
+    def queue_key(self):
+        """
+        Key of the queue, instances writing in the same view share it
+        """
+        if(self.output_view):
+            return self.output_view.id()
+        return id(self)
 
-            self.send_to_file(characters)
+    def pending(self):
+        """Pending chunks
 
-        finally:
-            self.text_queue_lock.release()
+        Number of chunks waiting to be printed in the view
 
-        if(not is_empty):
-            sublime.set_timeout(self.service_text_queue, 1)
+        Returns:
+            int -- length of the view queue
+        """
+        queue = view_queues.get(self.queue_key())
+        return len(queue.chunks) if queue else 0
 
-    def send_to_file(self, text):
+    def send_to_file(self, text, rewind=False):
         """
-        Prints the text in the window
+        Prints the text in the window, with rewind the last line of the
+        view is replaced by the first line of the text
         """
+        view = self.output_view
 
-        # Cleans output at the 2000 lines, and when auto clean is activated
-        size = self.output_view.size()
-        auto_clean = get_setting('auto_clean', True)
+        # bounded scrollback, when auto clean is activated
+        if(self.auto_clean):
+            self.trim_scrollback()
 
-        if(auto_clean and size > 80 * 20000):  # 20000 lines of 80 charactes
-            self.clean_view()
+        if(self.plain_threshold):
+            self.adapt_syntax(len(text))
 
-        # append text
-        text = text.replace('\r\n', '\n'). replace('\r', '\n')
+        size = view.size()
 
-        # fix only end of lines
-        if('\\n' in text[-2:]):
-            text = text.replace('\\n', '\n')
+        # the view only follows the output when the caret is in the last
+        # line, the user can move it up to read the previous output
+        selection = view.sel()
+        tailing = (len(selection) == 0 or
+                   view.rowcol(selection[-1].b)[0] >= view.rowcol(size)[0])
 
-        self.output_view.run_command('append', {
-                                     'characters': text, "force": True})
+        if(rewind):
+            view.run_command('deviot_replace_line', {'characters': text})
+        else:
+            view.run_command('append', {'characters': text, "force": True})
 
         # check automatic scroll option
-        automatic_scroll = get_setting('automatic_scroll', True)
-        if(len(self.output_view.sel()) > 0 and
-           automatic_scroll or not self._name):
+        if(tailing and (self.automatic_scroll or not self._name)):
+            line = view.rowcol(view.size())[0] + 1
+            view.run_command("goto_line", {"line": line})
+
+    def adapt_syntax(self, size):
+        """Adaptive syntax
+
+        Highlighting megabytes of output takes more time than writing them,
+        so the view is switched to plain text while its throughput is over
+        the 'console_plain_threshold' setting (characters per second). The
+        console syntax is restored when the throughput drops below a quarter
+        of the threshold (the whole view is scoped again, once). While the
+        view is plain text the throughput is measured again after each
+        window, even when nothing is written
 
-            line = self.output_view.rowcol(size)[0] + 1
-            self.output_view.run_command("goto_line", {"line": line})
+        Arguments:
+            size {int} -- characters about to be written
+        """
+        now = time.time()
+        start, count = self.throughput
+        count += size
+        elapsed = now - start
+
+        if(elapsed < THROUGHPUT_WINDOW):
+            self.throughput[1] = count
+            return
+
+        self.throughput = [now, 0]
+        rate = count / elapsed
+        view = self.output_view
+
+        if(not self.plain and rate > self.plain_threshold):
+            if(view.settings().get('syntax') != console_syntax()):
+                return
+            self.plain = True
+            view.assign_syntax(PLAIN_SYNTAX)
+
+            if(not self.rechecking):
+                self.rechecking = True
+                sublime.set_timeout(self.recheck_syntax,
+                                    int(THROUGHPUT_WINDOW * 1000))
+        elif(self.plain and rate < self.plain_threshold / 4):
+            self.plain = False
+            view.assign_syntax(console_syntax())
+
+    def recheck_syntax(self):
+        """
+        Measures the throughput of the plain text view without new text,
+        the output can stop (the command ended) in the middle of a window
+        """
+        if(self.plain):
+            self.adapt_syntax(0)
+
+        if(not self.plain):
+            self.rechecking = False
+            return
+
+        sublime.set_timeout(self.recheck_syntax, int(THROUGHPUT_WINDOW * 1000))
+
+    def trim_scrollback(self):
+        """Trim scrollback
+
+        Removes the oldest lines when the view exceeds the line or
+        character limits ('scrollback_lines', 'scrollback_chars'). The
+        removed text is stored in disk when 'scrollback_spill' is enabled
+        """
+        view = self.output_view
+        size = view.size()
+        point = 0
+
+        lines = view.rowcol(size)[0]
+        max_lines = self.scrollback_lines
+
+        if(max_lines and lines > max_lines * (1 + TRIM_MARGIN)):
+            point = view.text_point(lines - max_lines, 0)
+
+        max_chars = self.scrollback_chars
+
+        if(max_chars and size > max_chars * (1 + TRIM_MARGIN)):
+            point = max(point, view.full_line(size - max_chars).end())
+
+        if(not point):
+            return
+
+        if(self.scrollback_spill):
+            text = view.substr(sublime.Region(0, point))
+            name = self._name or self.panel
+            sublime.set_timeout_async(lambda: spill_text(name, text), 0)
+
+        view.run_command('deviot_trim_view', {'size': point})
+
+    @staticmethod
+    def stats(kind=None):
+        """Console stats
+
+        Queue depth and latency between a chunk being queued and written
+        in the console
+
+        Keyword Arguments:
+            kind {str} -- latency of a kind of view only ('console',
+                          'terminal', 'monitor'), all when it's None
+
+        Returns:
+            dict -- flushes, chunks, characters, views, depth, max_depth,
+                    latency (p50, p90, max in seconds)
+        """
+        from ..platformio.metrics import percentile
+
+        if(kind):
+            latency = sorted(queue_stats['kinds'].get(kind, ()))
+        else:
+            latency = sorted(queue_stats['latency'])
+
+        with view_queues_lock:
+            depth = sum(len(queue.chunks) for queue in view_queues.values())
+            views = len(view_queues)
+
+        return {'flushes': queue_stats['flushes'],
+                'chunks': queue_stats['chunks'],
+                'characters': queue_stats['characters'],
+                'views': views,
+                'depth': depth,
+                'max_depth': queue_stats['max_depth'],
+                'latency': {'p50': percentile(latency, 50),
+                            'p90': percentile(latency, 90),
+                            'max': latency[-1] if latency else None}}
 
     def clean_view(self):
         """Clean message view
@@ -222,7 +627,7 @@ class Messages:
         Recover the message window object
         """
 
-        window, view = findInOpendView(name)
+        window, view = view_registry.find(name)
 
         if(view):
             self.output_view = view
@@ -263,6 +668,7 @@ class Messages:
 
         view = window.new_file()
         view.set_name(self._name)
+        view_registry.register(view)
         view.run_command('toggle_setting', word_wrap)
         view.set_scratch(True)
 
@@ -280,6 +686,40 @@ class Messages:
             self.window = None
 
 
+def console_syntax():
+    """
+    Resource path of the console syntax (Console.sublime-syntax)
+    """
+    return 'Packages/{0}/Console.sublime-syntax'.format(deviot.plugin_name())
+
+
+def spill_text(name, text):
+    """Spill text
+
+    Appends the text removed from the view to
+    Packages/User/Deviot/scrollback/<name>.log, the file is rotated when
+    it reaches SPILL_LIMIT
+
+    Arguments:
+        name {str} -- name of the view
+        text {str} -- removed text
+    """
+    folder = os.path.join(deviot.user_plugin_path(), 'scrollback')
+    deviot.create_dirs(folder)
+
+    file_name = re.sub(r'[^\w.-]+', '_', name).strip('_') or 'console'
+    file_path = os.path.join(folder, file_name + '.log')
+
+    try:
+        if(os.path.getsize(file_path) > SPILL_LIMIT):
+            os.replace(file_path, file_path + '.1')
+    except OSError:
+        pass
+
+    with open(file_path, 'a', encoding='utf-8') as file:
+        file.write(text)
+
+
 def check_empty_panel(window):
     """
     If there is an empty panel will make it active
@@ -0,0 +1,191 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Ring buffer of the high-throughput serial monitor.
+
+At high baud rates the monitor receives more lines than a view can
+show. The reader thread appends each chunk to the ring (raw bytes, kept
+up to RING_SIZE) and to the pending text; the monitor view takes the
+pending text at a fixed refresh rate. When there are more pending lines
+than MAX_LINES (or the pending text grows over RING_SIZE because the
+view can't keep up), only the last ones are rendered, preceded by a
+summary:
+
+…12,344 lines skipped…
+
+The skipped lines are still in the ring (and in the capture file when
+it's enabled), see them with Deviot: Monitor Snapshot.
+"""
+
+from __future__ import absolute_import
+from __future__ import print_function
+from __future__ import division
+from __future__ import unicode_literals
+
+import time
+import threading
+
+from collections import deque
+
+# bytes received kept in memory
+RING_SIZE = 4 * 1024 * 1024
+
+# lines rendered in each refresh
+MAX_LINES = 200
+
+# milliseconds between two renders
+REFRESH = 100
+
+SKIPPED = '\u2026{0:,} lines skipped\u2026\n'
+
+
+class MonitorRing(object):
+    """
+    Received data of a monitor, written by the reader thread and taken
+    by the render timer
+
+    Keyword Arguments:
+        size {int} -- bytes kept in the ring (default: {RING_SIZE})
+        max_lines {int} -- lines rendered each refresh (default: {MAX_LINES})
+    """
+
+    def __init__(self, size=RING_SIZE, max_lines=MAX_LINES):
+        self.size = size
+        self.max_lines = max_lines
+        self.lock = threading.Lock()
+
+        self.chunks = deque()
+        self.stored = 0
+
+        self.pending = deque()
+        self.pending_size = 0
+        self.pending_lines = 0
+        self.pending_skipped = 0
+
+        self.counters = {'bytes': 0,
+                         'lines': 0,
+                         'rendered_lines': 0,
+                         'skipped_lines': 0,
+                         'dropped_renders': 0,
+                         'renders': 0}
+        self.rates = {'bytes': 0.0, 'lines': 0.0}
+        self.last_rate = (time.time(), 0, 0)
+
+    def append(self, data, text):
+        """Append
+
+        Called by the reader thread with each chunk
+
+        Arguments:
+            data {bytes} -- raw chunk
+            text {str} -- chunk formatted with the display mode
+        """
+        lines = text.count('\n')
+
+        with self.lock:
+            self.chunks.append(data)
+            self.stored += len(data)
+
+            while(self.stored > self.size and len(self.chunks) > 1):
+                self.stored -= len(self.chunks.popleft())
+
+            self.pending.append(text)
+            self.pending_size += len(text)
+            self.pending_lines += lines
+
+            # the view is far behind, the oldest pending text is skipped,
+            # the next render shows the summary
+            while(self.pending_size > self.size and len(self.pending) > 1):
+                old = self.pending.popleft()
+                self.pending_size -= len(old)
+                skipped = old.count('\n')
+                self.pending_lines -= skipped
+                self.pending_skipped += skipped
+                self.counters['skipped_lines'] += skipped
+
+            self.counters['bytes'] += len(data)
+            self.counters['lines'] += lines
+
+    def take(self):
+        """Take
+
+        Called by the render timer, returns the text to write in the view
+
+        Returns:
+            str -- pending text, only the last max_lines when there are
+                   more (the rest is summarized)
+        """
+        with self.lock:
+            text = ''.join(self.pending)
+            lines = self.pending_lines
+            dropped = self.pending_skipped
+            self.pending.clear()
+            self.pending_size = 0
+            self.pending_lines = 0
+            self.pending_skipped = 0
+
+        self.counters['renders'] += 1
+
+        if(lines <= self.max_lines):
+            self.counters['rendered_lines'] += lines
+            if(dropped):
+                self.counters['dropped_renders'] += 1
+                return SKIPPED.format(dropped) + text
+            return text
+
+        # the text after the last new line is an incomplete line
+        keep = self.max_lines + (1 if text.endswith('\n') else 0)
+        tail = text.rsplit('\n', keep)[1:]
+        rendered = len(tail) - 1
+        skipped = lines - rendered
+
+        self.counters['rendered_lines'] += rendered
+        self.counters['skipped_lines'] += skipped
+        self.counters['dropped_renders'] += 1
+
+        # the lines dropped by append() are already counted
+        return SKIPPED.format(dropped + skipped) + '\n'.join(tail)
+
+    def update_rates(self):
+        """Rates
+
+        Bytes and lines per second, updated once per second
+
+        Returns:
+            dict -- {'bytes': float, 'lines': float}
+        """
+        now = time.time()
+        start, received, lines = self.last_rate
+        elapsed = now - start
+
+        if(elapsed >= 1):
+            self.rates = {'bytes': (self.counters['bytes'] - received) / elapsed,
+                          'lines': (self.counters['lines'] - lines) / elapsed}
+            self.last_rate = (now, self.counters['bytes'],
+                              self.counters['lines'])
+
+        return self.rates
+
+    def status(self):
+        """Status
+
+        Returns:
+            str -- live counters shown in the status bar of the monitor
+        """
+        rates = self.update_rates()
+
+        return ('{0:.1f} KB/s, {1:,.0f} lines/s, {2:,} skipped lines, '
+                '{3:,} dropped renders').format(
+                    rates['bytes'] / 1024, rates['lines'],
+                    self.counters['skipped_lines'],
+                    self.counters['dropped_renders'])
+
+    def snapshot(self):
+        """Snapshot
+
+        Returns:
+            bytes -- data kept in the ring, oldest first
+        """
+        with self.lock:
+            return b''.join(self.chunks)
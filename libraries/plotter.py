@@ -0,0 +1,280 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Serial plotter.
+
+Numeric values received by the serial monitor are drawn as an ASCII
+chart in a view. Each line is a sample, two formats are recognized:
+
+key:value (or key=value) pairs: temp:21.5 hum:40
+CSV values (comma, semicolon, tab or space): 21.5,40
+
+CSV columns are named by position (1, 2, ...). Each series is a ring
+of SAMPLES values in an array('d'), all the series share the same
+position, a missing value is stored as NaN. Memory doesn't grow with
+the time the plotter runs.
+
+The chart is downsampled to the width of the view (mean of the samples
+of each column) and redrawn at most every REFRESH milliseconds, only
+when there are new samples.
+"""
+
+from __future__ import absolute_import
+from __future__ import print_function
+from __future__ import division
+from __future__ import unicode_literals
+
+import re
+import math
+import codecs
+import threading
+
+from array import array
+from collections import OrderedDict
+
+# samples kept per series
+SAMPLES = 2000
+
+# series plotted, the others are ignored
+MAX_SERIES = 6
+
+# milliseconds between two redraws
+REFRESH = 250
+
+# characters of each series in the chart
+MARKS = '*o+x#@'
+
+NAN = float('nan')
+
+_NUMBER = r'[-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?'
+_PAIR = re.compile(r'([A-Za-z_][\w.-]*)\s*[:=]\s*(' + _NUMBER + r')')
+_FIELDS = re.compile(r'[,;\s]+')
+
+
+def parse_line(line):
+    """Parse line
+
+    Arguments:
+        line {str} -- line received, without the new line
+
+    Returns:
+        list -- (name, value) pairs, empty when the line has no values
+    """
+    pairs = _PAIR.findall(line)
+    if(pairs):
+        values = [(name, float(value)) for name, value in pairs]
+        # 1e999 is read as inf
+        return [(name, value) for name, value in values
+                if math.isfinite(value)]
+
+    fields = [field for field in _FIELDS.split(line.strip()) if field]
+
+    try:
+        values = [float(field) for field in fields]
+    except ValueError:
+        return []
+
+    # float() accepts 'inf' and 'nan', they can't be plotted (and the
+    # columns of the line would be shifted without them)
+    if(not all(math.isfinite(value) for value in values)):
+        return []
+
+    return [(str(index + 1), value) for index, value in enumerate(values)]
+
+
+class Plotter(object):
+    """
+    Numeric series received by a serial monitor
+
+    Keyword Arguments:
+        samples {int} -- samples kept per series (default: {SAMPLES})
+    """
+
+    def __init__(self, samples=SAMPLES):
+        self.samples = samples
+        self.series = OrderedDict()
+        self.head = 0
+        self.count = 0
+        self.total = 0
+        self.dirty = False
+        self.lock = threading.Lock()
+        self.decoder = codecs.getincrementaldecoder('utf-8')('replace')
+        self.partial = ''
+
+    def feed(self, data):
+        """Feed
+
+        Called by the reader thread of the monitor with the raw data
+
+        Arguments:
+            data {bytes} -- data received
+        """
+        text = self.partial + self.decoder.decode(data)
+        lines = text.split('\n')
+        self.partial = lines.pop()
+
+        # a line without end (binary data) can't grow forever
+        if(len(self.partial) > 4096):
+            self.partial = ''
+
+        for line in lines:
+            values = parse_line(line)
+            if(values):
+                self.add(values)
+
+    def add(self, values):
+        """Add sample
+
+        Arguments:
+            values {list} -- (name, value) pairs of a line
+        """
+        with self.lock:
+            head = self.head
+
+            for name, value in values:
+                if(name not in self.series):
+                    if(len(self.series) >= MAX_SERIES):
+                        continue
+                    self.series[name] = array('d', [NAN]) * self.samples
+
+            values = dict(values)
+            for name, series in self.series.items():
+                series[head] = values.get(name, NAN)
+
+            self.head = (head + 1) % self.samples
+            self.count = min(self.count + 1, self.samples)
+            self.total += 1
+            self.dirty = True
+
+    def window(self):
+        """Window
+
+        Returns:
+            OrderedDict -- name: list of the buffered values, oldest first
+        """
+        with self.lock:
+            start = (self.head - self.count) % self.samples
+            window = OrderedDict()
+
+            for name, series in self.series.items():
+                if(start + self.count <= self.samples):
+                    values = series[start:start + self.count]
+                else:
+                    values = series[start:] + series[:self.head]
+                window[name] = values.tolist()
+
+            self.dirty = False
+
+            return window
+
+    def render(self, width=80, height=20):
+        """Render
+
+        Arguments:
+            width {int} -- columns of the chart (without the axis)
+            height {int} -- rows of the chart
+
+        Returns:
+            str -- chart and legend
+        """
+        window = self.window()
+        columns = OrderedDict((name, downsample(values, width))
+                              for name, values in window.items())
+
+        found = [value for values in columns.values()
+                 for value in values if not math.isnan(value)]
+
+        if(not found):
+            return 'Waiting for values (key:value pairs or CSV lines)\n'
+
+        low = min(found)
+        high = max(found)
+        if(high == low):
+            high += 1
+            low -= 1
+
+        grid = [[' '] * width for row in range(height)]
+        scale = (height - 1) / (high - low)
+
+        for mark, values in zip(MARKS, columns.values()):
+            for column, value in enumerate(values):
+                if(not math.isnan(value)):
+                    row = height - 1 - int(round((value - low) * scale))
+                    grid[row][column] = mark
+
+        label_width = max(len(axis_label(high)), len(axis_label(low)))
+        lines = []
+
+        for index, row in enumerate(grid):
+            label = ''
+            if(index == 0):
+                label = axis_label(high)
+            elif(index == height - 1):
+                label = axis_label(low)
+            lines.append('{0:>{1}} |{2}'.format(label, label_width,
+                                                ''.join(row).rstrip()))
+
+        lines.append('{0} +{1}'.format(' ' * label_width, '-' * width))
+
+        for mark, (name, values) in zip(MARKS, window.items()):
+            valid = [value for value in values if not math.isnan(value)]
+            if(not valid):
+                continue
+            lines.append('{0} {1}: last {2:g}  min {3:g}  max {4:g}'.format(
+                mark, name, valid[-1], min(valid), max(valid)))
+
+        lines.append('{0} samples ({1} in the window)'.format(
+            self.total, len(next(iter(window.values()), []))))
+
+        return '\n'.join(lines) + '\n'
+
+    def to_csv(self):
+        """CSV
+
+        Returns:
+            str -- buffered window, one row per sample (missing values
+                   are empty)
+        """
+        window = self.window()
+        names = list(window.keys())
+        first = self.total - len(window[names[0]]) if names else 0
+
+        rows = [','.join(['sample'] + names)]
+        for index, values in enumerate(zip(*window.values())):
+            cells = ['' if math.isnan(value) else '{0:g}'.format(value)
+                     for value in values]
+            rows.append(','.join([str(first + index)] + cells))
+
+        return '\n'.join(rows) + '\n'
+
+
+def downsample(values, width):
+    """Downsample
+
+    Mean of the values of each column (NaN values are ignored), when
+    there are less values than columns they are not stretched
+
+    Arguments:
+        values {list} -- values, oldest first
+        width {int} -- columns
+
+    Returns:
+        list -- at most width values
+    """
+    if(len(values) <= width):
+        return values
+
+    columns = []
+    step = len(values) / width
+
+    for column in range(width):
+        bucket = values[int(column * step):int((column + 1) * step)]
+        valid = [value for value in bucket if not math.isnan(value)]
+        columns.append(sum(valid) / len(valid) if valid else NAN)
+
+    return columns
+
+
+def axis_label(value):
+    return '{0:.6g}'.format(value)
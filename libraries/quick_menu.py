@@ -540,6 +540,9 @@ class QuickMenu(PreferencesBridge):
         selected = self.quick_list[selected][0]
         save_setting('display_mode', selected)
 
+        from .serial import set_display_mode
+        set_display_mode(selected)
+
     @staticmethod
     def baudrate_list():
         """Baudrate list
@@ -6,15 +6,21 @@ from __future__ import print_function
 from __future__ import division
 from __future__ import unicode_literals
 
-from sublime import platform
-from threading import Thread
-from time import sleep
+import os
+import re
+
+from sublime import platform, set_timeout
+from threading import Thread, Lock
+from collections import deque
+from time import time, strftime
 
 from ..api import deviot
 from ..libraries.pyserial.tools import list_ports
 from ..libraries import pyserial
 from .tools import get_setting
 from .messages import Messages
+from .serial_format import DisplayFormatter
+from .monitor_ring import MonitorRing, REFRESH
 from . import status_color
 
 
@@ -43,6 +49,16 @@ def serial_port_list():
 serials_in_use = []
 serial_monitor_dict = {}
 
+# seconds a read waits for the first byte, the loop checks if the monitor
+# was stopped after each timeout
+READ_TIMEOUT = 0.2
+
+# maximum bytes taken from the port in a single read
+READ_SIZE = 64 * 1024
+
+# latencies (first byte received to text queued) kept for the stats
+LATENCY_SAMPLES = 500
+
 
 class SerialMonitor(object):
     """
@@ -53,18 +69,33 @@ class SerialMonitor(object):
         self.port = serial_port
         self.serial = pyserial.Serial()
         self.serial.port = serial_port
+        self.serial.timeout = READ_TIMEOUT
         self.is_alive = False
+        # cancel_read() can't run while the receive thread closes the port
+        self.port_lock = Lock()
+        self.counters = {'reads': 0,
+                         'bytes': 0,
+                         'idle': 0,
+                         'max_chunk': 0,
+                         'latency': deque(maxlen=LATENCY_SAMPLES)}
         self.baudrate = get_setting('baudrate', 9600)
+        self.formatter = DisplayFormatter(get_setting('display_mode', 'Text'),
+                                          get_setting('monitor_timestamps'))
+        self.ring = None
+        self.capture = None
+        self.plotter = None
 
         output_console = get_setting('output_console', False)
         direction = get_setting('monitor_direction', 'right')
 
         version = deviot.version()
-        messages = Messages()
+        messages = Messages(kind='monitor')
         messages.panel_name('serial_monitor_header{0}{1}', version, serial_port)
         messages.create_panel(direction=direction, in_file=not output_console)
 
         self.dprint = messages.print
+        self.write = messages.write
+        self.output_view = messages.output_view
 
         self.clean = messages.clean_view
 
@@ -100,6 +131,14 @@ class SerialMonitor(object):
                 self.serial.open()
                 self.is_alive = True
 
+                # high-throughput mode, the view is rendered at a fixed rate
+                if(is_high_baud(self.baudrate)):
+                    self.ring = MonitorRing()
+                    set_timeout(self.render, REFRESH)
+
+                if(get_setting('monitor_capture', False)):
+                    self.capture = open(capture_path(self.port), 'ab')
+
                 monitor_thread = Thread(target=self.receive)
                 monitor_thread.start()
             else:
@@ -114,6 +153,18 @@ class SerialMonitor(object):
         if(self.port in serials_in_use):
             serials_in_use.remove(self.port)
 
+        # wakes up the receive loop blocked in the read
+        with self.port_lock:
+            if(self.serial.is_open):
+                try:
+                    self.serial.cancel_read()
+                except (OSError, ValueError):
+                    pass
+
+    def close_port(self):
+        with self.port_lock:
+            self.serial.close()
+
     def clean_console(self):
         """Clean console
 
@@ -126,35 +177,116 @@ class SerialMonitor(object):
 
         The loops will run until is_alive is true. After receive the serial data
         it can be converted to the mode selected by the user (ascii, hex, etc)
+
+        The read blocks until the first byte arrives (or READ_TIMEOUT), then
+        all the bytes waiting in the port are taken in the same chunk
         """
-        length_before = 0
+        counters = self.counters
 
         while self.is_alive:
             try:
-                buf_number = self.serial.inWaiting()
-            except:
+                inp_text = self.serial.read(1)
+                received = time()
+                if(inp_text):
+                    waiting = self.serial.in_waiting
+                    if(waiting):
+                        inp_text += self.serial.read(min(waiting, READ_SIZE))
+            except pyserial.serialutil.SerialException:
+                if(not self.is_alive):
+                    break
+                self.close_port()
+                toggle_serial_monitor(self.port)
+                break
+            except (IOError, OSError):
                 status_color.set("error", 3000)
                 self.stop()
+                break
 
-            if(buf_number > 0):
-                try:
-                    inp_text = self.serial.read(buf_number)
-                except pyserial.serialutil.SerialException:
-                    self.serial.close()
-                    toggle_serial_monitor(self.port)
-                    break
+            if(not inp_text):
+                counters['idle'] += 1
+                self.show(b'', self.formatter.flush())
+                continue
+
+            length_in_text = len(inp_text)
+
+            if(self.capture):
+                self.capture.write(inp_text)
+
+            if(self.plotter):
+                self.plotter.feed(inp_text)
+
+            self.show(inp_text, self.formatter.format(inp_text))
+
+            counters['reads'] += 1
+            counters['bytes'] += length_in_text
+            counters['max_chunk'] = max(counters['max_chunk'], length_in_text)
+            counters['latency'].append(time() - received)
+
+        self.close_port()
 
-                length_in_text = len(inp_text)
-                inp_text = display_mode(inp_text, length_before)
+        if(self.capture):
+            self.capture.close()
+            self.capture = None
 
-                self.dprint(inp_text)
+    def show(self, data, text):
+        """Show
 
-                length_before += length_in_text
-                length_before %= 16
+        Sends the received data to the ring (high-throughput mode) or to
+        the monitor view
+
+        Arguments:
+            data {bytes} -- raw data
+            text {str} -- data formatted with the display mode
+        """
+        if(not data and not text):
+            return
+
+        if(self.ring):
+            self.ring.append(data, text)
+        else:
+            self.write(text)
+
+    def render(self):
+        """Render
+
+        Writes the text received since the last refresh (high-throughput
+        mode) and updates the live counters in the status bar, it runs
+        until the monitor is stopped
+        """
+        ring = self.ring
+        if(not ring):
+            return
 
-            sleep(0.04)
+        text = ring.take()
+        if(text):
+            self.write(text)
 
-        self.serial.close()
+        self.output_view.set_status('deviot_monitor', ring.status())
+
+        if(self.is_alive):
+            set_timeout(self.render, REFRESH)
+
+    def stats(self):
+        """Receive stats
+
+        Returns:
+            dict -- reads, bytes, idle (read timeouts), max_chunk,
+                    latency from the first byte received to the text
+                    queued in the monitor (p50, p90, max in seconds) and the ring
+                    counters in high-throughput mode
+        """
+        from ..platformio.metrics import percentile
+
+        stats = dict(self.counters)
+        latency = sorted(stats['latency'])
+        stats['latency'] = {'p50': percentile(latency, 50),
+                            'p90': percentile(latency, 90),
+                            'max': latency[-1] if latency else None}
+
+        if(self.ring):
+            stats['ring'] = self.ring.status()
+
+        return stats
 
     def send(self, out_text):
         """Send text
@@ -203,63 +335,59 @@ def is_available(serial_port):
     return state
 
 
-def display_mode(inp_text, str_len=0):
-    """
-    Convert a text in differents formats (ASCII,HEX)
+def is_high_baud(baudrate):
+    """High baud rate
 
     Arguments:
-        inp_text {string}
-            Text to convert
+        baudrate {int} -- baud rate of the monitor
 
-    Keyword Arguments:
-        str_len {int}
-            leng of the inp_text string (default: {0})
+    Returns:
+        bool -- True when the baud rate is at least 'monitor_high_baud'
+                (the high-throughput mode is used)
+    """
+    high_baud = get_setting('monitor_high_baud', 500000)
+
+    try:
+        return bool(high_baud) and int(baudrate) >= high_baud
+    except (TypeError, ValueError):
+        return False
+
+
+def capture_path(port):
+    """Capture file
+
+    Path of a new capture file of the port in
+    Packages/User/Deviot/captures/, the received bytes are stored as
+    they are
+
+    Arguments:
+        port {str} -- serial port
 
     Returns:
-        [string] -- Converted string
+        str -- file path
     """
-    text = u''
-    display_mode = get_setting("display_mode", 'Text')
-
-    if display_mode == 'ASCII':
-        for character in inp_text:
-            text += chr(character)
-
-    elif display_mode == 'HEX':
-        for (index, character) in enumerate(inp_text):
-            text += u'%02X ' % character
-            if (index + str_len + 1) % 8 == 0:
-                text += '\t'
-            if (index + str_len + 1) % 16 == 0:
-                text += '\n'
-
-    elif display_mode == 'Mix':
-        text_mix = u''
-        for (index, character) in enumerate(inp_text):
-            text_mix += chr(character)
-            text += u'%02X ' % character
-
-            if (index + str_len + 1) % 8 == 0:
-                text += '\t'
-
-            if (index + str_len + 1) % 16 == 0:
-                text_mix = text_mix.replace('\n', '+')
-                text += text_mix
-                text += '\n'
-                text_mix = ''
-
-        if(text_mix):
-            less = (31 - index)
-            for sp in range(less):
-                text += '   '
-            text += '\t'
-            text += text_mix
+    folder = os.path.join(deviot.user_plugin_path(), 'captures')
+    deviot.create_dirs(folder)
 
-    else:
-        text = inp_text.decode('utf-8', 'replace')
-        text = text.replace('\r', '')
+    name = re.sub(r'[^\w.-]+', '_', port).strip('_')
+    file_name = '{0}-{1}.bin'.format(name, strftime('%Y%m%d-%H%M%S'))
+
+    return os.path.join(folder, file_name)
+
+
+def set_display_mode(mode):
+    """Display mode
+
+    Changes the display mode of the open serial monitors, the mode is
+    read from the settings only when a monitor is created
+
+    Arguments:
+        mode {str} -- 'Text', 'ASCII', 'HEX' or 'Mix'
+    """
+    timestamps = get_setting('monitor_timestamps')
 
-    return text
+    for serial_monitor in serial_monitor_dict.values():
+        serial_monitor.formatter = DisplayFormatter(mode, timestamps)
 
 
 def get_serial_monitor(port_id):
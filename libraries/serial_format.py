@@ -0,0 +1,386 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Formatter of the data received by the serial monitor (display_mode
+setting: Text, ASCII, HEX or Mix).
+
+The hex digits of a chunk are produced by binascii.hexlify (C speed,
+bytes.hex() needs Python 3.5). The complete rows are laid out in a
+bytearray of fixed width rows, each column of the rows (a hex digit of
+the same byte, or its character in the Mix text column) is written with
+a single extended slice assignment, so the number of Python steps
+doesn't depend on the size of the chunk. Small chunks (less than
+COLUMN_ROWS rows) are sliced row by row, and the incomplete rows at
+the beginning and at the end of a chunk by half rows. The position in
+the 16 bytes row is kept between chunks:
+
+HEX: the rows are written as the bytes arrive
+Mix: the incomplete last row is written with its text column, and it's
+     redrawn (bare \\r, the console replaces the line) when the next
+     chunk completes it
+
+Text is decoded with an incremental decoder, so a character split
+between two reads is not lost. With timestamps ('monitor_timestamps'
+setting) the text is framed in lines, each one prefixed with the time
+its first byte was received:
+
+host: host time, 12:30:01.123
+relative: seconds since the monitor was opened (monotonic clock)
+"""
+
+from __future__ import absolute_import
+from __future__ import print_function
+from __future__ import division
+from __future__ import unicode_literals
+
+import time
+import codecs
+
+from binascii import hexlify
+
+ROW = 16
+HALF = 8
+
+
+def _mix_byte(byte):
+    # the control characters would break the row, '\n' is shown as '+'
+    if(byte == 10):
+        return ord('+')
+    if(32 <= byte < 127 or byte > 159):
+        return byte
+    return ord('.')
+
+
+# byte -> byte of the text column in Mix mode (decoded as latin-1)
+MIX_TABLE = bytes(bytearray(_mix_byte(byte) for byte in range(256)))
+
+BLANK = '   '
+
+# complete row of the hex column: 'XX ' * 8, tab, 'XX ' * 8, tab
+HEX_ROW = b' ' * (HALF * 3) + b'\t' + b' ' * (HALF * 3) + b'\t'
+
+# position of each byte of the row in HEX_ROW
+OFFSETS = [byte * 3 + (1 if byte >= HALF else 0) for byte in range(ROW)]
+
+# rows of a chunk to write the rows by columns
+COLUMN_ROWS = 32
+
+
+class DisplayFormatter(object):
+    """
+    Converts the chunks received from the serial port to text
+
+    Arguments:
+        mode {str} -- 'Text', 'ASCII', 'HEX' or 'Mix'
+
+    Keyword Arguments:
+        timestamps {str} -- 'host' or 'relative' to prefix each line with
+                            its receive time (Text and ASCII modes only)
+    """
+
+    def __init__(self, mode='Text', timestamps=None):
+        self.mode = mode
+        self.column = 0
+        self.pending = b''
+        self.framer = None
+
+        encoding = 'latin-1' if mode == 'ASCII' else 'utf-8'
+        self.decoder = codecs.getincrementaldecoder(encoding)('replace')
+
+        if(timestamps in ('host', 'relative') and mode in ('Text', 'ASCII')):
+            self.framer = LineFramer(timestamps)
+
+        formats = {'ASCII': self.ascii, 'HEX': self.hex, 'Mix': self.mix}
+        self.format = formats.get(mode, self.text)
+
+    def text(self, data):
+        text = self.decoder.decode(data).replace('\r', '')
+
+        if(self.framer):
+            return self.framer.feed(text)
+        return text
+
+    def ascii(self, data):
+        text = self.decoder.decode(data)
+
+        if(self.framer):
+            return self.framer.feed(text)
+        return text
+
+    def flush(self):
+        """Flush
+
+        Called when nothing was received for a while, returns the
+        incomplete line kept by the line framing (a prompt waiting for
+        input)
+
+        Returns:
+            str -- text to write, empty when there is nothing pending
+        """
+        if(self.framer):
+            return self.framer.flush()
+        return ''
+
+    def hex(self, data):
+        """HEX
+
+        Arguments:
+            data {bytes} -- received chunk
+
+        Returns:
+            str -- 'XX ' per byte, a tab after each 8 bytes and a new line
+                   after each 16 bytes
+        """
+        # the rest of the current row, the complete rows and the
+        # beginning of a new row
+        head = min((ROW - self.column) % ROW, len(data))
+        end = head + (len(data) - head) // ROW * ROW
+        parts = []
+
+        if(head):
+            parts.append(hex_run(data[:head], self.column))
+        if(end > head):
+            parts.append(hex_rows(data[head:end]))
+        if(end < len(data)):
+            parts.append(hex_run(data[end:], 0))
+
+        self.column = (self.column + len(data)) % ROW
+
+        return ''.join(parts)
+
+    def mix(self, data):
+        """Mix
+
+        Arguments:
+            data {bytes} -- received chunk
+
+        Returns:
+            str -- rows with the hex and text columns, the incomplete
+                   last row is redrawn by the next chunk
+        """
+        redraw = bool(self.pending)
+        data = self.pending + data
+
+        complete = len(data) - len(data) % ROW
+        self.pending = data[complete:]
+
+        text = hex_rows(data[:complete], mix=True)
+
+        if(self.pending):
+            text += self.row(self.pending)
+        if(redraw):
+            text = '\r' + text
+
+        return text
+
+    def row(self, data):
+        """Row
+
+        Arguments:
+            data {bytes} -- less than 16 bytes
+
+        Returns:
+            str -- hex column (padded to 16 bytes) and text column
+        """
+        cells = hex_string(data) + BLANK * (ROW - len(data))
+
+        return '{0}\t{1}\t{2}'.format(cells[:HALF * 3],
+                                      cells[HALF * 3:],
+                                      data.translate(MIX_TABLE)
+                                      .decode('latin-1'))
+
+
+class LineFramer(object):
+    """
+    Splits the decoded text in lines and prefixes each line with the
+    monotonic time its first character was received
+
+    Arguments:
+        timestamps {str} -- 'host' or 'relative'
+    """
+
+    def __init__(self, timestamps):
+        self.timestamps = timestamps
+        self.opened = time.monotonic()
+        self.opened_host = time.time()
+        self.partial = ''
+        self.started = None
+        self.continued = False
+
+    def feed(self, text):
+        """Feed
+
+        Arguments:
+            text {str} -- decoded text
+
+        Returns:
+            str -- complete lines received, with their timestamp
+        """
+        received = time.monotonic()
+
+        if(self.started is None):
+            self.started = received
+
+        end = text.rfind('\n')
+        if(end == -1):
+            self.partial += text
+            return ''
+
+        lines = (self.partial + text[:end]).split('\n')
+        self.partial = text[end + 1:]
+
+        # the first line started in a previous chunk
+        first = self.line(self.started, lines[0])
+        rest = [self.line(received, line) for line in lines[1:]]
+
+        self.started = received if self.partial else None
+
+        return first + ''.join(rest)
+
+    def flush(self):
+        """Flush
+
+        Returns:
+            str -- the incomplete line, the rest of it won't have a prefix
+        """
+        if(not self.partial):
+            return ''
+
+        text = self.partial
+        if(not self.continued):
+            text = self.prefix(self.started) + text
+
+        self.partial = ''
+        self.started = None
+        self.continued = True
+
+        return text
+
+    def line(self, received, line):
+        if(self.continued):
+            self.continued = False
+            return line + '\n'
+        return self.prefix(received) + line + '\n'
+
+    def prefix(self, received):
+        """Prefix
+
+        Arguments:
+            received {float} -- monotonic time
+
+        Returns:
+            str -- time prefix of a line
+        """
+        if(self.timestamps == 'relative'):
+            return '{0:10.3f} '.format(received - self.opened)
+
+        host = self.opened_host + (received - self.opened)
+        millis = int(host * 1000) % 1000
+
+        return '{0}.{1:03d} '.format(time.strftime('%H:%M:%S',
+                                                   time.localtime(host)),
+                                     millis)
+
+
+def hex_string(data):
+    """HEX string
+
+    Arguments:
+        data {bytes} -- bytes to convert
+
+    Returns:
+        str -- 'XX ' per byte
+    """
+    digits = hexlify(data).upper()
+
+    cells = bytearray(b' ' * (len(digits) // 2 * 3))
+    cells[0::3] = digits[0::2]
+    cells[1::3] = digits[1::2]
+
+    return cells.decode('ascii')
+
+
+def hex_run(data, column):
+    """HEX run
+
+    Hex column of less than a row, a tab is added after the 8th byte of
+    the row and a tab and a new line after the 16th
+
+    Arguments:
+        data {bytes} -- less than 16 bytes
+        column {int} -- position of the first byte in its row
+
+    Returns:
+        str -- 'XX ' per byte with the separators
+    """
+    cells = hex_string(data)
+    parts = []
+    start = 0
+
+    # at most three parts: the halves of the row
+    while(start < len(data)):
+        size = min(HALF - column % HALF, len(data) - start)
+        parts.append(cells[start * 3:(start + size) * 3])
+
+        start += size
+        column = (column + size) % ROW
+
+        if(column == HALF):
+            parts.append('\t')
+        elif(column == 0):
+            parts.append('\t\n')
+
+    return ''.join(parts)
+
+
+def hex_rows(data, mix=False):
+    """HEX rows
+
+    Complete rows, each column of the rows is written with an extended
+    slice assignment
+
+    Arguments:
+        data {bytes} -- multiple of 16 bytes
+
+    Keyword Arguments:
+        mix {bool} -- add the text column of the Mix mode
+
+    Returns:
+        str -- a line per row
+    """
+    count = len(data) // ROW
+    if(not count):
+        return ''
+
+    # the assignment per column has a fixed cost, a few rows are sliced
+    # one by one
+    if(count < COLUMN_ROWS):
+        cells = hex_string(data)
+        text = data.translate(MIX_TABLE).decode('latin-1') if mix else ''
+        rows = []
+
+        for start in range(0, len(data), ROW):
+            hex_start = start * 3
+            rows.append('{0}\t{1}\t{2}\n'.format(
+                cells[hex_start:hex_start + HALF * 3],
+                cells[hex_start + HALF * 3:hex_start + ROW * 3],
+                text[start:start + ROW]))
+
+        return ''.join(rows)
+
+    tail = b' ' * ROW + b'\n' if mix else b'\n'
+    width = len(HEX_ROW) + len(tail)
+    rows = bytearray((HEX_ROW + tail) * count)
+    digits = hexlify(data).upper()
+
+    for byte, offset in enumerate(OFFSETS):
+        rows[offset::width] = digits[byte * 2::ROW * 2]
+        rows[offset + 1::width] = digits[byte * 2 + 1::ROW * 2]
+
+    if(mix):
+        text = data.translate(MIX_TABLE)
+        for byte in range(ROW):
+            rows[len(HEX_ROW) + byte::width] = text[byte::ROW]
+
+    return rows.decode('latin-1')
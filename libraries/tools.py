@@ -9,7 +9,7 @@ from __future__ import unicode_literals
 from re import search
 from shutil import rmtree
 from os import environ, path, makedirs, getenv, remove
-from sublime import load_settings, save_settings, platform, version, active_window, windows, Region, LAYOUT_BELOW
+from sublime import load_settings, save_settings, platform, version, active_window, Region, LAYOUT_BELOW
 
 from ..api import deviot
 
@@ -82,48 +82,6 @@ def get_headers():
     return headers
 
 
-def create_command(command):
-    """
-    Edit the command depending of the O.S of the user
-    """
-    external_bins = get_sysetting('external_bins', False)
-    env_path = get_sysetting('env_path', False)
-    symlink = get_sysetting('symlink', False)
-
-    if(not env_path or bool(external_bins)):
-        return command
-
-    if(platform() == 'osx'):
-        exe = 'python' if(not bool(symlink)) else 'python2'
-        options = ['-m', command[0]]
-    else:
-        exe = command[0]
-        options = []
-
-    bin_dir = deviot.bin_path()
-    executable = path.join(bin_dir, exe)
-
-    cmd = ['"%s"' % (executable)]
-    cmd.extend(options)
-    cmd.extend(command[1:])
-
-    return cmd
-
-
-def prepare_command(options, verbose):
-    cmd = " ".join(options)
-    command = create_command(['platformio', '-f', '-c', 'sublimetext'])
-    command.extend(options)
-
-    # verbose mode
-    if(verbose and 'run' in cmd and '-e' in cmd):
-        command.extend(['-v'])
-
-    command.append("2>&1")
-
-    return " ".join(command)
-
-
 def get_sysetting(key, default=None):
     """
     Stores the setting in the file:
@@ -238,6 +196,22 @@ def remove_settings():
     message_dialog(text)
 
 
+def format_ms(seconds):
+    """Milliseconds
+
+    Formats a duration of the stats panels
+
+    Arguments:
+        seconds {float} -- duration in seconds, None when there is no data
+
+    Returns:
+        str -- duration like '12.5ms', '-' without data
+    """
+    if(seconds is None):
+        return '-'
+    return '{0:.1f}ms'.format(seconds * 1000)
+
+
 def singleton(cls):
     """
     restricts the instantiation of a class to one object
@@ -312,30 +286,6 @@ def create_sketch(sketch_name, select_path):
         window.focus_view(views[0])
 
 
-def findInOpendView(view_name):
-    """
-    Search a specific view in the list of available views
-
-    Arguments:
-        view_name {string}
-            Name of the view to search
-    """
-    opened_view = None
-    found = False
-    fwindows = windows()
-    for window in fwindows:
-        views = window.views()
-        for view in views:
-            name = view.name()
-            if name == view_name:
-                opened_view = view
-                found = True
-                break
-        if found:
-            break
-    return (window, opened_view)
-
-
 def list_win_volume():
     """List Windows Disc
 
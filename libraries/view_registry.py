@@ -0,0 +1,116 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Registry of the named views (Deviot console, serial monitors, terminal).
+
+The views are indexed by name when they are created, loaded or named
+by Deviot, and removed when they are closed, so finding a view doesn't
+need to walk all the views of all the windows.
+
+Only views with a name are registered (files have an empty name).
+"""
+
+from __future__ import absolute_import
+from __future__ import print_function
+from __future__ import division
+from __future__ import unicode_literals
+
+import sublime
+
+# name -> view
+_views = {}
+
+# view id -> name
+_names = {}
+
+# view id -> window, stored before the view is closed
+_closing = {}
+
+
+def register(view):
+    """Register view
+
+    Indexes the view by its current name, call it after set_name
+
+    Arguments:
+        view {sublime.View} -- view
+    """
+    name = view.name()
+    old = _names.pop(view.id(), None)
+
+    if(old and old != name and _is(_views.get(old), view)):
+        del _views[old]
+
+    if(name):
+        _views[name] = view
+        _names[view.id()] = name
+
+
+def pre_close(view):
+    """Pre close
+
+    Keeps the window of the view, it's not available when it's closed
+
+    Arguments:
+        view {sublime.View} -- view about to be closed
+    """
+    if(view.id() in _names):
+        _closing[view.id()] = view.window()
+
+
+def unregister(view):
+    """Unregister view
+
+    Arguments:
+        view {sublime.View} -- closed view
+
+    Returns:
+        sublime.Window -- window where the view was or None
+    """
+    name = _names.pop(view.id(), None)
+
+    if(name and _is(_views.get(name), view)):
+        del _views[name]
+
+    return _closing.pop(view.id(), None)
+
+
+def find(name):
+    """Find view
+
+    Arguments:
+        name {str} -- name of the view
+
+    Returns:
+        tuple -- (window, view) or (None, None) when it's not open
+    """
+    view = _views.get(name)
+
+    if(view is None):
+        return (None, None)
+
+    if(not view.is_valid()):
+        unregister(view)
+        return (None, None)
+
+    # renamed, it's indexed again with the new name
+    if(view.name() != name):
+        register(view)
+        return (None, None)
+
+    return (view.window(), view)
+
+
+def scan():
+    """Scan
+
+    Registers the named views already open (plugin loaded or reloaded)
+    """
+    for window in sublime.windows():
+        for view in window.views():
+            register(view)
+
+
+def _is(first, second):
+    return first is not None and first.id() == second.id()
@@ -0,0 +1,284 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+No-op build detection.
+
+After a successful compilation, a digest of everything that changes the
+result of the build is stored in a manifest, per project and environment:
+the content of the sources (src_dir, include, lib and lib_extra_dirs
+folders), the options of the environment in platformio.ini and the
+version of the installed PlatformIO packages (toolchains, frameworks).
+
+When the digest is the same in the next compilation, and the build
+folder still exists, there is nothing to compile and PlatformIO is not
+called at all.
+
+The manifest is stored in Packages/User/Deviot/.cache/builds.json
+"""
+
+from __future__ import absolute_import
+from __future__ import print_function
+from __future__ import division
+from __future__ import unicode_literals
+
+import os
+import json
+import hashlib
+import threading
+
+from glob import glob
+
+from ..api import deviot
+from ..libraries.file import File
+from ..libraries.readconfig import ReadConfig
+
+_lock = threading.Lock()
+
+
+class BuildCache(object):
+    """
+    Digest of a project environment and its entry in the manifest
+
+    The digest is calculated by is_up_to_date(), call it after editing
+    platformio.ini and before starting the build (also when the build is
+    forced), store() saves that digest and not the files saved while the
+    build runs
+
+    Arguments:
+        cwd {str} -- project folder (where platformio.ini is located)
+        env {str} -- environment name
+
+    Keyword Arguments:
+        shared {dict} -- digests of the source folders, shared by the
+                         environments of a build so the same sources are
+                         hashed once
+    """
+
+    def __init__(self, cwd, env, shared=None):
+        self.cwd = cwd
+        self.env = env
+        self.key = '{0}|{1}'.format(cwd, env)
+        self.ini_path = os.path.join(cwd, 'platformio.ini')
+        self.shared = {} if shared is None else shared
+        self._digest = None
+
+    def is_up_to_date(self):
+        """Up to date
+
+        True when the project hasn't changed since the last successful
+        compilation of the environment
+
+        Returns:
+            bool -- True to skip the compilation
+        """
+        # taken before the build, even when there is no build folder
+        digest = self.digest()
+
+        if(not self.has_build_folder()):
+            return False
+
+        with _lock:
+            manifest = read_manifest()
+
+        return manifest.get(self.key) == digest
+
+    def store(self):
+        """Store digest
+
+        Saves the digest taken by is_up_to_date() (before the build) in
+        the manifest, call it after a successful compilation
+        """
+        digest = self.digest()
+
+        with _lock:
+            manifest = read_manifest()
+            manifest[self.key] = digest
+            File(manifest_path()).save_json(manifest)
+
+    def invalidate(self):
+        """Invalidate
+
+        Removes the entry of the environment from the manifest, the next
+        compilation will always call PlatformIO
+        """
+        with _lock:
+            manifest = read_manifest()
+            if(manifest.pop(self.key, None) is not None):
+                File(manifest_path()).save_json(manifest)
+
+    def digest(self):
+        """Digest
+
+        Hash of the sources, the environment options and the packages
+        versions. It's calculated once per instance
+
+        Returns:
+            str -- hexadecimal digest
+        """
+        if(self._digest):
+            return self._digest
+
+        sha = hashlib.sha1()
+        config = ReadConfig()
+        config.read(self.ini_path)
+
+        for section in ('platformio', 'env:' + self.env):
+            sha.update(section.encode('utf-8'))
+            for option in sorted(config.options(section) or []):
+                value = config.get(section, option)
+                sha.update('{0}={1}\n'.format(option, value).encode('utf-8'))
+
+        folders = tuple(self.source_folders(config))
+        if(folders not in self.shared):
+            self.shared[folders] = sources_digest(folders)
+        sha.update(self.shared[folders].encode('utf-8'))
+
+        self._digest = sha.hexdigest()
+        return self._digest
+
+    def source_folders(self, config):
+        """Source folders
+
+        Folders of the project compiled by PlatformIO, src_dir is taken
+        from platformio.ini when it's set
+
+        Arguments:
+            config {ReadConfig} -- platformio.ini data
+
+        Returns:
+            list -- existing folders
+        """
+        src_dir = 'src'
+
+        if(config.has_option('platformio', 'src_dir')):
+            src_dir = config.get('platformio', 'src_dir')[0]
+
+        folders = [src_dir, 'include', 'lib']
+
+        # lib_extra_dirs: comma separated or one per line, in the
+        # environment or in the platformio section
+        for section in ('platformio', 'env:' + self.env):
+            if(not config.has_option(section, 'lib_extra_dirs')):
+                continue
+            for value in config.get(section, 'lib_extra_dirs'):
+                folders.extend(str(value).split(','))
+
+        found = []
+        for folder in folders:
+            folder = os.path.expanduser(folder.strip())
+            if(not folder):
+                continue
+
+            # relative paths are relative to the project, not to the
+            # working directory of Sublime Text
+            folder = os.path.normpath(os.path.join(self.cwd, folder))
+            if(os.path.isdir(folder) and folder not in found):
+                found.append(folder)
+
+        return found
+
+    def has_build_folder(self):
+        """Build folder
+
+        Checks if the environment was built and not cleaned
+
+        Returns:
+            bool -- True when the build folder of the environment exists
+        """
+        folders = [os.path.join(self.cwd, '.pioenvs', self.env),
+                   os.path.join(self.cwd, '.pio', 'build', self.env)]
+
+        return any(os.path.isdir(folder) for folder in folders)
+
+
+def sources_digest(folders):
+    """Sources digest
+
+    Hash of the content of the source folders and the packages versions
+
+    Arguments:
+        folders {tuple} -- source folders
+
+    Returns:
+        str -- hexadecimal digest
+    """
+    sha = hashlib.sha1()
+
+    for folder in folders:
+        for file_path in walk_files(folder):
+            sha.update(file_path.encode('utf-8'))
+            with open(file_path, 'rb') as file:
+                sha.update(file.read())
+
+    sha.update(packages_versions().encode('utf-8'))
+
+    return sha.hexdigest()
+
+
+def walk_files(folder):
+    """Walk files
+
+    All the files inside of the folder in a stable order, hidden
+    files and folders are skipped
+
+    Arguments:
+        folder {str} -- root folder
+
+    Returns:
+        list -- file paths
+    """
+    files = []
+
+    for root, dirs, names in os.walk(folder):
+        dirs[:] = sorted(name for name in dirs if not name.startswith('.'))
+        for name in sorted(names):
+            if(not name.startswith('.')):
+                files.append(os.path.join(root, name))
+
+    return files
+
+
+def packages_versions():
+    """Packages versions
+
+    Name and version of each PlatformIO package installed
+
+    Returns:
+        str -- one 'name=version' per line
+    """
+    versions = []
+
+    for package in sorted(glob(deviot.pio_packages())):
+        manifest = os.path.join(package, 'package.json')
+        try:
+            with open(manifest) as file:
+                version = json.load(file).get('version', '')
+        except (IOError, OSError, ValueError):
+            version = ''
+        versions.append('{0}={1}'.format(os.path.basename(package), version))
+
+    return '\n'.join(versions)
+
+
+def manifest_path():
+    """
+    Path to Packages/User/Deviot/.cache/builds.json
+    """
+    cache = deviot.cache_path()
+    deviot.create_dirs(cache)
+
+    return os.path.join(cache, 'builds.json')
+
+
+def read_manifest():
+    """Manifest
+
+    Returns:
+        dict -- {'project|env': digest}
+    """
+    manifest = File(manifest_path()).read_json()
+
+    if(not isinstance(manifest, dict)):
+        return {}
+    return manifest
@@ -0,0 +1,356 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Build logs stored in disk.
+
+The raw output of each command is compressed by a background thread
+and appended as a gzip member to a log file per project and environment:
+
+Packages/User/Deviot/logs/<project>/<env>.log.gz
+
+When a log file reaches the 'build_logs_size' limit (MB) it's rotated
+to <env>.log.gz.1 (the previous .1 file is removed).
+
+Each command is registered in logs/index.jsonl, one JSON object per line:
+
+time: when the command started (epoch)
+project: working directory
+env: environment (or command name when there isn't one)
+type: command type (run, run upload, lib list, etc)
+exit: exit code
+file: log file relative to the logs folder
+offset: position of the gzip member in the file
+length: size of the gzip member
+size: size of the output (uncompressed)
+
+The index is used to read a log without decompressing the whole file.
+"""
+
+from __future__ import absolute_import
+from __future__ import print_function
+from __future__ import division
+from __future__ import unicode_literals
+
+import os
+import re
+import json
+import time
+import zlib
+import hashlib
+import tempfile
+import threading
+
+from collections import deque
+from shutil import copyfileobj
+
+from ..api import deviot
+from ..libraries.tools import get_setting
+
+# zlib window bits to write and read gzip members
+GZIP_BITS = 16 + zlib.MAX_WBITS
+
+_queue = deque()
+_condition = threading.Condition()
+_writer = None
+
+
+def logs_path():
+    """
+    Path to Packages/User/Deviot/logs
+    """
+    logs = os.path.join(deviot.user_plugin_path(), 'logs')
+    deviot.create_dirs(logs)
+
+    return logs
+
+
+def index_path():
+    return os.path.join(logs_path(), 'index.jsonl')
+
+
+def log_file(project, env):
+    """Log file
+
+    Log file of the project and environment, relative to the logs folder
+
+    Arguments:
+        project {str} -- working directory (None for global commands)
+        env {str} -- environment or command name
+
+    Returns:
+        str -- relative path
+    """
+    if(project):
+        digest = hashlib.sha1(project.encode('utf-8')).hexdigest()[:8]
+        folder = '{0}-{1}'.format(os.path.basename(project), digest)
+    else:
+        folder = 'global'
+
+    folder = re.sub(r'[^\w.-]+', '_', folder)
+    name = re.sub(r'[^\w.-]+', '_', env or 'command').strip('_')
+
+    return '{0}/{1}.log.gz'.format(folder, name)
+
+
+class BuildLog(object):
+    """
+    Log of a single command, the data is only queued by the methods,
+    it's compressed and stored by the writer thread
+
+    Arguments:
+        project {str} -- working directory
+        env {str} -- environment or command name
+        kind {str} -- command type
+    """
+
+    def __init__(self, project, env, kind):
+        self.entry = {'time': time.time(),
+                      'project': project,
+                      'env': env,
+                      'type': kind,
+                      'file': log_file(project, env)}
+        self.temp = None
+        self.compressor = None
+        self.size = 0
+
+        submit(self.start)
+
+    def write(self, data):
+        """Write
+
+        Arguments:
+            data {bytes} -- raw output of the command
+        """
+        submit(self.append, data)
+
+    def close(self, exit_code):
+        """Close
+
+        Arguments:
+            exit_code {int} -- exit code of the command
+        """
+        submit(self.store, exit_code)
+
+    # writer thread
+
+    def start(self):
+        self.temp = tempfile.TemporaryFile()
+        self.compressor = zlib.compressobj(6, zlib.DEFLATED, GZIP_BITS)
+
+    def append(self, data):
+        self.size += len(data)
+        self.temp.write(self.compressor.compress(data))
+
+    def store(self, exit_code):
+        """Store
+
+        Appends the compressed output to the log file (rotating it when
+        it's full) and registers the command in the index
+        """
+        self.temp.write(self.compressor.flush())
+        length = self.temp.tell()
+        self.temp.seek(0)
+
+        file_path = os.path.join(logs_path(), self.entry['file'])
+        deviot.create_dirs(os.path.dirname(file_path))
+
+        limit = get_setting('build_logs_size', 8) * 1024 * 1024
+        if(os.path.exists(file_path) and
+           os.path.getsize(file_path) + length > limit):
+            rotate(self.entry['file'])
+
+        with open(file_path, 'ab') as file:
+            offset = file.tell()
+            copyfileobj(self.temp, file)
+
+        self.temp.close()
+
+        self.entry.update({'exit': exit_code,
+                           'offset': offset,
+                           'length': length,
+                           'size': self.size})
+
+        with open(index_path(), 'a') as file:
+            file.write(json.dumps(self.entry, sort_keys=True) + '\n')
+
+
+def submit(function, *args):
+    """Submit
+
+    Queues a task for the writer thread, the thread is started the
+    first time
+
+    Arguments:
+        function {callable} -- task
+        *args -- arguments of the task
+    """
+    global _writer
+
+    with _condition:
+        _queue.append((function, args))
+        _condition.notify()
+
+        if(_writer is None):
+            _writer = threading.Thread(target=write_queue)
+            _writer.daemon = True
+            _writer.start()
+
+
+def write_queue():
+    """Writer thread
+
+    Runs the queued tasks in order, a failing task (disk full, file
+    removed) doesn't stop the thread
+    """
+    while True:
+        with _condition:
+            while not _queue:
+                _condition.wait()
+            function, args = _queue.popleft()
+
+        try:
+            function(*args)
+        except (IOError, OSError, ValueError, AttributeError):
+            pass
+
+
+def rotate(relative):
+    """Rotate
+
+    Moves the log file to <file>.1 and updates the index, the entries of
+    the removed file are dropped
+
+    Arguments:
+        relative {str} -- log file relative to the logs folder
+    """
+    file_path = os.path.join(logs_path(), relative)
+    old = relative + '.1'
+
+    os.replace(file_path, file_path + '.1')
+
+    entries = []
+    for entry in read_index():
+        if(entry.get('file') == old):
+            continue
+        if(entry.get('file') == relative):
+            entry['file'] = old
+        entries.append(entry)
+
+    write_index(entries)
+
+
+def write_index(entries):
+    """Write index
+
+    Replaces the index with the given entries
+
+    Arguments:
+        entries {list} -- registered commands, oldest first
+    """
+    temp_path = index_path() + '.tmp'
+    with open(temp_path, 'w') as file:
+        for entry in entries:
+            file.write(json.dumps(entry, sort_keys=True) + '\n')
+    os.replace(temp_path, index_path())
+
+
+def existing_entries(entries):
+    """Existing entries
+
+    Arguments:
+        entries {list} -- index entries
+
+    Returns:
+        list -- entries whose log file is still in disk
+    """
+    found = {}
+
+    for entry in entries:
+        relative = entry.get('file')
+        if(relative not in found):
+            found[relative] = bool(relative) and os.path.exists(
+                os.path.join(logs_path(), relative))
+
+    return [entry for entry in entries if found[entry.get('file')]]
+
+
+def prune_index():
+    """Prune index
+
+    Drops the entries of the log files removed from the disk (by the user
+    or with the project), it runs in the writer thread
+    """
+    entries = read_index()
+    existing = existing_entries(entries)
+
+    if(len(existing) != len(entries)):
+        write_index(existing)
+
+
+def read_index(existing=False):
+    """Index
+
+    Keyword Arguments:
+        existing {bool} -- only the entries whose log file is in disk, the
+                           others are removed from the index (default: False)
+
+    Returns:
+        list -- registered commands, oldest first
+    """
+    entries = []
+
+    try:
+        with open(index_path()) as file:
+            for line in file:
+                try:
+                    entries.append(json.loads(line))
+                except ValueError:
+                    pass
+    except (IOError, OSError):
+        pass
+
+    if(existing):
+        found = existing_entries(entries)
+        if(len(found) != len(entries)):
+            submit(prune_index)
+        entries = found
+
+    return entries
+
+
+def read_log(entry):
+    """Read log
+
+    Reads only the gzip member of the command
+
+    Arguments:
+        entry {dict} -- index entry
+
+    Returns:
+        str -- output of the command
+    """
+    file_path = os.path.join(logs_path(), entry['file'])
+
+    with open(file_path, 'rb') as file:
+        file.seek(entry['offset'])
+        data = file.read(entry['length'])
+
+    return zlib.decompress(data, GZIP_BITS).decode('utf-8', 'replace')
+
+
+def open_log(cwd, env, kind):
+    """Open log
+
+    Arguments:
+        cwd {str} -- working directory
+        env {str} -- environment or command name
+        kind {str} -- command type
+
+    Returns:
+        BuildLog -- log or None when the 'build_logs' setting is disabled
+    """
+    if(not get_setting('build_logs', True)):
+        return None
+
+    return BuildLog(cwd, env, kind)
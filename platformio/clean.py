@@ -9,6 +9,7 @@ from __future__ import unicode_literals
 from sys import exit
 
 from .initialize import Initialize
+from .build_cache import BuildCache
 from ..libraries.tools import save_setting
 from ..libraries.thread_progress import ThreadProgress
 from ..libraries.I18n import I18n
@@ -43,6 +44,8 @@ class Clean(Initialize):
             self.derror("init_not_possible")
             return
 
+        BuildCache(self.cwd, self.board_id).invalidate()
+
         cmd = ['run', '-t', 'clean', '-e ', self.board_id]
         self.run_command(cmd)
 
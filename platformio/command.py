@@ -22,119 +22,234 @@
 # OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 # SOFTWARE.
 
+import io
 import os
 import time
-import html
 import threading
 import sublime
 
-from re import findall, search
 from sys import platform
-from subprocess import Popen, PIPE
 from functools import partial
-from collections import deque
+from select import select
+
+try:
+    import selectors
+except ImportError:
+    selectors = None
 
 from ..libraries import messages
-from ..libraries.tools import prepare_command, get_setting, get_sysetting
+from ..libraries import launcher
+from ..libraries.tools import get_setting
 from ..libraries.thread_progress import ThreadProgress
 from .project_recognition import ProjectRecognition
+from .scheduler import Scheduler, Job, environment_name
+from .diagnostics import DiagnosticsParser, SummaryFilter, ERROR
+from .output_buffer import OutputBuffer, iter_json_array
+from . import phantoms
+from . import warm_runner
+from . import metrics
+from . import build_log
+from . import diagnostics_store
 
-_COMMAND_QUEUE = deque()
-_BUSY = False
+# queued console chunks allowed before the output pump stops reading
+_MAX_PENDING = 64
 
 
 class AsyncProcess(object):
 
-    def __init__(self, cmd, listener):
+    def __init__(self, cmd, listener, cwd=None, env=None):
         self.listener = listener
         self.killed = False
         self.start_time = time.time()
+        self.cpu_time = None
+        self.max_rss = None
 
-        self.proc = Popen(
-            cmd,
-            stdout=PIPE,
-            stderr=PIPE,
-            stdin=PIPE,
-            shell=True)
+        # argv list without shell, stderr is merged in the stdout pipe
+        self.proc = launcher.spawn(cmd, cwd=cwd, env=env)
 
-        if(self.proc.stdout):
-            th1 = threading.Thread(target=self.read_stdout)
-            th1.start()
-            th1.join()
-            ThreadProgress(th1, '', '')
+        self.spawn_time = time.time() - self.start_time
 
-        if(self.proc.stderr):
-            th2 = threading.Thread(target=self.read_stderr)
-            th2.start()
-            th2.join()
+        # a single pump streams both pipes, the constructor returns right away
+        self.pump = threading.Thread(target=self.read_output)
+        self.pump.start()
+        ThreadProgress(self.pump, '', '')
 
     def kill(self):
         """Kill process
 
-        kill the encapsulated subprocess.Popen
+        Stops the process and its children, the output read until now is
+        still delivered and the listener is notified when it ends
         """
         if(not self.killed):
             self.killed = True
-            if(platform == 'win32'):
-                startupinfo = subprocess.STARTUPINFO()
-                startupinfo.dwFlags |= subprocess.STARTF_USESHOWWINDOW
-                subprocess.Popen("taskkill /PID " + str(self.proc.pid),
-                                 startupinfo=startupinfo)
-            else:
-                self.proc.terminate()
-            self.listener = None
+            launcher.terminate(self.proc)
 
     def poll(self):
         return self.proc.poll() is None
 
+    def wait(self):
+        """Wait process
+
+        Blocks the calling thread until both pipes are drained and
+        the listener was notified
+        """
+        self.pump.join()
+
     def exit_code(self):
         """
         return the exit code
         """
         return self.proc.poll()
 
-    def read_stdout(self):
-        """Read stdout output
+    def read_output(self):
+        """Read output
 
-        Reads the stdout outputs when the data is available
-        and send it to the listener to be printed
+        Streams the stdout and stderr outputs concurrently to the listener.
+        Pipes can't be polled on Windows, so there each pipe gets its own
+        reader thread, otherwise both pipes are multiplexed in this thread
         """
-        while True:
-            data = os.read(self.proc.stdout.fileno(), 2 ** 15)
+        streams = [stream for stream in (self.proc.stdout, self.proc.stderr)
+                   if stream]
 
-            if(len(data) > 0):
-                if(self.listener):
-                    self.listener._on_data(data)
+        try:
+            if(platform == 'win32'):
+                readers = []
+                for stream in streams:
+                    reader = threading.Thread(target=self.read_stream,
+                                              args=(stream,))
+                    reader.start()
+                    readers.append(reader)
+
+                for reader in readers:
+                    reader.join()
             else:
-                self.proc.stdout.close()
-                if(self.listener):
-                    time.sleep(0.01)
-                    self.listener._on_finished(self)
-                break
+                self.select_streams(streams)
+        except Exception:
+            # the output can't be read anymore, don't let the process
+            # block on a full pipe
+            self.kill()
+            for stream in streams:
+                stream.close()
+            raise
+        finally:
+            # the listener is always notified, otherwise its job would
+            # keep the worker busy forever
+            self.reap()
+
+            if(self.listener):
+                time.sleep(0.01)
+                self.listener._on_finished(self)
+
+    def reap(self):
+        """Reap process
+
+        Waits the end of the process, in unix it also gets the CPU time
+        and peak memory used by the process and its children
+        """
+        if(not hasattr(os, 'wait4')):
+            self.proc.wait()
+            return
+
+        try:
+            pid, status, usage = os.wait4(self.proc.pid, 0)
+        except OSError:
+            # already reaped by Popen
+            self.proc.wait()
+            return
+
+        if(os.WIFSIGNALED(status)):
+            self.proc.returncode = -os.WTERMSIG(status)
+        else:
+            self.proc.returncode = os.WEXITSTATUS(status)
+
+        self.cpu_time = usage.ru_utime + usage.ru_stime
+        self.max_rss = usage.ru_maxrss
 
-    def read_stderr(self):
-        """Read stderr output
+        # macOS reports bytes, linux KB
+        if(platform == 'darwin'):
+            self.max_rss //= 1024
 
-        Reads the stderr outputs when the data is available
-        and send it to the listener to be printed
+    def select_streams(self, streams):
+        """Select streams
+
+        Waits on all the given pipes at once and sends the data to the
+        listener as soon as any of them is readable, until all of them
+        reach the end of file
+
+        Arguments:
+            streams {list} -- pipes (file objects) to read
         """
-        while True:
-            data = os.read(self.proc.stderr.fileno(), 2 ** 15)
+        if(selectors):
+            selector = selectors.DefaultSelector()
+            for stream in streams:
+                selector.register(stream, selectors.EVENT_READ)
+
+            while selector.get_map():
+                for key, event in selector.select():
+                    if(not self.read_chunk(key.fileobj)):
+                        selector.unregister(key.fileobj)
+                        key.fileobj.close()
+            selector.close()
+            return
 
-            if len(data) > 0:
-                if self.listener:
-                    self.listener._on_data(data)
-            else:
-                self.proc.stderr.close()
-                break
+        while streams:
+            readable = select(streams, [], [])[0]
+            for stream in readable:
+                if(not self.read_chunk(stream)):
+                    streams.remove(stream)
+                    stream.close()
+
+    def read_stream(self, stream):
+        """Read stream
+
+        Reads a single pipe until the end of file
+
+        Arguments:
+            stream {file} -- pipe to read
+        """
+        while self.read_chunk(stream):
+            pass
+        stream.close()
+
+    def read_chunk(self, stream):
+        """Read chunk
+
+        Reads the data available in the pipe and sends it to the listener.
+        While the listener is behind (the console can't print as fast as
+        the process writes) the read is delayed, so the pipe fills and the
+        process waits for us instead of growing the console queue
+
+        Arguments:
+            stream {file} -- pipe to read
+
+        Returns:
+            bool -- False when the end of file was reached
+        """
+        self.throttle()
+
+        data = os.read(stream.fileno(), 2 ** 15)
+
+        if(not data):
+            return False
+
+        if(self.listener):
+            self.listener._on_data(data)
+        return True
+
+    def throttle(self):
+        """Backpressure
+
+        Waits while the listener reports it can't keep up with the output
+        """
+        listener = self.listener
+        while(listener and not self.killed and listener.is_behind()):
+            time.sleep(0.01)
 
 
 class Command(ProjectRecognition):
     _txt = None
 
     show_errors_inline = None
-    errs_by_file = {}
-    phantom_sets_by_buffer = {}
 
     def __init__(self):
         super(Command, self).__init__()
@@ -144,18 +259,10 @@ class Command(ProjectRecognition):
         self._extra_name = extra_name
         self._txt = messages
 
-    def run_command(self, cmd, kill=False, word_wrap=True, in_file=False):
-        self.errs_by_file = {}
+    def run_command(self, cmd, kill=False, word_wrap=True, in_file=False,
+                    wait=True, timeout=None):
         self.window = sublime.active_window()
 
-        # sets environment
-        env_path = get_sysetting('env_path', False)
-        if(env_path):
-            os.environ['PATH'] = env_path
-
-        global _COMMAND_QUEUE
-        global _BUSY
-
         # kill the process
         if(kill):
             if(self.proc):
@@ -163,10 +270,6 @@ class Command(ProjectRecognition):
                 self.proc = None
             return
 
-        if(_BUSY):
-            _COMMAND_QUEUE.append(cmd)
-            return
-
         if(not self._txt):
             try:
                 self._txt = messages.Messages(self._extra_name)
@@ -177,196 +280,291 @@ class Command(ProjectRecognition):
         self.encoding = 'utf-8'
         self.proc = None
         self.show_errors_inline = get_setting('show_errors_inline', True)
+        self.diagnostics = DiagnosticsParser()
+        self.first_byte = None
+        self.output_size = 0
+        self.log = None
+        self.summary = None
+        self.problems = None
 
+        if(get_setting('console_summary', False)):
+            self.summary = SummaryFilter()
+
+        if(self._output):
+            self._output.close()
+        self._output = OutputBuffer()
+
+        name = environment_name(cmd) or ' '.join(cmd[:2])
         verbose = get_setting('verbose_output', False)
-        cmd = prepare_command(cmd, verbose)
+        args = launcher.pio_arguments(cmd, verbose)
+        cmd = launcher.pio_command(cmd, verbose)
+        cwd = getattr(self, 'cwd', None)
+        env = launcher.environment()
+
+        self.job = Job(self, cmd, cwd=cwd, env=env, name=name)
+        self.job.args = args
+        self.job.timeout = timeout or command_timeout(args)
+        Scheduler().submit(self.job)
+
+        # the callers read the output or edit platformio.ini after the
+        # command, so by default the calling thread waits for it
+        if(wait):
+            self.job.wait()
+
+    def reset_errors(self):
+        """Reset errors
+
+        Forgets the inline errors of the project and starts a new batch of
+        diagnostics, called once when the user starts a build, before its
+        commands are submitted
+        """
+        cwd = getattr(self, 'cwd', None)
+        diagnostics_store.new_batch(cwd)
+
+        if(get_setting('show_errors_inline', True)):
+            phantoms.reset(cwd)
 
-        if(self.cwd):
-            os.chdir(self.cwd)
+    def start_job(self, job):
+        """Start job
+
+        Called by the scheduler when there is a free worker to run the job.
+        The warm runner is used when it's enabled and free, otherwise a
+        new process is started
+
+        Arguments:
+            job {Job} -- job with the command, cwd and environment
+        """
+        # only the commands printed in a console are logged
+        if(self._txt):
+            kind = metrics.command_type(job.args)
+            self.log = build_log.open_log(job.cwd, job.name, kind)
+
+            if(kind.startswith('run')):
+                self.problems = diagnostics_store.begin(job.cwd, job.name)
 
         try:
-            _BUSY = True
-            self.proc = AsyncProcess(cmd, self)
-        except Exception as e:
-            pass
+            self.proc = warm_runner.spawn(job.args, self, cwd=job.cwd,
+                                          env=job.env)
+
+            if(not self.proc):
+                self.proc = AsyncProcess(job.cmd, self, cwd=job.cwd,
+                                         env=job.env)
+        except Exception:
+            if(self.log):
+                self.log.close(-1)
+            raise
+
+        job.proc = self.proc
+
+    def cancel_job(self, job):
+        """Cancel job
+
+        Called by the scheduler to stop a running job (cancelled by the
+        user or timed out), the job finishes when the process ends
+
+        Arguments:
+            job {Job} -- running job
+        """
+        proc = getattr(job, 'proc', None)
+        if(proc):
+            proc.kill()
+
+    def wait(self):
+        """Wait command
+
+        Blocks the calling thread until the last command is finished
+        """
+        job = getattr(self, 'job', None)
+        if(job):
+            job.wait()
 
     def exit_code(self):
-        return self.proc.exit_code()
+        job = getattr(self, 'job', None)
+        return job.exit_code if job else None
 
     def get_output(self):
-        return self._output
+        """Output
+
+        Captured output of the last command (when there is no printer)
+
+        Returns:
+            str -- output or None when nothing was captured
+        """
+        if(not self._output):
+            return None
+        return self._output.getvalue(self.encoding)
+
+    def iter_output_json(self):
+        """JSON output
+
+        Decodes the captured output as a JSON array item by item, the
+        output is never loaded as a single string
+
+        Returns:
+            generator -- items of the array
+        """
+        stream = self._output.stream() if self._output else io.BytesIO()
+        return iter_json_array(stream, self.encoding)
+
+    def is_behind(self):
+        """Console behind
+
+        True when the printer has too many chunks waiting to be printed
+
+        Returns:
+            bool -- True to stop reading the process output for a while
+        """
+        if(not self._txt):
+            return False
+        return self._txt.pending() > _MAX_PENDING
 
     def _on_data(self, data):
+        if(not self.first_byte):
+            self.first_byte = time.time()
+        self.output_size += len(data)
+
+        if(self.log):
+            self.log.write(data)
+
+        # if there is not printer, store the raw data (decoded when read)
+        if(not self._txt):
+            self._output.write(data)
+            return
+
         try:
             characters = data.decode(self.encoding)
         except:
             characters = "[Decode error - output not " + self.encoding + "]\n"
 
-        # if there is not printer, store the data
-        if(not self._txt):
-            if(not self._output):
-                self._output = characters
-            else:
-                self._output += characters
-            return
-
         # Normalize newlines, Sublime Text always uses a single \n separator
-        # in memory.
-        characters = characters.replace('\r\n', '\n').replace('\r', '\n')
-        self._txt.print(characters)
+        # in memory. A bare \r (progress) replaces the line in the console
+        characters = characters.replace('\r\n', '\n')
+
+        if(self.summary):
+            self.print_summary(self.summary.feed(characters))
+        else:
+            self._txt.write(characters)
 
-        if(self.show_errors_inline):
-            # errors inline
-            errors = self.find_all_pio_errors(characters)
-            for file, line, column, text in errors:
-                if file not in self.errs_by_file:
-                    self.errs_by_file[file] = []
-                self.errs_by_file[file].append((line, column, text))
+        self.add_diagnostics(self.diagnostics.feed(characters))
 
-            self.update_phantoms()
+    def add_diagnostics(self, diagnostics):
+        """Add diagnostics
+
+        Stores the diagnostics of the build and shows the new errors
+        inline when the option is enabled
+
+        Arguments:
+            diagnostics {list} -- diagnostics found by the parser
+        """
+        if(self.problems and diagnostics):
+            diagnostics_store.add(self.problems, diagnostics,
+                                  getattr(self, 'cwd', None))
 
-    def _finish(self, proc):
+        if(not self.show_errors_inline):
+            return
+
+        errors = [(file, line, column, text)
+                  for file, line, column, severity, text in diagnostics
+                  if severity == ERROR and file]
+
+        if(errors):
+            phantoms.add_errors(getattr(self, 'cwd', None), errors)
+
+    def _finish(self, proc, job):
         exit_code = proc.exit_code()
 
-        if(exit_code == 0 and not len(_COMMAND_QUEUE)):
+        if(exit_code == 0 and Scheduler().is_idle()):
             sublime.status_message("Build finished")
         else:
             sublime.status_message("Build finished with errors")
 
         if(self._txt):
+            if(job.timed_out):
+                self._txt.print("command_timeout{0}", job.timeout)
+            elif(job.cancelled):
+                self._txt.print("command_cancelled")
+
+            if(self.summary and self.log):
+                self._txt.print("summary_full_log")
+
             end_time = time.strftime('%c')
             self._txt.print("\n[{0}]", end_time)
 
-        # run next command in the deque
-        run_next()
+    def save_metrics(self, proc):
+        """Save metrics
 
-    def _on_finished(self, proc):
-        sublime.set_timeout(partial(self._finish, proc), 0)
+        Stores the timings and resources used by the command
+
+        Arguments:
+            proc {AsyncProcess} -- process finished
+        """
+        job = self.job
+        ttfb = None
+        if(self.first_byte):
+            ttfb = self.first_byte - job.start_time
+
+        try:
+            metrics.record({
+                'project': job.cwd,
+                'env': job.name,
+                'type': metrics.command_type(job.args),
+                'spawn': getattr(proc, 'spawn_time', None),
+                'ttfb': ttfb,
+                'wall': job.duration,
+                'cpu': getattr(proc, 'cpu_time', None),
+                'rss': getattr(proc, 'max_rss', None),
+                'bytes': self.output_size,
+                'exit': job.exit_code})
+        except (IOError, OSError):
+            pass
 
-    def find_all_pio_errors(self, text):
-        """Find PlatformIO errors
+    def print_summary(self, text):
+        """Print summary
 
-        Extract all errors gived by PlatformIO
+        In the summarized console only the diagnostics, progress and
+        result lines are printed, the full output is in the build log
 
         Arguments:
-            text {str} -- line string with error
-
-        Returns:
-            [tuple] -- (file_path, line_number, colum_number, error_text)
+            text {str} -- lines to show
         """
-        error = []
-
-        # substract error with regex
-        if('error:' in text):
-            result = search('(.+):([0-9]+):([0-9]+):\s(.+)', text)
-            if(result is not None):
-                file_path = result.group(1)
-                line_number = result.group(2)
-                column_number = result.group(3)
-                error_txt = result.group(4)
-
-                error.append(
-                    [
-                        file_path,
-                        int(line_number),
-                        int(column_number),
-                        error_txt
-                    ]
-                )
-
-        return error
-
-    def update_phantoms(self):
-        stylesheet = '''
-            <style>
-                div.content {
-                    padding: 0.45rem 0.45rem 0.45rem 0.45rem;
-                    margin: 0.2rem 0;
-                    border-radius: 4px;
-                }
-                div.content span.message {
-                    color: white;
-                    padding-right: 0.4rem;
-                    padding-left: 0.5rem;
-                }
-                span.error_box {
-                    padding: 5px;
-                    color: white;
-                    font-weight: bold;
-                    border-radius: 3px;
-                    background-color: red;
-                }
-                span.warning_box {
-                    padding: 5px;
-                    color: white;
-                    font-weight: bold;
-                    border-radius: 3px;
-                    background-color: #d1cd00;
-                }
-                div.content a {
-                    text-decoration: inherit;
-                    padding: 0.35rem 0.7rem 0.45rem 0.8rem;
-                    position: relative;
-                    bottom: 0.05rem;
-                    border-radius: 4px;
-                    font-weight: bold;
-                }
-                html.dark div.content a {
-                    background-color: #00000018;
-                }
-                html.light div.content a {
-                    background-color: #ffffff18;
-                }
-            </style>
-        '''
-
-        for file, errs in self.errs_by_file.items():
-            view = self.window.find_open_file(file)
-            if view:
-
-                buffer_id = view.buffer_id()
-                if buffer_id not in self.phantom_sets_by_buffer:
-                    phantom_set = sublime.PhantomSet(view, "exec")
-                    self.phantom_sets_by_buffer[buffer_id] = phantom_set
-                else:
-                    phantom_set = self.phantom_sets_by_buffer[buffer_id]
-
-                phantoms = []
-
-                for line, column, text in errs:
-                    pt = view.text_point(line - 1, column - 1)
-                    phantoms.append(sublime.Phantom(
-                        sublime.Region(pt, view.line(pt).b),
-                        ('<body id=inline-error>' + stylesheet +
-                            '<div class="content">'
-                            '<span class="error_box">error</span>' +
-                            '<span class="message">' + html.escape(text, quote=False) + '</span>' +
-                            '<a href=hide>' + chr(0x00D7) + '</a></div>' +
-                            '</div></body>'),
-                        sublime.LAYOUT_BELOW,
-                        on_navigate=self.on_phantom_navigate))
-
-                phantom_set.update(phantoms)
-
-    def hide_phantoms(self):
-        for file, errs in self.errs_by_file.items():
-            view = self.window.find_open_file(file)
-            if view:
-                view.erase_phantoms("exec")
-
-        self.errs_by_file = {}
-        self.phantom_sets_by_buffer = {}
-        self.show_errors_inline = False
-
-    def on_phantom_navigate(self, url):
-        self.hide_phantoms()
-
-
-def run_next():
-    global _COMMAND_QUEUE
-    global _BUSY
-
-    _BUSY = False
-
-    if(len(_COMMAND_QUEUE)):
-        Command().run_command(_COMMAND_QUEUE.popleft())
+        if(text):
+            self._txt.write(text)
+
+    def _on_finished(self, proc):
+        if(self._txt):
+            self.add_diagnostics(self.diagnostics.flush())
+
+            if(self.summary):
+                self.print_summary(self.summary.flush())
+
+        if(self.log):
+            self.log.close(proc.exit_code())
+
+        if(self.problems):
+            diagnostics_store.finish(self.problems, proc.exit_code())
+
+        # release the worker and start the next queued job
+        Scheduler().finish(self.job, proc.exit_code())
+
+        self.save_metrics(proc)
+
+        sublime.set_timeout(partial(self._finish, proc, self.job), 0)
+
+
+def command_timeout(args):
+    """Command timeout
+
+    Timeout of the command type set in the 'command_timeouts' setting
+
+    Arguments:
+        args {list} -- PlatformIO arguments
+
+    Returns:
+        int -- seconds or None when the command has no limit
+    """
+    timeouts = get_setting('command_timeouts', {})
+
+    if(not isinstance(timeouts, dict)):
+        return None
+
+    return timeouts.get(metrics.command_type(args)) or None
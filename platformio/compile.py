@@ -9,14 +9,17 @@ from __future__ import unicode_literals
 from sys import exit
 
 from .initialize import Initialize
+from .build_cache import BuildCache
 from ..libraries.tools import save_sysetting
 from ..libraries.thread_progress import ThreadProgress
 
 
 class Compile(Initialize):
-    def __init__(self):
+    def __init__(self, all_envs=False, force=False):
         super(Compile, self).__init__()
 
+        self.all_envs = all_envs
+        self.force = force
         self.nonblock_compile()
 
     def start_compilation(self):
@@ -31,6 +34,10 @@ class Compile(Initialize):
 
         save_sysetting('last_action', self.COMPILE)
 
+        if(self.all_envs):
+            self.compile_environments()
+            return
+
         self.add_board()
         if(not self.board_id):
             self.print("select_board_list")
@@ -44,11 +51,78 @@ class Compile(Initialize):
         # add src_dir option if it's neccesary
         self.override_src()
 
+        # the digest is taken even when the build is forced
+        cache = BuildCache(self.cwd, self.board_id)
+        if(cache.is_up_to_date() and not self.force):
+            self.print("build_up_to_date{0}", self.board_id)
+            self.after_complete()
+            return
+
+        self.reset_errors()
+
         cmd = ['run', '-e ', self.board_id]
         self.run_command(cmd)
 
+        if(self.exit_code() == 0):
+            cache.store()
+
         self.after_complete()
 
+    def compile_environments(self):
+        """Compile all environments
+
+        Compiles the sketch for every environment initialized in
+        platformio.ini. The builds are run in parallel by the scheduler,
+        each one printing in its own output panel
+        """
+        from .command import Command
+        from ..libraries.messages import Messages
+
+        envs = self.get_envs_initialized()
+        if(not envs):
+            self.print("select_board_list")
+            return
+
+        self.override_src()
+
+        # platformio.ini is rewritten by each option, all of them are
+        # written before the first build starts reading it
+        for env in envs:
+            self.board_id = env
+            self.add_option('lib_extra_dirs')
+            self.add_option('upload_speed')
+
+        self.reset_errors()
+
+        # the sources are hashed once for all the environments
+        shared = {}
+
+        commands = []
+        for env in envs:
+            cache = BuildCache(self.cwd, env, shared=shared)
+            if(cache.is_up_to_date() and not self.force):
+                self.print("build_up_to_date{0}", env)
+                continue
+
+            messages = Messages(panel='deviot_{0}'.format(env))
+            messages.initial_text('_building_env{0}', env)
+            messages.create_panel()
+
+            command = Command()
+            command.init(messages=messages)
+            command.cwd = self.cwd
+            command.run_command(['run', '-e', env], wait=False)
+            commands.append((command, cache))
+
+        for command, cache in commands:
+            command.wait()
+            if(command.exit_code() == 0):
+                cache.store()
+
+        for env in envs:
+            self.board_id = env
+            self.after_complete()
+
     def nonblock_compile(self):
         """New Thread Execution
 
@@ -0,0 +1,217 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Streaming parser for the compiler and linker diagnostics.
+
+The output of PlatformIO arrives in chunks of any size, a diagnostic
+can be split between two chunks. The parser keeps the incomplete last
+line and only parses complete lines, so each chunk is processed once.
+
+Each diagnostic is a tuple:
+
+(file_path, line_number, column_number, severity, text)
+
+severity is one of 'error', 'warning' or 'note'.
+"""
+
+from __future__ import absolute_import
+from __future__ import print_function
+from __future__ import division
+from __future__ import unicode_literals
+
+import re
+
+ERROR = 'error'
+WARNING = 'warning'
+NOTE = 'note'
+
+# main.cpp:10:5: error: 'foo' was not declared in this scope
+# main.cpp:10: warning: ...
+_COMPILER = re.compile(
+    r'^(?P<file>.+?):(?P<line>\d+):(?:(?P<column>\d+):)?\s*'
+    r'(?P<severity>fatal error|error|warning|note):\s*(?P<text>.*)$')
+
+# main.cpp:10: undefined reference to `foo()'
+_LINKER = re.compile(
+    r'^(?P<file>.+?):(?P<line>\d+):\s*'
+    r'(?P<text>(?:undefined reference to|multiple definition of) .*)$')
+
+# ld: cannot find -lfoo | collect2: error: ld returned 1 exit status
+# only the linker names: ld, <triplet>-ld (arm-none-eabi-ld), ld.exe
+# and collect2, not any word ending in 'ld' (Threshold: 3 bytes)
+_TOOL = re.compile(
+    r'^(?:.*[/\\])?(?:(?:[\w.]+-)*ld|collect2)(?:\.exe)?:\s*'
+    r'(?:error:\s*)?(?P<text>.+)$')
+
+# progress and result lines of PlatformIO and SCons, shown in the
+# summarized console with the diagnostics
+_PROGRESS = re.compile(
+    r'^(?:Processing |Compiling |Linking |Building |Archiving |Indexing |'
+    r'Checking size|Uploading|Writing |Verifying|Retrieving |'
+    r'RAM:|Flash:|Error:|\*\*\* |=+ |'
+    r'\[(?:SUCCESS|FAILED|ERROR|IGNORED|SKIPPED)\])')
+
+
+def parse_line(line):
+    """Parse line
+
+    Extracts the diagnostic of a single complete line
+
+    Arguments:
+        line {str} -- output line without the new line character
+
+    Returns:
+        tuple -- diagnostic or None when the line isn't a diagnostic
+    """
+    # cheap check before run the regular expressions
+    if(': ' not in line):
+        return None
+
+    result = _COMPILER.match(line)
+    if(result):
+        severity = result.group('severity')
+        if(severity == 'fatal error'):
+            severity = ERROR
+
+        column = result.group('column')
+
+        return (result.group('file'),
+                int(result.group('line')),
+                int(column) if column else 1,
+                severity,
+                result.group('text'))
+
+    result = _LINKER.match(line)
+    if(result):
+        return (result.group('file'),
+                int(result.group('line')),
+                1,
+                ERROR,
+                result.group('text'))
+
+    result = _TOOL.match(line)
+    if(result):
+        return (None, 0, 0, ERROR, result.group('text'))
+
+    return None
+
+
+class DiagnosticsParser(object):
+    """
+    Assembles complete lines from the chunks of output and extracts
+    the diagnostics, they are stored by diagnostics_store
+    """
+
+    def __init__(self):
+        self.partial = ''
+
+    def feed(self, text):
+        """Feed chunk
+
+        Parses all the lines completed with the given chunk
+
+        Arguments:
+            text {str} -- chunk of output
+
+        Returns:
+            list -- new diagnostics found
+        """
+        end = text.rfind('\n')
+
+        if(end == -1):
+            self.partial += text
+            return []
+
+        lines = (self.partial + text[:end]).split('\n')
+        self.partial = text[end + 1:]
+
+        return self.parse(lines)
+
+    def flush(self):
+        """Flush
+
+        Parses the last line when the output doesn't end with a new line
+
+        Returns:
+            list -- new diagnostics found
+        """
+        lines = [self.partial] if self.partial else []
+        self.partial = ''
+
+        return self.parse(lines)
+
+    def parse(self, lines):
+        """Parse lines
+
+        Arguments:
+            lines {list} -- complete lines
+
+        Returns:
+            list -- new diagnostics found
+        """
+        found = []
+
+        for line in lines:
+            diagnostic = parse_line(line.rstrip())
+            if(diagnostic):
+                found.append(diagnostic)
+
+        return found
+
+
+def is_summary_line(line):
+    """Summary line
+
+    Arguments:
+        line {str} -- output line without the new line character
+
+    Returns:
+        bool -- True when the line is a diagnostic, a progress or a
+                result line
+    """
+    return bool(_PROGRESS.match(line) or parse_line(line))
+
+
+class SummaryFilter(object):
+    """
+    Assembles complete lines from the chunks of output and keeps only
+    the ones shown in the summarized console
+    """
+
+    def __init__(self):
+        self.partial = ''
+
+    def feed(self, text):
+        """Feed chunk
+
+        Arguments:
+            text {str} -- chunk of output
+
+        Returns:
+            str -- lines completed with the chunk to be shown
+        """
+        end = text.rfind('\n')
+
+        if(end == -1):
+            self.partial += text
+            return ''
+
+        lines = (self.partial + text[:end]).split('\n')
+        self.partial = text[end + 1:]
+
+        return ''.join(line + '\n' for line in lines
+                       if is_summary_line(line.rstrip()))
+
+    def flush(self):
+        """Flush
+
+        Returns:
+            str -- last line (without new line) when it has to be shown
+        """
+        line = self.partial
+        self.partial = ''
+
+        if(line and is_summary_line(line.rstrip())):
+            return line + '\n'
+        return ''
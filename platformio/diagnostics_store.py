@@ -0,0 +1,328 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Diagnostics of the last builds.
+
+Each build (run, run upload) keeps its diagnostics as compact records,
+indexed by file and by severity, so the problems can be listed and
+navigated without parsing the console again. Only the last builds are
+kept ('diagnostics_history' setting) and each build stores at most
+MAX_DIAGNOSTICS, repeated diagnostics (a header included by several
+files) are stored once.
+
+The builds started together (Compile All Environments) belong to the
+same batch, the problems of a project are the ones of its last batch.
+
+The builds are saved in Packages/User/Deviot/diagnostics.json when they
+finish, and loaded the first time the store is used.
+"""
+
+from __future__ import absolute_import
+from __future__ import print_function
+from __future__ import division
+from __future__ import unicode_literals
+
+import os
+import json
+import time
+import threading
+
+from collections import deque, namedtuple
+
+from ..api import deviot
+from ..libraries.tools import get_setting
+
+MAX_DIAGNOSTICS = 5000
+
+Diagnostic = namedtuple('Diagnostic', 'file line column severity text')
+
+_lock = threading.Lock()
+_builds = None
+
+# project: batch of its next builds (when the batch started)
+_batches = {}
+# (builds and their sizes, Build) last merged batch, it keeps its cursors
+_merged = None
+
+
+class Build(object):
+    """
+    Diagnostics of a single build
+
+    Arguments:
+        project {str} -- working directory
+        env {str} -- environment name
+    """
+
+    __slots__ = ('project', 'env', 'time', 'batch', 'exit', 'items', 'seen',
+                 'by_file', 'by_severity', 'located', 'cursors')
+
+    # by_file: file -> indexes of its diagnostics
+    # by_severity: severity -> indexes of its diagnostics
+    # located: severity (None for all) -> indexes of the diagnostics with
+    #          a file, the ones that can be navigated
+    # cursors: severity (None for all) -> position in located
+
+    def __init__(self, project, env, started=None):
+        self.project = project
+        self.env = env
+        self.time = started or time.time()
+        self.batch = self.time
+        self.exit = None
+        self.items = []
+        self.seen = set()
+        self.by_file = {}
+        self.by_severity = {}
+        self.located = {}
+        self.cursors = {}
+
+    def add(self, diagnostic):
+        """Add diagnostic
+
+        Arguments:
+            diagnostic {Diagnostic} -- diagnostic with absolute file path
+
+        Returns:
+            bool -- False when it was already stored or the build is full
+        """
+        if(diagnostic in self.seen or len(self.items) >= MAX_DIAGNOSTICS):
+            return False
+
+        index = len(self.items)
+        self.items.append(diagnostic)
+        self.seen.add(diagnostic)
+        self.by_severity.setdefault(diagnostic.severity, []).append(index)
+
+        if(diagnostic.file):
+            self.by_file.setdefault(diagnostic.file, []).append(index)
+            self.located.setdefault(None, []).append(index)
+            self.located.setdefault(diagnostic.severity, []).append(index)
+
+        return True
+
+    def step(self, forward=True, severity=None):
+        """Step
+
+        Moves the cursor to the next (or previous) diagnostic with a file,
+        it starts again at the other end of the list
+
+        Keyword Arguments:
+            forward {bool} -- direction (default: {True})
+            severity {str} -- only diagnostics of the severity
+
+        Returns:
+            Diagnostic -- diagnostic or None when there isn't any
+        """
+        indexes = self.located.get(severity)
+
+        if(not indexes):
+            return None
+
+        position = self.cursors.get(severity)
+        if(position is None):
+            position = 0 if forward else len(indexes) - 1
+        else:
+            position = (position + (1 if forward else -1)) % len(indexes)
+
+        self.cursors[severity] = position
+
+        return self.items[indexes[position]]
+
+    def count(self, severity):
+        return len(self.by_severity.get(severity, ()))
+
+    def to_json(self):
+        return {'project': self.project,
+                'env': self.env,
+                'time': self.time,
+                'batch': self.batch,
+                'exit': self.exit,
+                'items': [list(item) for item in self.items]}
+
+    @classmethod
+    def from_json(cls, data):
+        build = cls(data.get('project'), data.get('env'), data.get('time'))
+        build.batch = data.get('batch', build.time)
+        build.exit = data.get('exit')
+
+        for item in data.get('items', []):
+            build.add(Diagnostic(*item))
+
+        return build
+
+
+def history_size():
+    return max(1, get_setting('diagnostics_history', 10))
+
+
+def store_path():
+    return os.path.join(deviot.user_plugin_path(), 'diagnostics.json')
+
+
+def builds():
+    """Builds
+
+    Stored builds, loaded from disk the first time
+
+    Returns:
+        deque -- builds, the newest is the last one
+    """
+    global _builds
+
+    with _lock:
+        if(_builds is None):
+            _builds = deque(maxlen=history_size())
+
+            try:
+                with open(store_path()) as file:
+                    for data in json.load(file):
+                        _builds.append(Build.from_json(data))
+            except (IOError, OSError, ValueError, TypeError):
+                pass
+
+        return _builds
+
+
+def new_batch(project):
+    """New batch
+
+    The next builds of the project belong to a new batch, called once
+    when the user starts a build, before its commands are submitted
+
+    Arguments:
+        project {str} -- working directory
+    """
+    # two batches never share the time, even with a coarse clock
+    with _lock:
+        _batches[project] = max(time.time(), _batches.get(project, 0) + 1e-3)
+
+
+def begin(project, env):
+    """Begin build
+
+    Registers a new build in the current batch of the project, the
+    oldest one is dropped when the history is full
+
+    Arguments:
+        project {str} -- working directory
+        env {str} -- environment name
+
+    Returns:
+        Build -- new build
+    """
+    build = Build(project, env)
+    history = builds()
+
+    with _lock:
+        build.batch = _batches.get(project, build.time)
+        history.append(build)
+
+    return build
+
+
+def add(build, diagnostics, cwd=None):
+    """Add diagnostics
+
+    Arguments:
+        build {Build} -- build receiving the diagnostics
+        diagnostics {list} -- tuples of the diagnostics parser
+
+    Keyword Arguments:
+        cwd {str} -- working directory to resolve relative file paths
+    """
+    with _lock:
+        for file, line, column, severity, text in diagnostics:
+            if(file):
+                if(cwd and not os.path.isabs(file)):
+                    file = os.path.join(cwd, file)
+                file = os.path.normpath(file)
+            build.add(Diagnostic(file, line, column, severity, text))
+
+
+def finish(build, exit_code):
+    """Finish build
+
+    Stores the exit code and saves the history in disk
+
+    Arguments:
+        build {Build} -- finished build
+        exit_code {int} -- exit code of the command
+    """
+    history = builds()
+
+    with _lock:
+        build.exit = exit_code
+        data = [item.to_json() for item in history]
+
+    temp_path = store_path() + '.tmp'
+
+    try:
+        with open(temp_path, 'w') as file:
+            json.dump(data, file)
+        os.replace(temp_path, store_path())
+    except (IOError, OSError):
+        pass
+
+
+def last_build(project=None):
+    """Last build
+
+    Diagnostics of the last batch of the project, the builds of a batch
+    with several environments are merged in a single one
+
+    Keyword Arguments:
+        project {str} -- working directory, None for any project
+
+    Returns:
+        Build -- newest build or None when there isn't any
+    """
+    global _merged
+
+    history = builds()
+
+    with _lock:
+        found = [build for build in history
+                 if project is None or build.project == project]
+        if(not found):
+            return None
+
+        batch = [build for build in found if build.batch == found[-1].batch]
+        if(len(batch) == 1):
+            return batch[0]
+
+        # merged again only when the batch changes
+        key = tuple((id(build), len(build.items)) for build in batch)
+        if(_merged and _merged[0] == key):
+            return _merged[1]
+
+        merged = merge(batch)
+        _merged = (key, merged)
+
+        return merged
+
+
+def merge(batch):
+    """Merge builds
+
+    Arguments:
+        batch {list} -- builds of the same batch, oldest first
+
+    Returns:
+        Build -- build with the diagnostics of all the environments, it
+                 failed when one of them failed
+    """
+    first = batch[0]
+    merged = Build(first.project,
+                   ', '.join(build.env for build in batch if build.env),
+                   first.time)
+    merged.batch = first.batch
+
+    codes = [build.exit for build in batch]
+    merged.exit = next((code for code in codes if code), codes[-1])
+
+    for build in batch:
+        for diagnostic in build.items:
+            merged.add(diagnostic)
+
+    return merged
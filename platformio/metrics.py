@@ -0,0 +1,251 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Metrics of the PlatformIO commands.
+
+Each command run by Deviot stores a record with its timings and
+resources in Packages/User/Deviot/metrics.jsonl (one JSON object per
+line). Only the last 'metrics_limit' records are kept, the records are
+appended and the file is only read to drop the oldest ones when it grows
+over the size of the limit by a quarter.
+
+Record fields:
+
+time: when the command finished (epoch)
+project: working directory
+env: environment (or command name when there isn't one)
+type: command type (run, run upload, lib list, etc)
+spawn: seconds to start the process
+ttfb: seconds until the first byte of output
+wall: seconds from the start to the end of the command
+cpu: user + system CPU seconds of the process and its children
+rss: peak resident memory in KB
+bytes: output size
+exit: exit code
+"""
+
+from __future__ import absolute_import
+from __future__ import print_function
+from __future__ import division
+from __future__ import unicode_literals
+
+import os
+import json
+import time
+import threading
+
+from ..api import deviot
+from ..libraries.tools import get_setting
+
+_lock = threading.Lock()
+
+# estimated bytes of a record until the store is trimmed the first time
+_RECORD_SIZE = 256
+# (file, limit): bytes of 'limit' records measured in the last trim
+_limit_size = {}
+
+# options followed by a value who isn't part of the command type
+_VALUE_OPTIONS = ('-e', '--environment', '-b', '--board', '-d',
+                  '--project-dir', '-c', '--upload-port', '--monitor-port')
+
+
+def metrics_path():
+    """
+    Path to Packages/User/Deviot/metrics.jsonl
+    """
+    user = deviot.user_plugin_path()
+    deviot.create_dirs(user)
+
+    return os.path.join(user, 'metrics.jsonl')
+
+
+def command_type(args):
+    """Command type
+
+    Positional words of the command, used to group the metrics
+
+    Arguments:
+        args {list} -- PlatformIO arguments
+
+    Returns:
+        str -- ex. 'run', 'run upload', 'lib list'
+    """
+    words = []
+    skip = False
+
+    for arg in args:
+        if(skip):
+            skip = False
+        elif(arg in _VALUE_OPTIONS):
+            skip = True
+        elif(not arg.startswith('-')):
+            words.append(arg)
+
+    return ' '.join(words[:2])
+
+
+def record(entry):
+    """Record
+
+    Appends the record to the store and trims the oldest records when
+    the limit is exceeded
+
+    Arguments:
+        entry {dict} -- metrics of a command
+    """
+    limit = get_setting('metrics_limit', 2000)
+    entry.setdefault('time', time.time())
+
+    with _lock:
+        file_path = metrics_path()
+
+        with open(file_path, 'a') as file:
+            file.write(json.dumps(entry, sort_keys=True) + '\n')
+            size = file.tell()
+
+        # trims in batches, the records are not read every time
+        key = (file_path, limit)
+        limit_size = _limit_size.get(key, limit * _RECORD_SIZE)
+        if(size > limit_size + limit_size // 4):
+            _limit_size[key] = trim(file_path, limit)
+
+
+def trim(file_path, limit):
+    """Trim
+
+    Keeps the last records of the store
+
+    Arguments:
+        file_path {str} -- path to metrics.jsonl
+        limit {int} -- records to keep
+
+    Returns:
+        int -- estimated bytes of 'limit' records
+    """
+    records = read_records()[-limit:]
+
+    with open(file_path, 'w') as file:
+        for line in records:
+            file.write(json.dumps(line, sort_keys=True) + '\n')
+        size = file.tell()
+
+    if(not records):
+        return limit * _RECORD_SIZE
+
+    return size * limit // len(records)
+
+
+def read_records():
+    """Records
+
+    Returns:
+        list -- stored records, oldest first
+    """
+    records = []
+
+    try:
+        with open(metrics_path()) as file:
+            for line in file:
+                try:
+                    records.append(json.loads(line))
+                except ValueError:
+                    pass
+    except (IOError, OSError):
+        pass
+
+    return records
+
+
+def percentile(values, percent):
+    """Percentile
+
+    Nearest rank percentile
+
+    Arguments:
+        values {list} -- sorted numbers
+        percent {int} -- 0-100
+
+    Returns:
+        float -- value or None when there are not values
+    """
+    if(not values):
+        return None
+
+    rank = int(round(percent / 100.0 * (len(values) - 1)))
+    return values[rank]
+
+
+def summary(records):
+    """Summary
+
+    Percentiles of each metric grouped by environment and command type
+
+    Arguments:
+        records {list} -- metrics records
+
+    Returns:
+        list -- one dict per group, sorted by environment and type
+    """
+    groups = {}
+
+    for entry in records:
+        key = (entry.get('env') or '-', entry.get('type') or '-')
+        groups.setdefault(key, []).append(entry)
+
+    result = []
+
+    for (env, kind), entries in sorted(groups.items()):
+        group = {'env': env,
+                 'type': kind,
+                 'count': len(entries),
+                 'failed': len([e for e in entries if e.get('exit') != 0])}
+
+        for field in ('spawn', 'ttfb', 'wall', 'cpu', 'rss', 'bytes'):
+            values = sorted(e[field] for e in entries
+                            if e.get(field) is not None)
+            group[field] = dict(('p{0}'.format(p), percentile(values, p))
+                                for p in (50, 90, 99))
+
+        result.append(group)
+
+    return result
+
+
+def format_summary(groups):
+    """Format summary
+
+    Text table with the summary
+
+    Arguments:
+        groups {list} -- result of summary()
+
+    Returns:
+        str -- table
+    """
+    def number(value, unit=''):
+        if(value is None):
+            return '-'
+        if(isinstance(value, float)):
+            return '{0:.2f}{1}'.format(value, unit)
+        return '{0}{1}'.format(value, unit)
+
+    header = ('{0:<20} {1:<16} {2:>6} {3:>6} {4:>22} {5:>22} '
+              '{6:>22} {7:>10} {8:>10}')
+    lines = [header.format('env', 'type', 'runs', 'failed',
+                           'wall p50/p90/p99', 'ttfb p50/p90/p99',
+                           'cpu p50/p90/p99', 'rss p90', 'bytes p90')]
+
+    for group in groups:
+        timing = []
+        for field in ('wall', 'ttfb', 'cpu'):
+            timing.append('/'.join(number(group[field][p], 's')
+                                   for p in ('p50', 'p90', 'p99')))
+
+        lines.append(header.format(
+            group['env'][:20], group['type'][:16], group['count'],
+            group['failed'], timing[0], timing[1], timing[2],
+            number(group['rss']['p90'], 'K'),
+            number(group['bytes']['p90'])))
+
+    return '\n'.join(lines) + '\n'
@@ -0,0 +1,199 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Buffer for the captured output of the commands.
+
+The output is stored as a list of raw chunks (joined only once, when
+it's read) and moved to a temporary file when it grows over SPILL_SIZE,
+so large outputs like `pio lib list --json-output` or `pio boards
+--json-output` take linear time and bounded memory.
+
+JSON arrays can be consumed item by item with iter_json_array(),
+without loading the whole document in memory.
+"""
+
+from __future__ import absolute_import
+from __future__ import print_function
+from __future__ import division
+from __future__ import unicode_literals
+
+import io
+import json
+import codecs
+import tempfile
+
+# bytes kept in memory before moving the output to a temporary file
+SPILL_SIZE = 4 * 1024 * 1024
+
+# bytes read from the buffer in each step of the JSON consumer
+READ_SIZE = 64 * 1024
+
+
+class OutputBuffer(object):
+    """
+    Output of a command, bytes are stored as they are received
+
+    Keyword Arguments:
+        spill_size {int} -- size to move the data to a temporary file
+                            (default: {SPILL_SIZE})
+    """
+
+    def __init__(self, spill_size=SPILL_SIZE):
+        self.spill_size = spill_size
+        self.chunks = []
+        self.size = 0
+        self.file = None
+
+    def __len__(self):
+        return self.size
+
+    def write(self, data):
+        """Write
+
+        Appends a chunk of the output
+
+        Arguments:
+            data {bytes} -- raw output
+        """
+        self.size += len(data)
+
+        if(self.file):
+            self.file.write(data)
+            return
+
+        self.chunks.append(data)
+
+        if(self.size > self.spill_size):
+            self.spill()
+
+    def spill(self):
+        """Spill
+
+        Moves the chunks in memory to a temporary file, it's removed
+        when the buffer is closed or garbage collected
+        """
+        self.file = tempfile.TemporaryFile()
+
+        for chunk in self.chunks:
+            self.file.write(chunk)
+        self.chunks = []
+
+    def stream(self):
+        """Stream
+
+        Binary file object to read the output from the beginning
+
+        Returns:
+            file -- readable stream
+        """
+        if(self.file):
+            self.file.flush()
+            self.file.seek(0)
+            return self.file
+
+        return io.BytesIO(b''.join(self.chunks))
+
+    def getvalue(self, encoding='utf-8'):
+        """Value
+
+        Returns:
+            str -- whole output decoded
+        """
+        data = self.stream().read()
+        return data.decode(encoding, 'replace')
+
+    def close(self):
+        if(self.file):
+            self.file.close()
+            self.file = None
+        self.chunks = []
+        self.size = 0
+
+
+def iter_json_array(stream, encoding='utf-8'):
+    """JSON array items
+
+    Decodes a JSON array reading the stream in small blocks, each item
+    is returned as soon as it's complete. When the document is not an
+    array, the whole document is returned as a single item
+
+    Arguments:
+        stream {file} -- binary stream with the JSON document
+
+    Keyword Arguments:
+        encoding {str} -- encoding of the stream (default: {'utf-8'})
+
+    Yields:
+        obj -- decoded items
+
+    Raises:
+        ValueError -- when the document is not valid JSON
+    """
+    decoder = json.JSONDecoder()
+    reader = codecs.getincrementaldecoder(encoding)('replace')
+    text = ''
+    index = 0
+    ended = False
+
+    def read():
+        block = stream.read(READ_SIZE)
+        return reader.decode(block, final=not block), not block
+
+    def skip(text, index):
+        while(index < len(text) and text[index] in ' \t\r\n'):
+            index += 1
+        return index
+
+    # beginning of the document
+    while True:
+        index = skip(text, index)
+        if(index < len(text) or ended):
+            break
+        more, ended = read()
+        text = text[index:] + more
+        index = 0
+
+    if(text[index:index + 1] != '['):
+        while(not ended):
+            more, ended = read()
+            text += more
+        yield json.loads(text[index:])
+        return
+
+    index += 1
+    expect_item = True
+
+    while True:
+        index = skip(text, index)
+
+        if(index < len(text) and text[index] == ']'):
+            return
+
+        if(index < len(text) and text[index] == ',' and not expect_item):
+            index += 1
+            expect_item = True
+            continue
+
+        if(index < len(text) and expect_item):
+            try:
+                item, end = decoder.raw_decode(text, index)
+            except ValueError:
+                if(ended):
+                    raise
+                item = None
+                end = None
+
+            # an item (or a number) could continue in the next block
+            if(end is not None and (end < len(text) or ended)):
+                yield item
+                index = end
+                expect_item = False
+                continue
+
+        if(ended):
+            raise ValueError('Unterminated JSON array')
+
+        more, ended = read()
+        text = text[index:] + more
+        index = 0
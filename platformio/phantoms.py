@@ -0,0 +1,276 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Inline errors (phantoms) shown under the lines with compilation errors.
+
+The errors arrive while the output is streamed, they are stored by
+file and the views are refreshed at most once per UI frame. Only the
+new errors create a phantom, the phantoms already shown are reused,
+so sublime.PhantomSet only adds or removes what changed.
+"""
+
+from __future__ import absolute_import
+from __future__ import print_function
+from __future__ import division
+from __future__ import unicode_literals
+
+import os
+import html
+import threading
+import sublime
+
+# delay in ms between refreshes of the phantoms (one frame)
+FRAME = 16
+
+STYLESHEET = '''
+    <style>
+        div.content {
+            padding: 0.45rem 0.45rem 0.45rem 0.45rem;
+            margin: 0.2rem 0;
+            border-radius: 4px;
+        }
+        div.content span.message {
+            color: white;
+            padding-right: 0.4rem;
+            padding-left: 0.5rem;
+        }
+        span.error_box {
+            padding: 5px;
+            color: white;
+            font-weight: bold;
+            border-radius: 3px;
+            background-color: red;
+        }
+        span.warning_box {
+            padding: 5px;
+            color: white;
+            font-weight: bold;
+            border-radius: 3px;
+            background-color: #d1cd00;
+        }
+        div.content a {
+            text-decoration: inherit;
+            padding: 0.35rem 0.7rem 0.45rem 0.8rem;
+            position: relative;
+            bottom: 0.05rem;
+            border-radius: 4px;
+            font-weight: bold;
+        }
+        html.dark div.content a {
+            background-color: #00000018;
+        }
+        html.light div.content a {
+            background-color: #ffffff18;
+        }
+    </style>
+'''
+
+# the message goes between both parts (the stylesheet has braces, it
+# can't be a format string)
+HEADER = ('<body id=inline-error>' + STYLESHEET +
+          '<div class="content">'
+          '<span class="error_box">error</span>'
+          '<span class="message">')
+FOOTER = ('</span>'
+          '<a href=hide>' + chr(0x00D7) + '</a>'
+          '</div></body>')
+
+_lock = threading.Lock()
+_errors = {}
+_dirty = set()
+_sets = {}
+_scheduled = False
+
+# _errors: project -> {file: set of (line, column, text)}
+# _sets: buffer id -> (PhantomSet, {(project, error): Phantom})
+# the builds of other projects (or running in parallel) keep their errors
+
+
+def add_errors(cwd, errors):
+    """Add errors
+
+    Stores the errors and schedules the refresh of the phantoms
+
+    Arguments:
+        cwd {str} -- project of the build, used to resolve relative paths
+        errors {list} -- (file_path, line, column, text) tuples
+    """
+    with _lock:
+        files = _errors.setdefault(cwd, {})
+
+        for file, line, column, text in errors:
+            if(cwd and not os.path.isabs(file)):
+                file = os.path.join(cwd, file)
+            file = os.path.normpath(file)
+
+            files.setdefault(file, set()).add((line, column, text))
+            _dirty.add(file)
+
+        if(not must_schedule()):
+            return
+
+    sublime.set_timeout(flush, FRAME)
+
+
+def must_schedule():
+    """Schedule
+
+    Checks if a refresh of the dirty files has to be scheduled, call it
+    with the lock held and schedule flush() after releasing it
+
+    Returns:
+        bool -- True when there is no refresh scheduled yet
+    """
+    global _scheduled
+
+    if(_scheduled or not _dirty):
+        return False
+    _scheduled = True
+
+    return True
+
+
+def file_errors(file):
+    """File errors
+
+    Errors of a file in all the projects, call it with the lock held
+
+    Arguments:
+        file {str} -- normalized file path
+
+    Returns:
+        list -- (project, (line, column, text)) tuples
+    """
+    return [(project, error) for project, files in _errors.items()
+            for error in files.get(file, ())]
+
+
+def flush():
+    """Flush
+
+    Updates the phantoms of the files with new or removed errors
+    """
+    global _scheduled
+
+    with _lock:
+        dirty = [(file, file_errors(file)) for file in _dirty]
+        _dirty.clear()
+        _scheduled = False
+
+    for window in sublime.windows():
+        for file, errors in dirty:
+            view = window.find_open_file(file)
+            if(view):
+                show(view, errors)
+
+
+def show(view, errors):
+    """Show phantoms
+
+    Adds the phantoms of the errors not shown yet in the view, and
+    removes the ones of the errors forgotten
+
+    Arguments:
+        view {sublime.View} -- view with the file
+        errors {list} -- (project, (line, column, text)) tuples
+    """
+    buffer_id = view.buffer_id()
+
+    if(buffer_id not in _sets):
+        if(not errors):
+            return
+        _sets[buffer_id] = (sublime.PhantomSet(view, "exec"), {})
+    phantom_set, phantoms = _sets[buffer_id]
+
+    for key in set(phantoms) - set(errors):
+        del phantoms[key]
+
+    for key in errors:
+        if(key in phantoms):
+            continue
+
+        line, column, text = key[1]
+        point = view.text_point(line - 1, column - 1)
+        content = HEADER + html.escape(text, quote=False) + FOOTER
+
+        phantoms[key] = sublime.Phantom(
+            sublime.Region(point, view.line(point).b),
+            content,
+            sublime.LAYOUT_BELOW,
+            on_navigate=lambda url: hide())
+
+    phantom_set.update(list(phantoms.values()))
+
+
+def on_load(view):
+    """View loaded
+
+    Shows the errors of a file opened after the compilation
+
+    Arguments:
+        view {sublime.View} -- view loaded
+    """
+    file = view.file_name()
+    if(not file):
+        return
+
+    with _lock:
+        errors = file_errors(os.path.normpath(file))
+
+    if(errors):
+        show(view, errors)
+
+
+def release(view):
+    """Release
+
+    Drops the phantoms of a view when it's closed
+
+    Arguments:
+        view {sublime.View} -- view closed
+    """
+    _sets.pop(view.buffer_id(), None)
+
+
+def reset(project):
+    """Reset
+
+    Forgets the errors of the previous build of the project and removes
+    their phantoms, the errors of other projects are kept. Called once
+    when the user starts a build (all the environments of a parallel
+    build share it). It can be called from any thread
+
+    Arguments:
+        project {str} -- working directory of the build
+    """
+    with _lock:
+        files = _errors.pop(project, {})
+        _dirty.update(files)
+
+        if(not must_schedule()):
+            return
+
+    sublime.set_timeout(flush, FRAME)
+
+
+def erase():
+    """Erase phantoms
+
+    Removes all the phantoms shown
+    """
+    for phantom_set, phantoms in list(_sets.values()):
+        phantom_set.update([])
+    _sets.clear()
+
+
+def hide():
+    """Hide phantoms
+
+    Removes all the phantoms and forgets the errors
+    """
+    with _lock:
+        _errors.clear()
+        _dirty.clear()
+
+    erase()
@@ -2,12 +2,15 @@
 # -*- coding: utf-8 -*-
 
 import os
+import sys
+import shlex
 import sublime
 import sublime_plugin
 from threading import Thread
 from time import sleep
 
 from ..libraries import tools
+from ..libraries import view_registry
 from ..libraries.messages import Messages
 from ..platformio.command import Command
 from ..libraries.thread_progress import ThreadProgress
@@ -22,12 +25,12 @@ class PioTerminal(Command):
         name = 'PlatformIO Terminal'
 
         self.translate = I18n().translate
-        self.window, self.view = tools.findInOpendView(name)
+        self.window, self.view = view_registry.find(name)
 
         header = self.check_header()
         direction = tools.get_setting('terminal_direction', 'right')
 
-        self.messages = Messages()
+        self.messages = Messages(kind='terminal')
         self.messages.initial_text(header)
         self.messages.panel_name(name)
         self.messages.create_panel(direction=direction, in_file=True)
@@ -118,8 +121,9 @@ class PioTerminal(Command):
             self.show_input()
             return
 
-        cmd = cmd.replace('pio ', '').replace('platformio ', '')
-        cmd = cmd.split(" ")
+        cmd = split_command(cmd)
+        if(cmd and cmd[0] in ('pio', 'platformio')):
+            cmd = cmd[1:]
 
         self.cwd = os.getcwd()
         self.init(extra_name="Pio Terminal 2.0", messages=self.messages)
@@ -143,9 +147,8 @@ class PioTerminal(Command):
         """
         cmd_return = True
 
-        if(len(cmd.split(" ")) > 1):
-            cmd = cmd.split(" ")
-            args = " ".join(cmd[1:])
+        if(len(split_command(cmd)) > 1):
+            cmd = split_command(cmd)
 
         if('help' == cmd):
             self.help_cmd()
@@ -267,3 +270,32 @@ class PioTerminal(Command):
             self.dprint("removed{0}", path)
         except:
             self.dprint("wrong_folder_name")
+
+
+def split_command(cmd):
+    """Split command
+
+    Splits the command line like a shell, the quoted arguments (paths
+    with spaces) are kept together and repeated spaces don't create
+    empty arguments
+
+    Arguments:
+        cmd {str} -- command line typed by the user
+
+    Returns:
+        list -- arguments
+    """
+    # backslashes are path separators in Windows, not escapes
+    posix = sys.platform != 'win32'
+
+    try:
+        args = shlex.split(cmd, posix=posix)
+    except ValueError:
+        # unclosed quote
+        return cmd.split()
+
+    if(not posix):
+        args = [arg[1:-1] if len(arg) > 1 and arg[0] == arg[-1] and
+                arg[0] in '"\'' else arg for arg in args]
+
+    return args
@@ -0,0 +1,156 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Warm PlatformIO runner (helper process).
+
+This script is run by the python of the Deviot virtual environment,
+it imports PlatformIO once and executes the commands sent by Deviot
+without starting a new interpreter for each one.
+
+It's not imported by the plugin, and it must work with python 2 and 3.
+
+The requests are received through a local socket, not stdin: the
+helper connects to the port opened by Deviot and sends the token in the
+first line. Each request is a JSON line:
+
+{"args": ["lib", "list"], "cwd": "/path", "env": {"PATH": "..."}}
+
+stdin is redirected to the null device, so a command waiting for input
+(an interactive prompt) gets an end of file instead of the requests.
+
+The output of the command (and its subprocesses) is written to stdout,
+when the command ends, a line with the exit code is written after a
+marker only known by Deviot:
+
+\\x00deviot-exit:<token>:<exit_code>\\n
+
+The entry point is imported before connecting, when it fails the error
+is written to stdout and the helper ends with exit code 1 without
+connecting, so Deviot starts the commands as new processes instead.
+
+The helper ends when the socket is closed.
+
+Usage: python runner_helper.py <token> --port <port>
+                               [--cli module:function] [--path dir]
+
+--cli is the entry point of the command line (platformio.__main__:main
+by default) and --path an extra folder to import it from, both are used
+to run a local stand-in CLI instead of PlatformIO.
+"""
+
+from __future__ import print_function
+
+import os
+import sys
+import json
+import socket
+import traceback
+
+
+def parse_arguments(argv):
+    options = {'token': argv[1],
+               'cli': 'platformio.__main__:main',
+               'path': None,
+               'port': None}
+
+    arguments = argv[2:]
+    while arguments:
+        name = arguments.pop(0)
+        if(name in ('--cli', '--path', '--port') and arguments):
+            options[name[2:]] = arguments.pop(0)
+
+    return options
+
+
+def connect(port, token):
+    """Connect
+
+    Opens the request channel with Deviot
+
+    Arguments:
+        port {str} -- local port opened by Deviot
+        token {str} -- token of the runner, it authenticates the helper
+
+    Returns:
+        file -- requests, one JSON line each
+    """
+    channel = socket.create_connection(('127.0.0.1', int(port)))
+    channel.sendall('{0}\n'.format(token).encode('utf-8'))
+
+    return channel.makefile('rb')
+
+
+def load_entry(cli, path=None):
+    if(path):
+        sys.path.insert(0, path)
+
+    module_name, function_name = cli.split(':')
+    module = __import__(module_name, fromlist=[function_name])
+
+    return getattr(module, function_name)
+
+
+def run(entry, request):
+    cwd = request.get('cwd')
+    env = request.get('env')
+
+    if(env):
+        os.environ.clear()
+        os.environ.update(env)
+    if(cwd):
+        os.chdir(cwd)
+
+    sys.argv = ['platformio'] + list(request.get('args', []))
+
+    try:
+        code = entry()
+    except SystemExit as exc:
+        code = exc.code
+        if(code is not None and not isinstance(code, int)):
+            print(code)
+            code = 1
+    except Exception:
+        traceback.print_exc(file=sys.stdout)
+        code = 1
+
+    return code or 0
+
+
+def main():
+    options = parse_arguments(sys.argv)
+    marker = '\x00deviot-exit:{0}:'.format(options['token'])
+
+    # the commands (and their subprocesses) never read the requests
+    devnull = os.open(os.devnull, os.O_RDONLY)
+    os.dup2(devnull, 0)
+    os.close(devnull)
+
+    # a helper without the command line must not take the requests
+    try:
+        entry = load_entry(options['cli'], options['path'])
+    except Exception:
+        traceback.print_exc(file=sys.stdout)
+        sys.exit(1)
+
+    requests = connect(options['port'], options['token'])
+
+    while True:
+        line = requests.readline()
+        if(not line):
+            break
+
+        try:
+            request = json.loads(line.decode('utf-8'))
+        except ValueError:
+            continue
+
+        code = run(entry, request)
+
+        sys.stdout.flush()
+        sys.stderr.flush()
+        os.write(1, '{0}{1}\n'.format(marker, code).encode('utf-8'))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,301 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Job scheduler for the PlatformIO commands.
+
+Each command is wrapped in a Job with its own working directory and
+environment, the scheduler runs as many jobs at the same time as the
+'parallel_jobs' setting allows (by default the number of CPUs). Jobs
+that touch the same project and environment are never run together.
+
+When a batch of more than one job finishes, a result matrix with the
+environment, exit code and duration of each job is printed in the
+Deviot console.
+"""
+
+from __future__ import absolute_import
+from __future__ import print_function
+from __future__ import division
+from __future__ import unicode_literals
+
+import time
+import sublime
+import threading
+
+from collections import deque
+from multiprocessing import cpu_count
+
+from ..libraries.tools import get_setting, singleton
+
+
+class Job(object):
+    """
+    A PlatformIO command waiting to be run (or running) by the scheduler
+
+    Arguments:
+        command {Command} -- listener who starts the process and receives
+                             the output
+        cmd {str} -- command to run
+        cwd {str} -- working directory of the process
+        env {dict} -- environment variables of the process
+    """
+
+    def __init__(self, command, cmd, cwd=None, env=None, name=None):
+        self.command = command
+        self.cmd = cmd
+        self.cwd = cwd
+        self.env = env
+        self.name = name
+        self.exit_code = None
+        self.start_time = None
+        self.duration = None
+        self.timeout = None
+        self.timer = None
+        self.cancelled = False
+        self.timed_out = False
+        self.done = threading.Event()
+
+    def conflicts(self, job):
+        """Conflicting jobs
+
+        Two jobs conflict when they run in the same project and one of
+        them works over the whole project (init, clean without env) or
+        both use the same environment
+
+        Arguments:
+            job {Job} -- job to compare
+
+        Returns:
+            bool -- True when both jobs can't run at the same time
+        """
+        if(self.cwd != job.cwd):
+            return False
+
+        env = environment_name(self.cmd)
+        other = environment_name(job.cmd)
+
+        return not env or not other or env == other
+
+    def wait(self):
+        """Wait job
+
+        Blocks the calling thread until the job is finished
+        """
+        self.done.wait()
+
+
+@singleton
+class Scheduler(object):
+
+    def __init__(self):
+        self.queue = deque()
+        self.running = []
+        self.results = []
+        self.lock = threading.RLock()
+
+    def workers(self):
+        """Workers
+
+        Number of jobs allowed to run at the same time, taken from the
+        'parallel_jobs' setting or from the CPU count
+
+        Returns:
+            int -- number of workers
+        """
+        try:
+            default = cpu_count()
+        except NotImplementedError:
+            default = 1
+
+        workers = get_setting('parallel_jobs', default)
+
+        try:
+            return max(1, int(workers))
+        except (TypeError, ValueError):
+            return default
+
+    def submit(self, job):
+        """Submit job
+
+        Adds the job to the queue and starts it if there is a free worker
+
+        Arguments:
+            job {Job} -- job to run
+        """
+        with self.lock:
+            self.queue.append(job)
+        self.dispatch()
+
+    def dispatch(self):
+        """Dispatch
+
+        Starts the queued jobs while there are free workers, a job
+        conflicting with a running one waits in the queue (in order)
+        """
+        started = []
+
+        with self.lock:
+            workers = self.workers()
+
+            for job in list(self.queue):
+                if(len(self.running) >= workers):
+                    break
+
+                busy = self.running + started
+                if(any(job.conflicts(other) for other in busy)):
+                    continue
+
+                self.queue.remove(job)
+                self.running.append(job)
+                started.append(job)
+
+        for job in started:
+            job.start_time = time.time()
+            try:
+                job.command.start_job(job)
+            except Exception:
+                self.finish(job, -1)
+                continue
+
+            if(job.timeout):
+                job.timer = threading.Timer(job.timeout, self.expire, (job,))
+                job.timer.daemon = True
+                job.timer.start()
+
+    def finish(self, job, exit_code):
+        """Finish job
+
+        Stores the result of the job, releases its worker and starts
+        the next jobs in the queue
+
+        Arguments:
+            job {Job} -- job finished
+            exit_code {int} -- exit code of the process
+        """
+        report = None
+
+        with self.lock:
+            if(job not in self.running):
+                return
+
+            job.exit_code = exit_code
+            job.duration = time.time() - job.start_time
+
+            if(job.timer):
+                job.timer.cancel()
+
+            self.running.remove(job)
+            self.results.append(job)
+
+            if(self.is_idle()):
+                report = self.results
+                self.results = []
+
+        job.done.set()
+        self.dispatch()
+
+        if(report and len(report) > 1):
+            print_matrix(report)
+
+    def expire(self, job):
+        """Expire job
+
+        Cancels the job when it's still running after its timeout
+
+        Arguments:
+            job {Job} -- running job
+        """
+        with self.lock:
+            if(job not in self.running):
+                return
+            job.timed_out = True
+
+        job.command.cancel_job(job)
+
+    def cancel_all(self):
+        """Cancel all
+
+        Removes the queued jobs (their waiters are released without an
+        exit code) and cancels the running ones
+
+        Returns:
+            int -- number of jobs cancelled
+        """
+        with self.lock:
+            queued = list(self.queue)
+            running = list(self.running)
+            self.queue.clear()
+
+        for job in queued:
+            job.cancelled = True
+            job.done.set()
+
+        for job in running:
+            job.cancelled = True
+            job.command.cancel_job(job)
+
+        return len(queued) + len(running)
+
+    def is_idle(self):
+        """Idle
+
+        Returns:
+            bool -- True when no job is running or queued
+        """
+        with self.lock:
+            return not self.running and not self.queue
+
+
+def environment_name(cmd):
+    """Environment name
+
+    Extracts the environment given with the -e flag from the command
+
+    Arguments:
+        cmd {list/str} -- platformio command
+
+    Returns:
+        str -- environment name or None
+    """
+    if(not isinstance(cmd, list)):
+        cmd = cmd.split()
+
+    cmd = [option.strip() for option in cmd]
+
+    if('-e' in cmd):
+        index = cmd.index('-e') + 1
+        if(index < len(cmd)):
+            return cmd[index]
+    return None
+
+
+def print_matrix(jobs):
+    """Result matrix
+
+    Prints a table with the environment, exit code and duration of each job
+
+    Arguments:
+        jobs {list} -- finished jobs
+    """
+    from ..libraries.messages import Messages
+
+    names = [job.name or '-' for job in jobs]
+    width = max(len(name) for name in names) + 2
+
+    lines = []
+    for name, job in zip(names, jobs):
+        lines.append('{0}{1:>6}{2:>10.1f}s'.format(
+            name.ljust(width), job.exit_code, job.duration))
+
+    table = '\n'.join(lines) + '\n'
+
+    # it's called by the thread of the last job, the panel is created in
+    # the UI thread. The table is raw text, it's not translated
+    def show_matrix():
+        messages = Messages()
+        messages.create_panel()
+        messages.print('build_matrix')
+        messages.write(table)
+
+    sublime.set_timeout(show_matrix, 0)
@@ -78,6 +78,7 @@ class Upload(Initialize):
         # add src_dir flag if it's neccesary
         self.override_src()
 
+        self.reset_errors()
         self.run_command(cmd)
 
         self.after_complete()
@@ -0,0 +1,469 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Warm PlatformIO runner.
+
+Keeps a helper process (runner_helper.py) running with the python of
+the Deviot virtual environment and PlatformIO already imported. The
+commands are sent to it through a local socket (its stdin is the null
+device, a command reading it can't take the requests) and its output is
+streamed back with the same listener interface used by AsyncProcess:
+
+listener.is_behind(), listener._on_data(data), listener._on_finished(proc)
+
+The runner runs one command at a time. When it's disabled (the
+'warm_runner' setting), busy or can't be started, spawn() returns None
+and the command is started as a new process.
+
+The helper imports the command line before connecting, a helper who
+ends before that (PlatformIO can't be imported) is not started again
+until PlatformIO changes.
+"""
+
+from __future__ import absolute_import
+from __future__ import print_function
+from __future__ import division
+from __future__ import unicode_literals
+
+import os
+import sys
+import json
+import time
+import uuid
+import socket
+import threading
+import subprocess
+
+from ..api import deviot
+from ..libraries import launcher
+from ..libraries.tools import get_setting
+
+# seconds waiting for the helper to connect
+CONNECT_TIMEOUT = 10
+# seconds between the checks of the helper while it's connecting
+CONNECT_POLL = 0.1
+
+_runner = None
+_runner_lock = threading.Lock()
+
+
+class HelperError(IOError):
+    """
+    The helper ended before connecting, output has what it wrote
+    """
+
+    def __init__(self, code, output):
+        message = 'the warm runner helper ended with exit code {0}: {1}'
+        super(HelperError, self).__init__(message.format(code, output))
+        self.code = code
+        self.output = output
+
+
+class WarmProcess(object):
+    """
+    A command executed by the warm runner, it behaves like AsyncProcess
+    """
+
+    def __init__(self, runner, helper, listener):
+        self.runner = runner
+        self.helper = helper
+        self.listener = listener
+        self.killed = False
+        self.start_time = time.time()
+        self.spawn_time = 0.0
+        self.code = None
+        self.done = threading.Event()
+
+    def kill(self):
+        """Kill process
+
+        The command runs inside of the helper, so the helper is stopped
+        (the command finishes with exit code -1), it will be started again
+        with the next command
+        """
+        if(not self.killed):
+            self.killed = True
+            self.runner.stop()
+
+    def poll(self):
+        return not self.done.is_set()
+
+    def wait(self):
+        self.done.wait()
+
+    def exit_code(self):
+        return self.code
+
+    def finish(self, code):
+        self.code = code
+        self.done.set()
+
+        if(self.listener):
+            self.listener._on_finished(self)
+
+
+class WarmRunner(object):
+    """
+    Helper process with the command line already imported
+
+    Arguments:
+        python {str} -- python executable to run the helper
+
+    Keyword Arguments:
+        cli {str} -- entry point, module:function (default: PlatformIO)
+        path {str} -- extra folder to import the entry point
+        watch {str} -- file checked to restart the helper when it changes
+                       (PlatformIO upgraded)
+    """
+
+    def __init__(self, python, cli=None, path=None, watch=None):
+        self.python = python
+        self.cli = cli
+        self.path = path
+        self.watch = watch
+        self.token = uuid.uuid4().hex
+        self.marker = '\x00deviot-exit:{0}:'.format(self.token).encode()
+        self.proc = None
+        self.channel = None
+        self.current = None
+        self.mtime = None
+        self.failed = False
+        self.lock = threading.Lock()
+
+    def is_alive(self):
+        return self.proc is not None and self.proc.poll() is None
+
+    def start(self):
+        """Start helper
+
+        Starts the helper process, waits for it to open the request
+        channel and starts the thread reading its output
+        """
+        # the channel of a helper who died
+        if(self.channel):
+            self.channel.close()
+            self.channel = None
+
+        server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+
+        try:
+            server.bind(('127.0.0.1', 0))
+            server.listen(1)
+
+            helper = os.path.join(os.path.dirname(__file__),
+                                  'runner_helper.py')
+            cmd = [self.python, '-u', helper, self.token,
+                   '--port', str(server.getsockname()[1])]
+
+            if(self.cli):
+                cmd.extend(['--cli', self.cli])
+            if(self.path):
+                cmd.extend(['--path', self.path])
+
+            env = os.environ.copy()
+            env['PYTHONUNBUFFERED'] = '1'
+
+            self.proc = launcher.spawn(cmd, env=env,
+                                       stdin=subprocess.DEVNULL)
+
+            try:
+                self.channel = accept_helper(server, self.token, self.proc)
+            except HelperError:
+                self.proc = None
+                self.failed = True
+                self.mtime = self.watch_mtime()
+                raise
+            except (IOError, OSError):
+                launcher.terminate(self.proc)
+                self.proc = None
+                raise
+        finally:
+            server.close()
+
+        self.failed = False
+        self.mtime = self.watch_mtime()
+
+        reader = threading.Thread(target=self.read_output, args=(self.proc,))
+        reader.daemon = True
+        reader.start()
+
+    def stop(self):
+        """Stop helper
+
+        Terminates the helper, the running command (if any) finishes with
+        exit code -1
+        """
+        with self.lock:
+            proc = self.proc
+            channel = self.channel
+            self.proc = None
+            self.channel = None
+
+        if(channel):
+            channel.close()
+        if(proc and proc.poll() is None):
+            launcher.terminate(proc)
+
+    def watch_mtime(self):
+        try:
+            return os.path.getmtime(self.watch) if self.watch else None
+        except OSError:
+            return None
+
+    def run(self, args, listener, cwd=None, env=None):
+        """Run command
+
+        Sends the command to the helper
+
+        Arguments:
+            args {list} -- command line arguments (without the executable)
+            listener {obj} -- receives the output of the command
+
+        Keyword Arguments:
+            cwd {str} -- working directory of the command
+            env {dict} -- environment variables of the command
+
+        Returns:
+            WarmProcess -- process handler or None when the runner is busy
+                           or the helper can't import the command line
+        """
+        with self.lock:
+            if(self.current):
+                return None
+
+            # restart when PlatformIO was upgraded or the helper died
+            if(self.is_alive() and self.watch_mtime() != self.mtime):
+                launcher.terminate(self.proc)
+                self.channel.close()
+                self.proc = None
+            if(not self.is_alive()):
+                # the helper couldn't import the command line
+                if(self.failed and self.watch_mtime() == self.mtime):
+                    return None
+                self.start()
+
+            process = WarmProcess(self, self.proc, listener)
+            self.current = process
+
+            request = {'args': args, 'cwd': cwd, 'env': env}
+            line = json.dumps(request) + '\n'
+
+            try:
+                self.channel.sendall(line.encode('utf-8'))
+            except (IOError, OSError, ValueError):
+                self.current = None
+                return None
+
+        return process
+
+    def read_output(self, proc):
+        """Read output
+
+        Streams the output of the helper to the listener of the running
+        command until the helper ends
+
+        Arguments:
+            proc {Popen} -- helper process
+        """
+        fileno = proc.stdout.fileno()
+        pending = b''
+
+        while True:
+            current = self.current
+            while(current and current.listener and not current.killed and
+                  current.listener.is_behind()):
+                time.sleep(0.01)
+
+            data = os.read(fileno, 2 ** 15)
+            if(not data):
+                break
+            pending = self.feed(proc, pending + data)
+
+        proc.stdout.close()
+        proc.wait()
+
+        # the helper ended in the middle of a command
+        self.end_command(proc, -1)
+
+    def feed(self, proc, pending):
+        """Feed output
+
+        Sends the output to the listener, and finishes the command when
+        the exit marker is found. The bytes that could be the beginning
+        of a marker split between two reads are kept for the next feed
+
+        Arguments:
+            proc {Popen} -- helper process who wrote the output
+            pending {bytes} -- output not delivered yet
+
+        Returns:
+            bytes -- output to keep for the next read
+        """
+        while pending:
+            index = pending.find(self.marker)
+
+            if(index == -1):
+                keep = pending.rfind(b'\x00')
+                if(keep == -1 or not self.marker.startswith(pending[keep:])):
+                    keep = len(pending)
+                self.deliver(proc, pending[:keep])
+                return pending[keep:]
+
+            end = pending.find(b'\n', index)
+            if(end == -1):
+                self.deliver(proc, pending[:index])
+                return pending[index:]
+
+            self.deliver(proc, pending[:index])
+            code = pending[index + len(self.marker):end]
+            pending = pending[end + 1:]
+
+            try:
+                code = int(code)
+            except ValueError:
+                code = 1
+            self.end_command(proc, code)
+
+        return pending
+
+    def deliver(self, proc, data):
+        current = self.current
+        if(data and current and current.helper is proc and current.listener):
+            current.listener._on_data(data)
+
+    def end_command(self, proc, code):
+        with self.lock:
+            current = self.current
+            if(not current or current.helper is not proc):
+                return
+            self.current = None
+
+        current.finish(code)
+
+
+def accept_helper(server, token, proc=None):
+    """Accept helper
+
+    Waits for the helper to connect and checks its token, another local
+    process can't send commands to the runner
+
+    Arguments:
+        server {socket} -- listening socket
+        token {str} -- token of the runner
+
+    Keyword Arguments:
+        proc {Popen} -- helper process, HelperError is raised when it
+                        ends before connecting
+
+    Returns:
+        socket -- request channel
+    """
+    deadline = time.time() + CONNECT_TIMEOUT
+    server.settimeout(CONNECT_POLL)
+
+    while True:
+        try:
+            channel = server.accept()[0]
+            break
+        except socket.timeout:
+            if(proc is not None and proc.poll() is not None):
+                output = proc.stdout.read().decode('utf-8', 'replace')
+                proc.stdout.close()
+                raise HelperError(proc.returncode, output.strip())
+            if(time.time() > deadline):
+                raise
+
+    channel.settimeout(CONNECT_TIMEOUT)
+
+    hello = b''
+    try:
+        while(not hello.endswith(b'\n') and len(hello) < 256):
+            data = channel.recv(256)
+            if(not data):
+                break
+            hello += data
+    except (IOError, OSError):
+        channel.close()
+        raise
+
+    if(hello.strip() != token.encode('utf-8')):
+        channel.close()
+        raise IOError('the warm runner helper sent a wrong token')
+
+    channel.settimeout(None)
+
+    return channel
+
+
+def python_executable():
+    """Python executable
+
+    Python of the Deviot virtual environment
+
+    Returns:
+        str -- executable path or None when it's not installed
+    """
+    if(launcher.resolve()['external_bins']):
+        return None
+
+    exe = 'python.exe' if sys.platform == 'win32' else 'python'
+    python = os.path.join(deviot.bin_path(), exe)
+
+    if(not os.path.exists(python)):
+        return None
+
+    return python
+
+
+def get_runner():
+    """Warm runner
+
+    The warm runner when the 'warm_runner' setting is enabled
+
+    Returns:
+        WarmRunner -- runner or None
+    """
+    global _runner
+
+    if(not get_setting('warm_runner', False)):
+        return None
+
+    with _runner_lock:
+        if(_runner is None):
+            python = python_executable()
+            if(not python):
+                return None
+
+            exe = 'platformio.exe' if sys.platform == 'win32' else 'platformio'
+            watch = os.path.join(deviot.bin_path(), exe)
+
+            _runner = WarmRunner(python, watch=watch)
+
+    return _runner
+
+
+def spawn(args, listener, cwd=None, env=None):
+    """Spawn command
+
+    Runs the command in the warm runner
+
+    Arguments:
+        args {list} -- PlatformIO arguments
+        listener {obj} -- receives the output of the command
+
+    Keyword Arguments:
+        cwd {str} -- working directory of the command
+        env {dict} -- environment variables of the command
+
+    Returns:
+        WarmProcess -- process or None to start a new process instead
+    """
+    runner = get_runner()
+    if(not runner):
+        return None
+
+    try:
+        return runner.run(args, listener, cwd=cwd, env=env)
+    except (IOError, OSError):
+        return None
@@ -13,9 +13,11 @@ from .commands import *
 
 try:
     from .api import deviot
-    from .libraries.tools import save_setting, findInOpendView
+    from .libraries.tools import save_setting
+    from .libraries import view_registry
     from .libraries.preferences_bridge import PreferencesBridge
     from .libraries import messages
+    from .platformio import phantoms
 except ImportError:
     pass
 
@@ -24,6 +26,9 @@ package_name = deviot.plugin_name()
 def plugin_loaded():
     window = sublime.active_window()
 
+    # index the consoles and monitors already open
+    view_registry.scan()
+
     # Checks if deviot is installed
     window.run_command("deviot_check_requirements")
 
@@ -83,7 +88,12 @@ class DeviotListener(EventListener):
     def on_activated(self, view):
         PreferencesBridge().set_status_information()
 
+    def on_new(self, view):
+        view_registry.register(view)
+
     def on_pre_close(self, view):
+        view_registry.pre_close(view)
+
         # run on_pre_close to get the window instance
         try:
             name = view.name()
@@ -91,10 +101,18 @@ class DeviotListener(EventListener):
         except:
             pass
 
+    def on_load(self, view):
+        view_registry.register(view)
+
+        # errors of the last compilation in a file opened later
+        phantoms.on_load(view)
+
     def on_close(self, view):
+        phantoms.release(view)
+
         # close empty panel
         name = view.name()
-        window, view = findInOpendView(name)
+        window = view_registry.unregister(view) or sublime.active_window()
 
         if(messages.check_empty_panel(window)):
             messages.close_panel(window)
@@ -0,0 +1,61 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Loads the modules of the plugin that only use the standard library from
+their files, and the ones importing the Sublime Text API as part of the
+package, so they can be tested without Sublime Text.
+"""
+
+import os
+import sys
+import types
+import importlib
+
+from importlib.util import spec_from_file_location, module_from_spec
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def load(*parts):
+    """Load module
+
+    Arguments:
+        *parts {str} -- path of the file, relative to the plugin folder
+
+    Returns:
+        module -- loaded module
+    """
+    file_path = os.path.join(ROOT, *parts)
+    name = os.path.splitext(parts[-1])[0]
+
+    spec = spec_from_file_location(name, file_path)
+    module = module_from_spec(spec)
+    spec.loader.exec_module(module)
+
+    return module
+
+
+def load_package(name):
+    """Load package module
+
+    Imports a module of the plugin with its relative imports, the plugin
+    folder is registered as the 'Deviot' package and the stand-in of the
+    Sublime Text API (tests/standin/sublime.py) is used
+
+    Arguments:
+        name {str} -- dotted name inside of the plugin (platformio.command)
+
+    Returns:
+        module -- imported module
+    """
+    standin = os.path.join(ROOT, 'tests', 'standin')
+    if(standin not in sys.path):
+        sys.path.insert(0, standin)
+
+    if('Deviot' not in sys.modules):
+        package = types.ModuleType('Deviot')
+        package.__path__ = [ROOT]
+        sys.modules['Deviot'] = package
+
+    return importlib.import_module('Deviot.' + name)
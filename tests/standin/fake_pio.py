@@ -0,0 +1,43 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Stand-in of the PlatformIO command line for the warm runner tests, its
+entry point is fake_pio:main
+
+echo [args]: prints the arguments and the working directory
+prompt: reads a line from stdin, like an interactive prompt
+child-prompt: a subprocess reads stdin
+fail: exits with code 3
+sleep: prints a line and waits for a minute
+"""
+
+from __future__ import print_function
+
+import os
+import sys
+import time
+import subprocess
+
+
+def main():
+    args = sys.argv[1:]
+    command = args[0] if args else ''
+
+    if(command == 'echo'):
+        print('args', ' '.join(args[1:]))
+        print('cwd', os.getcwd())
+    elif(command == 'prompt'):
+        print('answer', repr(sys.stdin.readline()))
+    elif(command == 'child-prompt'):
+        sys.stdout.flush()
+        subprocess.call([sys.executable, '-c',
+                         'import sys; print("child", repr(sys.stdin.read()))'])
+    elif(command == 'fail'):
+        sys.exit(3)
+    elif(command == 'sleep'):
+        print('sleeping')
+        sys.stdout.flush()
+        time.sleep(60)
+
+    return 0
@@ -0,0 +1,109 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Stand-in of the Sublime Text API with the names imported by the modules
+under test. The callbacks of set_timeout are never run, the tests
+check them with clear_timeouts()
+"""
+
+LAYOUT_INLINE = 0
+LAYOUT_BELOW = 1
+LAYOUT_BLOCK = 2
+ENCODED_POSITION = 1
+
+_timeouts = []
+
+
+class Settings(dict):
+
+    def get(self, key, default=None):
+        return dict.get(self, key, default)
+
+    def set(self, key, value):
+        self[key] = value
+
+    def erase(self, key):
+        self.pop(key, None)
+
+
+_settings = Settings()
+
+
+class Region(object):
+
+    def __init__(self, a, b=None):
+        self.a = a
+        self.b = a if b is None else b
+
+
+class Phantom(object):
+
+    def __init__(self, region, content, layout):
+        self.region = region
+        self.content = content
+        self.layout = layout
+
+
+class PhantomSet(object):
+
+    def __init__(self, view, key=''):
+        self.view = view
+        self.key = key
+        self.phantoms = []
+
+    def update(self, phantoms):
+        self.phantoms = list(phantoms)
+
+
+def set_timeout(callback, delay=0):
+    _timeouts.append((delay, callback))
+
+
+set_timeout_async = set_timeout
+
+
+def clear_timeouts():
+    """Clear timeouts
+
+    Forgets the callbacks scheduled until now without running them
+
+    Returns:
+        list -- delays of the callbacks
+    """
+    delays = [delay for delay, callback in _timeouts]
+    del _timeouts[:]
+
+    return delays
+
+
+def load_settings(name):
+    return _settings
+
+
+def save_settings(name):
+    pass
+
+
+def platform():
+    return 'linux'
+
+
+def version():
+    return '3211'
+
+
+def active_window():
+    return None
+
+
+def windows():
+    return []
+
+
+def status_message(message):
+    pass
+
+
+def message_dialog(message):
+    pass
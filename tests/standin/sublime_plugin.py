@@ -0,0 +1,32 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Stand-in of the base classes of the Sublime Text plugins
+"""
+
+
+class WindowCommand(object):
+
+    def __init__(self, window=None):
+        self.window = window
+
+
+class TextCommand(object):
+
+    def __init__(self, view=None):
+        self.view = view
+
+
+class ApplicationCommand(object):
+    pass
+
+
+class EventListener(object):
+    pass
+
+
+class ViewEventListener(object):
+
+    def __init__(self, view=None):
+        self.view = view
@@ -0,0 +1,126 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Tests of the compiler and linker diagnostics parser and of the store of
+the diagnostics of each build.
+
+Run them with: python -m unittest discover -s tests
+"""
+
+import unittest
+
+from collections import deque
+
+from loader import load, load_package
+
+diagnostics = load('platformio', 'diagnostics.py')
+store = load_package('platformio.diagnostics_store')
+
+
+class TestLinkerLines(unittest.TestCase):
+
+    def test_linker_names(self):
+        lines = ['ld: cannot find -lfoo',
+                 'collect2: error: ld returned 1 exit status',
+                 'collect2.exe: error: ld returned 1 exit status',
+                 'ld.exe: cannot find -lfoo',
+                 'arm-none-eabi-ld: region `FLASH\' overflowed',
+                 'xtensa-lx106-elf-ld.exe: cannot find -lfoo',
+                 '/opt/toolchain/bin/avr-ld: cannot find -lm',
+                 'C:\\toolchain\\bin\\ld.exe: cannot find -lm']
+
+        for line in lines:
+            result = diagnostics.parse_line(line)
+            self.assertIsNotNone(result, line)
+            self.assertEqual(result[3], diagnostics.ERROR)
+
+    def test_words_ending_in_ld(self):
+        lines = ['Threshold: 3 bytes',
+                 'World: hello',
+                 'Hello World: 42',
+                 'old: value',
+                 'build: done',
+                 'my-field: 1',
+                 'Build: ld returned 1 exit status']
+
+        for line in lines:
+            self.assertIsNone(diagnostics.parse_line(line), line)
+
+    def test_collect2_text(self):
+        result = diagnostics.parse_line(
+            'collect2: error: ld returned 1 exit status')
+
+        self.assertEqual(result, (None, 0, 0, diagnostics.ERROR,
+                                  'ld returned 1 exit status'))
+
+
+class TestCompilerLines(unittest.TestCase):
+
+    def test_error_with_column(self):
+        result = diagnostics.parse_line(
+            "src/main.cpp:10:5: error: 'foo' was not declared in this scope")
+
+        self.assertEqual(result, ('src/main.cpp', 10, 5, diagnostics.ERROR,
+                                  "'foo' was not declared in this scope"))
+
+    def test_split_between_chunks(self):
+        parser = diagnostics.DiagnosticsParser()
+
+        self.assertEqual(parser.feed('src/main.cpp:3: warn'), [])
+        found = parser.feed('ing: unused variable\nThreshold: 3 bytes\n')
+
+        self.assertEqual(found, [('src/main.cpp', 3, 1, diagnostics.WARNING,
+                                  'unused variable')])
+
+
+class TestStoreBatches(unittest.TestCase):
+
+    def setUp(self):
+        store._builds = deque(maxlen=10)
+        store._batches.clear()
+
+    def tearDown(self):
+        store._builds = None
+
+    def build(self, project, env, text):
+        build = store.begin(project, env)
+        store.add(build, [('src/main.cpp', 1, 1, 'error', text)],
+                  cwd=project)
+        build.exit = 1
+        return build
+
+    def test_environments_of_a_batch_are_merged(self):
+        store.new_batch('/a')
+        self.build('/a', 'uno', 'first')
+        self.build('/a', 'esp32', 'second')
+
+        build = store.last_build('/a')
+
+        self.assertEqual([item.text for item in build.items],
+                         ['first', 'second'])
+        self.assertEqual(build.env, 'uno, esp32')
+        self.assertEqual(build.exit, 1)
+
+        # the cursor is kept between calls
+        self.assertEqual(build.step().text, 'first')
+        self.assertEqual(store.last_build('/a').step().text, 'second')
+
+    def test_last_batch_of_the_project(self):
+        store.new_batch('/a')
+        self.build('/a', 'uno', 'old')
+
+        store.new_batch('/a')
+        self.build('/a', 'uno', 'new')
+
+        store.new_batch('/b')
+        self.build('/b', 'uno', 'other project')
+
+        self.assertEqual([item.text for item in store.last_build('/a').items],
+                         ['new'])
+        self.assertEqual(store.last_build().items[0].text, 'other project')
+        self.assertIsNone(store.last_build('/c'))
+
+
+if __name__ == '__main__':
+    unittest.main()
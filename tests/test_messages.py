@@ -0,0 +1,137 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Tests of the output queues of the consoles (libraries/messages.py).
+
+Run them with: python -m unittest discover -s tests
+"""
+
+import sys
+import time
+import unittest
+
+from loader import load_package
+
+messages = load_package('libraries.messages')
+sublime = sys.modules['sublime']
+
+
+class Writer(object):
+    """
+    Console receiving the text taken from its queue
+    """
+
+    kind = 'serial'
+
+    def __init__(self):
+        self.text = ''
+
+    def send_to_file(self, text, rewind):
+        self.text += text
+
+
+class TestServiceQueues(unittest.TestCase):
+
+    def setUp(self):
+        messages.view_queues.clear()
+        messages.scheduled = True
+        sublime.clear_timeouts()
+
+    def tearDown(self):
+        messages.view_queues.clear()
+        messages.scheduled = False
+
+    def test_rate_debt_is_recovered_without_text(self):
+        writer = Writer()
+        queue = messages.ViewQueue(writer, rate=100)
+        queue.chunks.append((time.time(), 'x' * 150))
+        messages.view_queues['view'] = queue
+
+        # the chunk is written in a single frame, leaving a debt
+        messages.service_queues()
+        self.assertEqual(writer.text, 'x' * 150)
+        self.assertIn('view', messages.view_queues)
+        self.assertEqual(sublime.clear_timeouts(), [messages.FRAME])
+
+        # the queue is empty, the debt is recovered in the next frames
+        queue.updated -= 2
+        messages.service_queues()
+
+        self.assertNotIn('view', messages.view_queues)
+        self.assertFalse(messages.scheduled)
+        self.assertEqual(sublime.clear_timeouts(), [])
+
+    def test_rate_limit_holds_text(self):
+        writer = Writer()
+        queue = messages.ViewQueue(writer, rate=100)
+        queue.allowance = -50
+        queue.chunks.append((time.time(), 'abc'))
+        messages.view_queues['view'] = queue
+
+        messages.service_queues()
+        self.assertEqual(writer.text, '')
+        self.assertTrue(messages.scheduled)
+
+        queue.updated -= 1
+        messages.service_queues()
+        self.assertEqual(writer.text, 'abc')
+
+
+class View(object):
+    """
+    Output view, only its syntax is used
+    """
+
+    def __init__(self, syntax):
+        self.syntax = syntax
+
+    def settings(self):
+        return {'syntax': self.syntax}
+
+    def assign_syntax(self, syntax):
+        self.syntax = syntax
+
+
+class TestAdaptiveSyntax(unittest.TestCase):
+
+    def setUp(self):
+        sublime.clear_timeouts()
+
+        self.view = View(messages.console_syntax())
+        self.console = messages.Messages(output_view=self.view)
+        self.console.plain_threshold = 1000
+
+    def test_syntax_restored_after_the_output_stops(self):
+        window = messages.THROUGHPUT_WINDOW
+
+        # a burst over the threshold, then nothing more is written
+        self.console.throughput = [time.time() - window, 0]
+        self.console.adapt_syntax(5000)
+
+        self.assertEqual(self.view.syntax, messages.PLAIN_SYNTAX)
+        self.assertEqual(sublime.clear_timeouts(), [int(window * 1000)])
+
+        self.console.throughput[0] -= window
+        self.console.recheck_syntax()
+
+        self.assertEqual(self.view.syntax, messages.console_syntax())
+        self.assertEqual(sublime.clear_timeouts(), [])
+        self.assertFalse(self.console.rechecking)
+
+    def test_recheck_while_the_output_is_fast(self):
+        window = messages.THROUGHPUT_WINDOW
+
+        self.console.throughput = [time.time() - window, 0]
+        self.console.adapt_syntax(5000)
+        sublime.clear_timeouts()
+
+        self.console.throughput = [time.time() - window, 5000]
+        self.console.recheck_syntax()
+
+        self.assertEqual(self.view.syntax, messages.PLAIN_SYNTAX)
+        self.assertEqual(sublime.clear_timeouts(), [int(window * 1000)])
+
+
+if __name__ == '__main__':
+    unittest.main()
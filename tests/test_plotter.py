@@ -0,0 +1,55 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Tests of the serial plotter.
+
+Run them with: python -m unittest discover -s tests
+"""
+
+import unittest
+
+from loader import load
+
+plotter = load('libraries', 'plotter.py')
+
+
+class TestParseLine(unittest.TestCase):
+
+    def test_pairs(self):
+        self.assertEqual(plotter.parse_line('temp:21.5 hum=40'),
+                         [('temp', 21.5), ('hum', 40.0)])
+
+    def test_csv(self):
+        self.assertEqual(plotter.parse_line('1,2.5;-3'),
+                         [('1', 1.0), ('2', 2.5), ('3', -3.0)])
+
+    def test_not_finite_csv(self):
+        for line in ('inf,5', 'nan,5', '5,-Infinity', '1e999,5'):
+            self.assertEqual(plotter.parse_line(line), [], line)
+
+    def test_not_finite_pair(self):
+        self.assertEqual(plotter.parse_line('a:1e999 b:2'), [('b', 2.0)])
+
+
+class TestPlotter(unittest.TestCase):
+
+    def test_render_after_not_finite_values(self):
+        chart = plotter.Plotter()
+        chart.feed(b'1,2\n3,4\ninf,5\nnan,1\n')
+
+        text = chart.render(width=20, height=5)
+
+        self.assertEqual(chart.total, 2)
+        self.assertIn('last 3', text)
+
+    def test_csv_export(self):
+        chart = plotter.Plotter(samples=3)
+        chart.feed(b'a:1 b:2\na:3\na:5 b:6\na:7\n')
+
+        self.assertEqual(chart.to_csv(),
+                         'sample,a,b\n1,3,\n2,5,6\n3,7,\n')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,259 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Tests of the warm runner helper (platformio/runner_helper.py) against a
+stand-in CLI (tests/standin/fake_pio.py). The tests speak the protocol
+of WarmRunner: the helper connects to a local port, sends its token and
+receives the requests through the socket. WarmRunner itself is tested
+with the same stand-in.
+
+Run them with: python -m unittest discover -s tests
+"""
+
+import os
+import sys
+import json
+import socket
+import unittest
+import threading
+import subprocess
+
+from loader import ROOT, load_package
+
+warm_runner = load_package('platformio.warm_runner')
+
+sublime = sys.modules['sublime']
+
+HELPER = os.path.join(ROOT, 'platformio', 'runner_helper.py')
+STANDIN = os.path.join(ROOT, 'tests', 'standin')
+TOKEN = 'test-token'
+MARKER = '\x00deviot-exit:{0}:'.format(TOKEN).encode()
+TIMEOUT = 10
+
+
+class TestRunnerHelper(unittest.TestCase):
+
+    def setUp(self):
+        server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        server.bind(('127.0.0.1', 0))
+        server.listen(1)
+        server.settimeout(TIMEOUT)
+
+        cmd = [sys.executable, '-u', HELPER, TOKEN,
+               '--port', str(server.getsockname()[1]),
+               '--cli', 'fake_pio:main', '--path', STANDIN]
+
+        # stdin is a pipe here, the helper must not read the requests
+        # (or give it to the commands) from it
+        self.proc = subprocess.Popen(cmd, stdin=subprocess.PIPE,
+                                     stdout=subprocess.PIPE,
+                                     stderr=subprocess.STDOUT)
+        self.proc.stdin.write(b'{"args": ["echo", "from-stdin"]}\n')
+        self.proc.stdin.flush()
+
+        self.channel = server.accept()[0]
+        self.channel.settimeout(TIMEOUT)
+        server.close()
+
+        self.pending = b''
+
+    def tearDown(self):
+        self.channel.close()
+        self.proc.stdin.close()
+        try:
+            self.proc.wait(TIMEOUT)
+        finally:
+            if(self.proc.poll() is None):
+                self.proc.kill()
+            self.proc.stdout.close()
+
+    def hello(self):
+        data = b''
+        while(not data.endswith(b'\n')):
+            chunk = self.channel.recv(256)
+            if(not chunk):
+                break
+            data += chunk
+        return data
+
+    def run_command(self, args, cwd=None):
+        request = {'args': args, 'cwd': cwd, 'env': None}
+        self.channel.sendall(json.dumps(request).encode('utf-8') + b'\n')
+
+        output = self.pending
+        while(MARKER not in output or not output.endswith(b'\n')):
+            data = os.read(self.proc.stdout.fileno(), 2 ** 15)
+            self.assertTrue(data, 'the helper ended: {0!r}'.format(output))
+            output += data
+
+        index = output.index(MARKER)
+        end = output.index(b'\n', index)
+        self.pending = output[end + 1:]
+
+        code = int(output[index + len(MARKER):end])
+        return output[:index].decode('utf-8'), code
+
+    def test_token(self):
+        self.assertEqual(self.hello(), TOKEN.encode() + b'\n')
+
+    def test_command(self):
+        self.hello()
+        output, code = self.run_command(['echo', 'a', 'b'], cwd=STANDIN)
+
+        self.assertEqual(code, 0)
+        self.assertIn('args a b', output)
+        self.assertIn('cwd ' + os.path.realpath(STANDIN), output)
+        self.assertNotIn('from-stdin', output)
+
+    def test_exit_code(self):
+        self.hello()
+        output, code = self.run_command(['fail'])
+
+        self.assertEqual(code, 3)
+
+    def test_prompt_gets_end_of_file(self):
+        self.hello()
+
+        output, code = self.run_command(['prompt'])
+        self.assertIn("answer ''", output)
+
+        output, code = self.run_command(['child-prompt'])
+        self.assertIn("child ''", output)
+
+        # the requests are still received after the prompts
+        output, code = self.run_command(['echo', 'after'])
+        self.assertIn('args after', output)
+
+    def test_ends_when_the_channel_is_closed(self):
+        self.hello()
+        self.channel.close()
+
+        self.assertEqual(self.proc.wait(TIMEOUT), 0)
+
+
+class Listener(object):
+    """
+    Listener of a warm process, like the command who started it
+    """
+
+    def __init__(self):
+        self.output = b''
+        self.code = None
+        self.finished = threading.Event()
+
+    def is_behind(self):
+        return False
+
+    def _on_data(self, data):
+        self.output += data
+
+    def _on_finished(self, proc):
+        self.code = proc.exit_code()
+        self.finished.set()
+
+    def wait(self):
+        self.finished.wait(TIMEOUT)
+        return self.finished.is_set()
+
+
+class TestWarmRunner(unittest.TestCase):
+
+    def setUp(self):
+        self.runner = warm_runner.WarmRunner(sys.executable,
+                                             cli='fake_pio:main',
+                                             path=STANDIN)
+
+    def tearDown(self):
+        self.runner.stop()
+
+    def run_command(self, args):
+        listener = Listener()
+        process = self.runner.run(args, listener, cwd=STANDIN)
+
+        self.assertIsNotNone(process)
+        self.assertTrue(listener.wait(), 'the command did not finish')
+        return listener
+
+    def test_commands(self):
+        listener = self.run_command(['echo', 'a'])
+        helper = self.runner.proc
+
+        self.assertEqual(listener.code, 0)
+        self.assertIn(b'args a', listener.output)
+        self.assertNotIn(b'\x00', listener.output)
+
+        listener = self.run_command(['fail'])
+        self.assertEqual(listener.code, 3)
+
+        # both commands ran in the same helper
+        self.assertIs(self.runner.proc, helper)
+
+    def test_marker_split_between_reads(self):
+        output = b'line\x00data\n' + self.runner.marker + b'3\nnext'
+
+        for split in range(1, len(output)):
+            listener = Listener()
+            proc = object()
+            self.runner.current = warm_runner.WarmProcess(self.runner, proc,
+                                                          listener)
+
+            pending = self.runner.feed(proc, output[:split])
+            pending = self.runner.feed(proc, pending + output[split:])
+
+            self.assertEqual(listener.output, b'line\x00data\n', split)
+            self.assertEqual(listener.code, 3, split)
+            self.assertEqual(pending, b'', split)
+            self.assertIsNone(self.runner.current)
+
+    def test_kill(self):
+        listener = Listener()
+        process = self.runner.run(['sleep'], listener, cwd=STANDIN)
+        helper = self.runner.proc
+
+        while(b'sleeping' not in listener.output):
+            self.assertFalse(listener.finished.wait(0.05))
+
+        process.kill()
+
+        self.assertTrue(listener.wait(), 'the command did not finish')
+        self.assertEqual(listener.code, -1)
+        self.assertIsNotNone(helper.wait(TIMEOUT))
+
+        # the next command starts a new helper
+        listener = self.run_command(['echo', 'again'])
+        self.assertIn(b'args again', listener.output)
+        self.assertIsNot(self.runner.proc, helper)
+
+    def test_helper_without_cli(self):
+        runner = warm_runner.WarmRunner(sys.executable,
+                                        cli='missing_module:main',
+                                        path=STANDIN)
+
+        with self.assertRaises(warm_runner.HelperError) as context:
+            runner.run(['echo'], Listener())
+
+        self.assertEqual(context.exception.code, 1)
+        self.assertIn('missing_module', context.exception.output)
+        self.assertIsNone(runner.proc)
+
+        # it's not started again, the command runs as a new process
+        self.assertIsNone(runner.run(['echo'], Listener()))
+
+    def test_spawn_falls_back(self):
+        runner = warm_runner.WarmRunner(sys.executable,
+                                        cli='missing_module:main',
+                                        path=STANDIN)
+
+        settings = sublime.load_settings('deviot.sublime-settings')
+        settings.set('warm_runner', True)
+        warm_runner._runner = runner
+        try:
+            self.assertIsNone(warm_runner.spawn(['echo'], Listener()))
+            self.assertTrue(runner.failed)
+        finally:
+            warm_runner._runner = None
+            settings.erase('warm_runner')
+
+if __name__ == '__main__':
+    unittest.main()